@@ -0,0 +1,247 @@
+"""
+ai_runtime.py - Yapay Zeka İşleri İçin asyncio Çalışma Ortamı
+Arayüzdeki her yapay zeka eylemi (analiz, sohbet, görsel, TTS) kendi
+threading.Thread'ini açıyordu; tek bir konu sohbeti turu birkaç thread
+başlatabiliyor, düğmelere hızlı basıldığında thread sayısı sınırsız artıyordu.
+Bu modül ayrı bir thread'de tek bir asyncio olay döngüsü çalıştırır:
+    - İşler sınırlı bir iş parçacığı havuzunda ve semafor ile sınırlı eşzamanlılıkta yürütülür.
+    - Bir işin kendi paralel alt istekleri (fan-out dalları, map-reduce bölümleri) spawn() ile
+      aynı havuzda, ayrı bir dal semaforuyla çalışır; tek tıklama sınırsız thread açamaz.
+    - Her işin zaman aşımı ve iptal belirteci vardır; LLM akışları iptal edilince bir sonraki parçada durur.
+    - Gruplar hızlı tıklamaları yönetir: "drop" çalışan iş varken yenisini yok sayar,
+      "replace" sırada bekleyen eski işi iptal eder (örn. art arda istenen görseller).
+    - Arka plandan arayüze giden tüm geri çağrılar tek bir kuyruğa yazılır ve Tk ana döngüsünde
+      tek bir after() döngüsüyle işlenir.
+"""
+
+import asyncio
+import contextvars
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+POLICY_QUEUE = "queue" # Yeni iş sıraya girer
+POLICY_DROP = "drop" # Grupta iş varken yeni istek yok sayılır
+POLICY_REPLACE = "replace" # Gruptaki eski işler iptal edilir, yalnızca son istek çalışır
+
+_current_token = contextvars.ContextVar("ai_cancel_token", default=None)
+_current_runtime = contextvars.ContextVar("ai_runtime", default=None)
+_in_branch = contextvars.ContextVar("ai_in_branch", default=False)
+
+class CancelToken:
+    """Bir işin iptal durumunu arka plan thread'leriyle paylaşan belirteç."""
+    def __init__(self):
+        self._event = threading.Event()
+
+    def cancel(self):
+        self._event.set()
+
+    @property
+    def cancelled(self):
+        return self._event.is_set()
+
+def is_cancelled():
+    """
+    Çağrıyı yapan iş iptal edildiyse (zaman aşımı, yerine yeni iş geldi veya uygulama kapanıyor) True döner.
+    Belirteç contextvars ile taşınır; AIRuntime dışında çalışan kodda her zaman False'tur.
+    """
+    token = _current_token.get()
+    return token is not None and token.cancelled
+
+def spawn(fn, *args):
+    """
+    Çalışan bir yapay zeka işinin içinden paralel bir alt iş başlatır (örn. fan-out dalı, map-reduce bölümü).
+    Alt iş, işi çalıştıran AIRuntime'ın havuzunda dal semaforuyla sınırlı olarak çalışır ve çağıranın
+    iptal belirtecini taşır. AIRuntime dışında veya bir alt işin içinden çağrılırsa fn hemen (senkron)
+    çalıştırılır; böylece dallar birbirini bekleyip havuzu kilitleyemez.
+
+    Returns:
+        concurrent.futures.Future: fn'in sonucu veya hatası.
+    """
+    runtime = _current_runtime.get()
+    if runtime is None or runtime._closed or _in_branch.get():
+        future = Future()
+        try:
+            future.set_result(fn(*args))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+    return runtime._spawn(fn, args)
+
+class AIRuntime:
+    """
+    Ayrı thread'deki asyncio olay döngüsü ve Tk köprüsü.
+    submit() herhangi bir thread'den çağrılabilir; iş fonksiyonları bloklayan (senkron) kod olabilir.
+    """
+    def __init__(self, max_concurrency=4, timeout=600, poll_ms=30, max_branches=None):
+        """
+        Args:
+            max_concurrency (int): Aynı anda çalışabilecek en fazla yapay zeka işi.
+            timeout (float): Varsayılan iş zaman aşımı (saniye).
+            poll_ms (int): Arayüz kuyruğunun kontrol aralığı.
+            max_branches (int): İşlerin spawn() ile başlattığı, aynı anda çalışabilecek en fazla alt iş
+                (None = max_concurrency). Havuzdaki thread sayısı max_concurrency + max_branches'tir.
+        """
+        self.max_concurrency = max_concurrency
+        self.max_branches = max_branches or max_concurrency
+        self.timeout = timeout
+        self.poll_ms = poll_ms
+        self._ui_queue = queue.SimpleQueue()
+        self._widget = None
+        self._closed = False
+        self._lock = threading.Lock()
+        self._groups = {} # grup adı (gruba ait olmayan işler için None) -> [(future, token), ...]
+        self._semaphore = None
+        self._branch_semaphore = None
+        # İşler ve alt işler ayrı semaforlarla sınırlanır; işler alt işlerini beklerken havuz tükenmez
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency + self.max_branches, thread_name_prefix="ai")
+        self.loop = asyncio.new_event_loop()
+        # asyncio.to_thread varsayılan havuzu kullanır; havuz sınırlı olduğu için thread sayısı da sınırlıdır
+        self.loop.set_default_executor(self._executor)
+        self._thread = threading.Thread(target=self._run_loop, name="ai-loop", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    # --- TK KÖPRÜSÜ ---
+    def attach(self, widget):
+        """Arayüz kuyruğunu widget'ın ana döngüsünde işlemeye başlar."""
+        self._widget = widget
+        widget.after(self.poll_ms, self._poll)
+
+    def ui(self, fn, *args):
+        """fn(*args)'ı Tk ana thread'inde çalıştırmak üzere kuyruğa ekler (herhangi bir thread'den çağrılabilir)."""
+        self._ui_queue.put((fn, args))
+
+    def _poll(self):
+        # Tek seferde en fazla 200 geri çağrı: akış yoğunken arayüz donmasın
+        for _ in range(200):
+            try:
+                fn, args = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                fn(*args)
+            except Exception as e:
+                print(f"Arayüz geri çağrısı hatası: {e}")
+        if not self._closed:
+            self._widget.after(self.poll_ms, self._poll)
+
+    # --- İŞ YÖNETİMİ ---
+    def submit(self, fn, *args, group=None, policy=POLICY_QUEUE, timeout=None):
+        """
+        Bloklayan fn(*args) çağrısını olay döngüsünde sınırlı eşzamanlılıkla çalıştırır.
+
+        Args:
+            group (str): İşin grubu (örn. "topic_chat"); policy grup içinde uygulanır.
+            policy (str): POLICY_QUEUE, POLICY_DROP veya POLICY_REPLACE.
+            timeout (float): Zaman aşımı (None = varsayılan).
+
+        Returns:
+            concurrent.futures.Future veya None: İş yok sayıldıysa None.
+        """
+        if self._closed:
+            return None
+        token = CancelToken()
+        with self._lock:
+            active = [entry for entry in self._groups.get(group, []) if not entry[0].done()]
+            if group is not None and active:
+                if policy == POLICY_DROP:
+                    print(f"[AI] '{group}' zaten çalışıyor, yeni istek yok sayıldı.")
+                    return None
+                if policy == POLICY_REPLACE:
+                    for future, old_token in active:
+                        old_token.cancel()
+                        future.cancel() # Henüz başlamadıysa hiç çalışmaz
+                    active = []
+            future = asyncio.run_coroutine_threadsafe(
+                self._run(fn, args, token, self.timeout if timeout is None else timeout, group), self.loop)
+            self._groups[group] = active + [(future, token)]
+        return future
+
+    async def _run(self, fn, args, token, timeout, group):
+        # Her görev kendi context kopyasında çalışır; to_thread belirteci iş thread'ine taşır
+        _current_token.set(token)
+        _current_runtime.set(self)
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        name = getattr(fn, "__name__", str(fn))
+        try:
+            async with self._semaphore:
+                if token.cancelled:
+                    return None
+                task = asyncio.ensure_future(asyncio.to_thread(fn, *args))
+                try:
+                    # shield: zaman aşımı/iptal görevi bitirmesin; thread zaten yarıda durdurulamaz
+                    return await asyncio.wait_for(asyncio.shield(task), timeout)
+                except asyncio.TimeoutError:
+                    token.cancel()
+                    print(f"[AI] {name} {timeout:.0f} sn içinde tamamlanmadı, iptal edildi.")
+                    await self._join(task)
+                except asyncio.CancelledError:
+                    token.cancel()
+                    await self._join(task)
+                    raise
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"[AI] {name} hatası: {e}")
+        finally:
+            with self._lock:
+                self._groups[group] = [entry for entry in self._groups.get(group, []) if entry[1] is not token]
+
+    def _spawn(self, fn, args):
+        # Çağıran iş thread'inin context'i (iptal belirteci) alt işe taşınır
+        context = contextvars.copy_context()
+
+        def call():
+            _in_branch.set(True)
+            return fn(*args)
+        return asyncio.run_coroutine_threadsafe(self._branch(context, call), self.loop)
+
+    async def _branch(self, context, call):
+        if self._branch_semaphore is None:
+            self._branch_semaphore = asyncio.Semaphore(self.max_branches)
+        async with self._branch_semaphore:
+            task = asyncio.ensure_future(self.loop.run_in_executor(None, context.run, call))
+            try:
+                return await asyncio.shield(task)
+            except asyncio.CancelledError:
+                await self._join(task)
+                raise
+
+    async def _join(self, task):
+        """
+        İptal edilen işin thread'i gerçekten dönene kadar bekler; semafor yuvası bu sürede bırakılmaz,
+        böylece eşzamanlı çalışan thread sayısı max_concurrency'yi aşmaz. Bu sırada gelen ek iptaller yok sayılır.
+        """
+        while not task.done():
+            try:
+                await asyncio.wait({task})
+            except asyncio.CancelledError:
+                pass
+        if not task.cancelled() and task.exception() is not None:
+            print(f"[AI] İptal edilen iş hata ile bitti: {task.exception()}")
+
+    def cancel(self, group=None):
+        """Bir gruptaki (group=None ise tüm) işleri iptal eder."""
+        with self._lock:
+            groups = [group] if group is not None else list(self._groups)
+            for name in groups:
+                for future, token in self._groups.get(name, []):
+                    token.cancel()
+                    future.cancel()
+
+    def active_count(self):
+        """Gruplardaki bitmemiş iş sayısı."""
+        with self._lock:
+            return sum(1 for entries in self._groups.values() for future, _ in entries if not future.done())
+
+    def shutdown(self):
+        """Tüm işleri iptal eder ve olay döngüsünü durdurur (uygulama kapanırken)."""
+        self._closed = True
+        self.cancel()
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -12,6 +12,8 @@ import threading
 import time
 import os
 import queue
+from audio_utils import StreamingResampler, get_device_samplerate
+from device_registry import get_registry
 
 class AudioRecorder:
     """
@@ -27,8 +29,11 @@ class AudioRecorder:
         self.mic_index = None
         self.stream = None
         
-        # Whisper için standart değerler
+        # Whisper için standart değerler (segmentler her zaman bu hızda üretilir)
         self.samplerate = 16000
+        # Mikrofonun doğal hızı; kayıt bu hızda açılıp 16 kHz'e dönüştürülür
+        self.device_samplerate = self.samplerate
+        self.resampler = None
         self.chunk_duration = 5.0  # Her bir ses segmentinin saniye cinsinden süresi
         
         self.buffer = np.zeros((0, 1), dtype=np.float32)
@@ -51,7 +56,8 @@ class AudioRecorder:
         if self.is_recording:
             return
             
-        self.mic_index = mic_index
+        # Cihaz takılıp çıkarılmış olabilir; geçersiz indeks yerine geçerli bir girişe düş
+        self.mic_index = get_registry().resolve_input_index(mic_index)
         self.is_recording = True
         self.full_recording = [] 
         self.buffer = np.zeros((0, 1), dtype=np.float32)
@@ -115,12 +121,15 @@ class AudioRecorder:
     def _process_audio(self):
         """Arka planda çalışan ana ses işleme döngüsü."""
         try:
-            # Mikrofon akışını (stream) başlat
-            self.stream = sd.InputStream(samplerate=self.samplerate, 
-                                       channels=1, 
-                                       callback=self._audio_callback, 
-                                       device=self.mic_index)
-            with self.stream:
+            # Mikrofon akışını cihazın doğal hızında başlat (USB/Bluetooth mikrofonlar 16 kHz desteklemeyebilir)
+            self.device_samplerate = get_device_samplerate(self.mic_index)
+            self.resampler = StreamingResampler(self.device_samplerate, self.samplerate)
+            # Cihaz kaydı akış oluşturulmadan önce meşgul işaretlenir (PortAudio yeniden başlatılmasın)
+            with get_registry().in_use(), \
+                 sd.InputStream(samplerate=self.device_samplerate, 
+                                channels=1, 
+                                callback=self._audio_callback, 
+                                device=self.mic_index) as self.stream:
                 chunk_samples = int(self.samplerate * self.chunk_duration)
                 
                 while self.is_recording:
@@ -128,6 +137,10 @@ class AudioRecorder:
                         # Giriş kuyruğundan verileri al ve buffer'a ekle
                         while not self.input_queue.empty():
                             data = self.input_queue.get_nowait()
+                            # Blok 16 kHz'e dönüştürülür (filtre durumu bloklar arasında korunur)
+                            data = self.resampler.process(data)
+                            if len(data) == 0:
+                                continue
                             self.full_recording.append(data)
                             self.last_chunk = data
                             self.buffer = np.concatenate((self.buffer, data), axis=0)
@@ -144,6 +157,8 @@ class AudioRecorder:
         except Exception as e:
             print(f"Kayıt akış hatası: {e}")
             self.is_recording = False
+            # Cihaz çıkarılmış olabilir: listeyi yeniden tara
+            get_registry().request_rescan()
 
     def _handle_segment(self, segment):
         """Bir ses segmentini kontrol eder (sessizlik ayıklama) ve diske kaydeder."""
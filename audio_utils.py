@@ -1,21 +1,65 @@
 """
 audio_utils.py - Ses Donanım Yardımcı Araçları
-Bu modül, sistemdeki ses giriş cihazlarını (mikrofonları) listelemek 
-ve varsayılan cihazı bulmak için yardımcı fonksiyonlar içerir.
+Bu modül, sistemdeki ses giriş cihazlarını (mikrofonları) listelemek,
+varsayılan cihazı bulmak ve cihazın doğal örnekleme hızında alınan sesi
+Whisper'ın beklediği 16 kHz'e dönüştürmek için yardımcı araçlar içerir.
 """
 
+from fractions import Fraction
+
+import numpy as np
 import sounddevice as sd
+from scipy import signal
+
+# Whisper modellerinin beklediği sabit örnekleme hızı
+WHISPER_SAMPLERATE = 16000
+
+# Cihaz desteği sorgulanırken denenecek yaygın örnekleme hızları
+COMMON_SAMPLERATES = [8000, 16000, 22050, 32000, 44100, 48000, 96000]
+
+def get_supported_samplerates(device_index, channels=1):
+    """
+    Bir giriş cihazının açabildiği örnekleme hızlarını döner.
+
+    Args:
+        device_index (int): Cihaz indeksi.
+        channels (int): Denenecek kanal sayısı.
+
+    Returns:
+        list: Desteklenen örnekleme hızları (Hz).
+    """
+    rates = []
+    for rate in COMMON_SAMPLERATES:
+        try:
+            sd.check_input_settings(device=device_index, channels=channels, samplerate=rate)
+            rates.append(rate)
+        except Exception:
+            continue
+    return rates
+
+def get_device_samplerate(device_index):
+    """
+    Cihazın varsayılan (doğal) örnekleme hızını döner.
+    Host API'nin kalitesiz dönüşümünü atlamak için kayıt bu hızda açılır.
+    """
+    from device_registry import get_registry
+    device = get_registry().get_device(device_index)
+    if device is None:
+        device = get_registry().get_device(get_registry().default_input_index())
+    if device is None:
+        return WHISPER_SAMPLERATE
+    return int(device["default_samplerate"])
 
 def get_microphones():
     """
     Sistemde kayıt yapabilen kullanılabilir giriş cihazlarını listeler.
+    Cihaz listesi DeviceRegistry önbelleğinden okunur.
     
     Returns:
-        list: "Cihazİndeksi: CihazAdı" formatında yaylı diziler listesi.
+        list: "Cihazİndeksi: CihazAdı (doğal hız Hz)" formatında yaylı diziler listesi.
     """
-    devices = sd.query_devices()
-    # Sadece giriş kanalı (max_input_channels > 0) olan cihazları filtrele
-    return [f"{i}: {d['name']}" for i, d in enumerate(devices) if d['max_input_channels'] > 0]
+    from device_registry import get_registry
+    return get_registry().get_microphones()
 
 def get_default_microphone_index():
     """
@@ -24,23 +68,86 @@ def get_default_microphone_index():
     Returns:
         int veya None: Bulunan mikrofonun indeksi veya bulunamazsa None.
     """
-    devices = sd.query_devices()
-    input_devs = [(i, d) for i, d in enumerate(devices) if d['max_input_channels'] > 0]
-    
-    if not input_devs:
-        return None
-        
-    try:
-        # Öncelikle sitemin kendi belirlediği varsayılan giriş cihazını kontrol et
-        default_in = sd.default.device[0]
-        if default_in is not None and default_in >= 0:
-             # Cihazın geçerli ve giriş kanalı olduğunu doğrula
-             if devices[default_in]['max_input_channels'] > 0:
-                  return default_in
-    except:
-        # Hata durumunda sessizce devam et
-        pass
-    
-    # Varsayılan bulunamazsa, en çok giriş kanalına sahip olanı seç (genelde ana mikrofon budur)
-    best = max(input_devs, key=lambda x: x[1]['max_input_channels'])
-    return best[0]
+    from device_registry import get_registry
+    return get_registry().default_input_index()
+
+class StreamingResampler:
+    """
+    Blok blok gelen sesi polifaz FIR filtre ile hedef hıza dönüştüren sınıf.
+    Filtre geçmişi bloklar arasında taşındığı için blok sınırlarında
+    çıtırtı veya faz kayması oluşmaz. Tüm hesaplama NumPy ile vektörize edilir.
+    """
+    def __init__(self, src_rate, dst_rate=WHISPER_SAMPLERATE, half_taps=10, beta=5.0):
+        """
+        Args:
+            src_rate (int): Giriş örnekleme hızı (cihazın doğal hızı).
+            dst_rate (int): Çıkış örnekleme hızı (Whisper için 16000).
+            half_taps (int): Her faz için filtre yarı uzunluğu (kalite/hız dengesi).
+            beta (float): Kaiser penceresi parametresi.
+        """
+        self.src_rate = int(src_rate)
+        self.dst_rate = int(dst_rate)
+        ratio = Fraction(self.dst_rate, self.src_rate)
+        self.up = ratio.numerator
+        self.down = ratio.denominator
+        self.passthrough = self.up == 1 and self.down == 1
+
+        if not self.passthrough:
+            # scipy.signal.resample_poly ile aynı tasarım: alçak geçiren Kaiser FIR
+            max_rate = max(self.up, self.down)
+            n_taps = 2 * half_taps * max_rate + 1
+            h = signal.firwin(n_taps, 1.0 / max_rate, window=("kaiser", beta)) * self.up
+            # Filtreyi faz sayısının katına tamamla ve polifaz matrisine böl: (up, taps_per_phase)
+            taps_per_phase = -(-n_taps // self.up)
+            h = np.concatenate([h, np.zeros(taps_per_phase * self.up - n_taps)])
+            self.phases = h.reshape(taps_per_phase, self.up).T.astype(np.float32)
+            self.taps_per_phase = taps_per_phase
+        self.reset()
+
+    def reset(self):
+        """Filtre durumunu sıfırlar (yeni kayıt başlangıcında çağrılır)."""
+        self.history = None
+        self.consumed = 0 # Şimdiye kadar işlenen toplam giriş örneği
+        self.produced = 0 # Şimdiye kadar üretilen toplam çıkış örneği
+
+    def process(self, block):
+        """
+        Bir ses bloğunu dönüştürür.
+
+        Args:
+            block (np.ndarray): (frames,) veya (frames, channels) şeklinde float ses.
+
+        Returns:
+            np.ndarray: Hedef hızdaki ses, girişle aynı boyut düzeninde.
+        """
+        block = np.asarray(block, dtype=np.float32)
+        if self.passthrough or len(block) == 0:
+            return block
+
+        squeeze = block.ndim == 1
+        data = block[:, None] if squeeze else block
+        k = self.taps_per_phase
+
+        if self.history is None:
+            self.history = np.zeros((k - 1, data.shape[1]), dtype=np.float32)
+        buf = np.concatenate([self.history, data], axis=0)
+
+        # Bu blokla hesaplanabilecek çıkış örnekleri: n*down/up < toplam giriş
+        total_in = self.consumed + len(data)
+        last = (total_in * self.up - 1) // self.down
+        n = np.arange(self.produced, last + 1)
+        if len(n) == 0:
+            out = np.zeros((0, data.shape[1]), dtype=np.float32)
+        else:
+            pos = n * self.down
+            phase = pos % self.up
+            # Buffer içindeki konum (geçmiş k-1 örnekle başlar)
+            base = pos // self.up - self.consumed + (k - 1)
+            idx = base[:, None] - np.arange(k)[None, :]
+            windows = buf[idx] # (n, k, channels)
+            out = np.einsum("nk,nkc->nc", self.phases[phase], windows).astype(np.float32)
+
+        self.history = buf[len(buf) - (k - 1):]
+        self.consumed = total_in
+        self.produced += len(n)
+        return out[:, 0] if squeeze else out
@@ -21,7 +21,26 @@ DEFAULT_CONFIG = {
     "language": "turkish",
     "theme": "Dark",
     "push_to_talk": False,
-    "translate_mode": False
+    "translate_mode": False,
+    "decoding_profile": None, # None = giriş noktasının varsayılanı (canlı/dosya)
+    "hallucination_blocklist": [], # Transkriptten atılacak ek kalıp cümleler
+    "cpu_threads": None, # Çıkarımın intra-op iş parçacığı bütçesi; None = fiziksel çekirdeklere göre otomatik
+    "cpu_interop_threads": 1,
+    "cpu_reserved_cores": 1, # Arayüz ve ses işleme için ayrılan çekirdek
+    "cpu_pinning": False,
+    "panel_model_copies": 1, # Panel Modunda eşzamanlı çözümleme sayısı; 1 = kanallar sırayla çözülür
+    "onnx_encoder": False, # CPU'da Whisper encoder'ını ONNX Runtime ile çalıştır
+    "llm_cache_enabled": True, # Aynı istemlere verilen LLM yanıtlarını diskte sakla
+    "llm_cache_ttl_hours": 168,
+    "llm_cache_max_mb": 20,
+    "llm_fanout_mode": "first", # Çift analizde: "first" (ilk gelen kazanır) veya "merge" (ikisi birden)
+    "llm_race_topic_chat": False, # Konu sohbetinde Gemini ve OpenAI'ı eşzamanlı sor
+    "notes_embedding_model": "paraphrase-multilingual-MiniLM-L12-v2", # "hashing" = bağımlılıksız yedek gömme
+    "notes_top_k": 4, # Konu sohbetinde her soruya eklenen not bölümü sayısı
+    "llm_prompt_budget_tokens": 12000, # Sohbet/soru-cevap istemlerinin en fazla giriş token'ı
+    "ai_max_concurrency": 4, # Aynı anda çalışabilecek en fazla yapay zeka işi
+    "ai_max_branches": 4, # Yapay zeka işlerinin aynı anda çalışabilecek en fazla alt isteği (fan-out, map-reduce)
+    "ai_task_timeout": 600 # Bir yapay zeka işinin en uzun süresi (saniye)
 }
 
 class ConfigManager:
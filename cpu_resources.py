@@ -0,0 +1,195 @@
+"""
+cpu_resources.py - CPU Çıkarımı İçin İş Parçacığı ve Çekirdek Yönetimi
+Whisper işçileri, arayüz ve gürültü azaltma aynı anda çalıştığında PyTorch'un
+varsayılan ayarı (tüm mantıksal çekirdekler) aşırı abonelik (oversubscription)
+yaratır. Bu modül fiziksel çekirdekleri tespit eder, süreç genelindeki intra-op
+iş parçacığı sayısını eşzamanlı çıkarım işçilerine göre ayarlar, isteğe bağlı
+olarak işçileri çekirdeklere sabitler ve en hızlı iş parçacığı sayısını bulan bir
+kıyaslama (benchmark) modu sunar.
+"""
+
+import os
+import sys
+import threading
+import time
+
+import torch
+
+from config_manager import ConfigManager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+def physical_core_count():
+    """Fiziksel çekirdek sayısını döner (psutil yoksa mantıksal sayının yarısı varsayılır)."""
+    if psutil:
+        count = psutil.cpu_count(logical=False)
+        if count:
+            return count
+    return max(1, (os.cpu_count() or 2) // 2)
+
+def available_cpus():
+    """Sürecin çalışabileceği mantıksal CPU numaralarını döner."""
+    if hasattr(os, "sched_getaffinity"):
+        return sorted(os.sched_getaffinity(0))
+    return list(range(os.cpu_count() or 1))
+
+def pin_current_thread(cpus):
+    """
+    Çağıran thread'i verilen mantıksal CPU'lara sabitler.
+
+    Returns:
+        bool: Sabitleme yapıldıysa True (desteklenmeyen platformlarda False).
+    """
+    if not cpus:
+        return False
+    try:
+        if hasattr(os, "sched_setaffinity"):
+            # Linux'ta thread kimliği (native id) pid yerine verilebilir
+            os.sched_setaffinity(threading.get_native_id(), cpus)
+            return True
+        if sys.platform == "win32":
+            import ctypes
+            mask = 0
+            for cpu in cpus:
+                mask |= 1 << cpu
+            kernel32 = ctypes.windll.kernel32
+            return kernel32.SetThreadAffinityMask(kernel32.GetCurrentThread(), mask) != 0
+    except Exception as e:
+        print(f"CPU sabitleme hatası: {e}")
+    return False
+
+class CpuResourceManager:
+    """
+    Çıkarım işçilerine CPU kaynaklarını dağıtan yönetici.
+    Ayarlar config.json'dan okunur:
+        cpu_threads: Çıkarım için intra-op iş parçacığı bütçesi (None = otomatik)
+        cpu_interop_threads: PyTorch inter-op iş parçacığı sayısı
+        cpu_reserved_cores: Arayüz ve ses işleme için ayrılan fiziksel çekirdek
+        cpu_pinning: İşçileri çekirdeklere sabitle
+    """
+    def __init__(self, config_manager=None):
+        self.config_manager = config_manager or ConfigManager()
+        self.physical_cores = physical_core_count()
+        self.cpus = available_cpus()
+        self._process_configured = False
+        self._lock = threading.Lock()
+
+    def _setting(self, key, default):
+        value = self.config_manager.get(key)
+        return default if value is None else value
+
+    def usable_cores(self):
+        """Ayrılmış çekirdekler çıkarıldıktan sonra çıkarıma kalan fiziksel çekirdek sayısı."""
+        reserved = int(self._setting("cpu_reserved_cores", 1))
+        return max(1, self.physical_cores - reserved)
+
+    def intra_op_threads(self, workers=1):
+        """
+        torch.set_num_threads() ile verilecek intra-op iş parçacığı sayısını hesaplar.
+        Bu ayar süreç geneli olduğundan bütçe (cpu_threads veya kullanılabilir çekirdekler)
+        aynı anda çıkarım yapan işçi sayısına bölünür.
+        """
+        budget = self._setting("cpu_threads", None) or self.usable_cores()
+        return max(1, int(budget) // max(1, workers))
+
+    def worker_cpus(self, index, workers=1):
+        """Bir işçinin sabitleneceği mantıksal CPU listesini döner (ayrılmış çekirdeklerden sonra)."""
+        # SMT açıksa fiziksel çekirdek başına birden fazla mantıksal CPU vardır
+        per_core = max(1, len(self.cpus) // self.physical_cores)
+        reserved = int(self._setting("cpu_reserved_cores", 1)) * per_core
+        width = self.intra_op_threads(workers) * per_core
+        start = reserved + index * width
+        cpus = self.cpus[start:start + width]
+        return cpus or self.cpus[-width:]
+
+    def configure_process(self):
+        """Süreç genelindeki inter-op iş parçacığı sayısını ayarlar (yalnızca bir kez yapılabilir)."""
+        with self._lock:
+            if self._process_configured:
+                return
+            self._process_configured = True
+        try:
+            torch.set_num_interop_threads(int(self._setting("cpu_interop_threads", 1)))
+        except RuntimeError as e:
+            # PyTorch paralel iş başladıktan sonra bu ayar değiştirilemez
+            print(f"Inter-op iş parçacığı ayarlanamadı: {e}")
+
+    def configure_worker(self, index=0, workers=1):
+        """
+        Çıkarım işçisi başlarken süreçteki intra-op iş parçacığı sayısını ve (açıksa)
+        çağıran thread'in çekirdek sabitlemesini ayarlar.
+
+        Args:
+            index (int): İşçinin sırası (0'dan başlar).
+            workers (int): Aynı anda çıkarım yapan toplam işçi sayısı.
+
+        Returns:
+            int: Atanan iş parçacığı sayısı.
+        """
+        self.configure_process()
+        threads = self.intra_op_threads(workers)
+        torch.set_num_threads(threads)
+        if self._setting("cpu_pinning", False):
+            pin_current_thread(self.worker_cpus(index, workers))
+        return threads
+
+    def benchmark(self, model, repeats=2, progress=None):
+        """
+        Farklı iş parçacığı sayılarında tek bir 30 saniyelik pencerenin encoder süresini ölçer
+        ve en hızlı ayarı config.json'a (cpu_threads) yazar. Arayüzde çıkarımı tek işçi yaptığı
+        için ölçüt tek pencere gecikmesidir; birkaç eşzamanlı işçi (çok kanallı kayıt) bu bütçeyi
+        aralarında böler. Süresi en iyiye %5 yakın olan ayarlardan en az iş parçacıklısı seçilir,
+        böylece kazanç getirmeyen çekirdekler arayüze ve ses işlemeye kalır.
+
+        Args:
+            model: Yüklenmiş Whisper modeli.
+            repeats (int): Her ayar için ölçüm tekrarı.
+            progress (callable): progress(0.0 - 1.0) geri çağrısı.
+
+        Returns:
+            dict: {"threads", "timings"}.
+        """
+        import whisper
+
+        usable = self.usable_cores()
+        candidates = sorted({max(1, usable // w) for w in range(1, usable + 1)}, reverse=True)
+        dtype = next(model.parameters()).dtype
+        mel = torch.zeros((1, model.dims.n_mels, whisper.audio.N_FRAMES), dtype=dtype, device=model.device)
+        previous = torch.get_num_threads()
+
+        timings = {}
+        try:
+            with torch.no_grad():
+                model.embed_audio(mel) # Isınma turu
+                for i, threads in enumerate(candidates):
+                    torch.set_num_threads(threads)
+                    start = time.perf_counter()
+                    for _ in range(repeats):
+                        model.embed_audio(mel)
+                    timings[threads] = (time.perf_counter() - start) / repeats
+                    if progress:
+                        progress((i + 1) / len(candidates))
+        finally:
+            torch.set_num_threads(previous)
+
+        fastest = min(timings.values())
+        best = min(t for t, sec in timings.items() if sec <= fastest * 1.05)
+        self.config_manager.save_config("cpu_threads", best)
+        return {"threads": best, "timings": timings}
+
+_manager = None
+_manager_lock = threading.Lock()
+
+def get_cpu_manager(config_manager=None):
+    """
+    Uygulama genelinde tek CpuResourceManager örneğini döner.
+    İlk çağrıda verilen ConfigManager kullanılır (arayüz ile aynı ayar nesnesini paylaşmak için).
+    """
+    global _manager
+    with _manager_lock:
+        if _manager is None:
+            _manager = CpuResourceManager(config_manager)
+        return _manager
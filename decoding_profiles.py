@@ -0,0 +1,68 @@
+"""
+decoding_profiles.py - Whisper Çözümleme (Decoding) Profilleri
+Canlı kayıtlarda gecikme, dosya ve arşiv kayıtlarında doğruluk önceliklidir.
+Bu modül beam search, sıcaklık (temperature) yedekleme planı ve kalite
+eşiklerini isimlendirilmiş profiller altında toplar.
+"""
+
+# Whisper'ın varsayılan yedekleme planı: kalite eşikleri aşılırsa segment
+# bir sonraki sıcaklıkla yeniden çözülür (en fazla 6 deneme).
+FULL_FALLBACK = (0.0, 0.2, 0.4, 0.6, 0.8, 1.0)
+
+DECODING_PROFILES = {
+    # Gecikme öncelikli: greedy çözümleme, tek deneme, önceki metne bağlanmaz
+    "live": {
+        "beam_size": None,
+        "best_of": None,
+        "temperature": (0.0,),
+        "condition_on_previous_text": False,
+        "compression_ratio_threshold": 2.4,
+        "logprob_threshold": -1.0,
+    },
+    # Greedy çözümleme, sınırlı yedekleme
+    "balanced": {
+        "beam_size": None,
+        "best_of": 3,
+        "temperature": (0.0, 0.4, 0.8),
+        "condition_on_previous_text": True,
+        "compression_ratio_threshold": 2.4,
+        "logprob_threshold": -1.0,
+    },
+    # Doğruluk öncelikli: beam search ve tam yedekleme planı
+    "archival": {
+        "beam_size": 5,
+        "best_of": 5,
+        "temperature": FULL_FALLBACK,
+        "condition_on_previous_text": True,
+        "compression_ratio_threshold": 2.4,
+        "logprob_threshold": -1.0,
+    },
+}
+
+# Ayarlar sekmesindeki seçenekler (None = giriş noktasının varsayılanı)
+PROFILE_LABELS = {
+    "Otomatik": None,
+    "Canlı (Hızlı)": "live",
+    "Dengeli": "balanced",
+    "Arşiv (En Doğru)": "archival",
+}
+
+def get_decoding_options(profile, device="cpu"):
+    """
+    Bir profil için model.transcribe() parametrelerini döner.
+
+    Args:
+        profile (str): "live", "balanced" veya "archival".
+        device (str): "cpu" veya "cuda" (FP16 kararı için).
+
+    Returns:
+        dict: transcribe(**options) ile kullanılacak parametreler.
+    """
+    options = dict(DECODING_PROFILES.get(profile, DECODING_PROFILES["balanced"]))
+    # GPU varsa FP16 (hızlı mod) kullan
+    options["fp16"] = device == "cuda"
+    return options
+
+def resolve_profile(override, default):
+    """Kullanıcı tercihi (override) varsa onu, yoksa giriş noktasının varsayılanını döner."""
+    return override if override in DECODING_PROFILES else default
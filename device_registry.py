@@ -0,0 +1,216 @@
+"""
+device_registry.py - Ses Cihazı Kayıt Defteri
+Bu modül, sistemdeki ses cihazlarını bir kez listeleyip önbellekte tutar,
+takılıp çıkarılan (hot-plug) cihazları istek üzerine arka planda yeniden tarar
+ve config.json'daki mikrofon seçimini kayıttan önce doğrular.
+"""
+
+import threading
+from contextlib import contextmanager
+
+import sounddevice as sd
+
+class DeviceRegistry:
+    """
+    sd.query_devices() çağrılarını tek bir yerde toplayan önbellekli cihaz listesi.
+    Windows'ta çok sayıda cihaz varken her sorgu yavaş olduğu için uygulamanın
+    geri kalanı cihaz bilgisini her zaman bu önbellekten okur.
+    """
+    def __init__(self):
+        self.devices = []
+        self.default_input = None
+        self._rates = {} # Cihaz adı -> desteklenen örnekleme hızları (tembel doldurulur)
+        self._lock = threading.RLock()
+        self._listeners = []
+        self._busy = 0 # Açık kayıt akışı sayısı; PortAudio bu sırada yeniden başlatılmaz
+        self._stop_event = threading.Event()
+        self._rescan_event = threading.Event()
+        self._monitor = None
+        self.refresh()
+
+    def refresh(self, reinitialize=False):
+        """
+        Cihaz listesini yeniden okur.
+
+        Args:
+            reinitialize (bool): PortAudio'yu yeniden başlatır. Yeni takılan cihazlar
+                ancak bu şekilde görünür; açık bir akış varken yapılmaz. Meşguliyet kontrolü
+                ve yeniden başlatma aynı kilit altındadır, bu sırada acquire() bekler.
+
+        Returns:
+            bool: Cihaz listesi değiştiyse True.
+        """
+        with self._lock:
+            if reinitialize and self._busy:
+                print("Kayıt sürerken ses cihazları yeniden başlatılamaz, önbellekteki liste kullanılıyor.")
+            elif reinitialize:
+                try:
+                    sd._terminate()
+                    sd._initialize()
+                except Exception as e:
+                    print(f"PortAudio yeniden başlatma hatası: {e}")
+            try:
+                devices = [dict(d) for d in sd.query_devices()]
+                default_in = sd.default.device[0]
+            except Exception as e:
+                print(f"Cihaz listeleme hatası: {e}")
+                devices, default_in = [], None
+
+            old_signature = self._signature(self.devices)
+            self.devices = devices
+            self.default_input = default_in if default_in is not None and default_in >= 0 else None
+            changed = old_signature != self._signature(devices)
+            if changed:
+                self._rates.clear()
+        return changed
+
+    def _signature(self, devices):
+        return [(d["name"], d["hostapi"], d["max_input_channels"]) for d in devices]
+
+    def input_devices(self):
+        """Giriş kanalı olan cihazları [(indeks, bilgi), ...] olarak döner."""
+        with self._lock:
+            return [(i, d) for i, d in enumerate(self.devices) if d["max_input_channels"] > 0]
+
+    def get_device(self, index):
+        """Önbellekteki cihaz bilgisini döner, geçersiz indeks için None."""
+        with self._lock:
+            if index is None or not (0 <= index < len(self.devices)):
+                return None
+            return self.devices[index]
+
+    def get_samplerates(self, index):
+        """Cihazın desteklediği örnekleme hızlarını (önbellekten) döner."""
+        from audio_utils import get_supported_samplerates
+        device = self.get_device(index)
+        if device is None:
+            return []
+        key = (device["name"], device["hostapi"])
+        if key not in self._rates:
+            self._rates[key] = get_supported_samplerates(index)
+        return self._rates[key]
+
+    def get_microphones(self, with_rates=False):
+        """
+        Mikrofon listesini "İndeks: Ad (hız Hz)" formatında döner.
+        Varsayılan olarak yalnızca önbellekteki doğal hız gösterilir; desteklenen hızları
+        yoklamak her cihazda sürücüye birkaç istek demektir ve açılışı/taramayı yavaşlatır.
+        Gerektiğinde tek cihaz için get_samplerates() kullanılır.
+
+        Args:
+            with_rates (bool): True ise her cihazın desteklediği tüm hızlar yoklanır.
+        """
+        mics = []
+        for i, d in self.input_devices():
+            rates = self.get_samplerates(i) if with_rates else None
+            rate_info = "/".join(str(r) for r in rates) if rates else str(int(d["default_samplerate"]))
+            mics.append(f"{i}: {d['name']} ({rate_info} Hz)")
+        return mics
+
+    def default_input_index(self):
+        """
+        Sistemin varsayılan giriş cihazını, yoksa en çok kanala sahip girişi döner.
+        """
+        inputs = self.input_devices()
+        if not inputs:
+            return None
+        device = self.get_device(self.default_input)
+        if device is not None and device["max_input_channels"] > 0:
+            return self.default_input
+        return max(inputs, key=lambda x: x[1]["max_input_channels"])[0]
+
+    def resolve_input_index(self, index, name=None):
+        """
+        Kaydedilmiş bir mikrofon seçimini doğrular.
+        Cihaz indeksleri takıp çıkarmalarla kayabildiği için önce isimle eşleştirir,
+        bulunamazsa indeksi kontrol eder, o da geçersizse varsayılana düşer.
+
+        Args:
+            index (int): config.json'daki mic_index.
+            name (str): config.json'daki mic_name (opsiyonel).
+
+        Returns:
+            int veya None: Kullanılabilir giriş cihazı indeksi.
+        """
+        inputs = self.input_devices()
+        if name:
+            for i, d in inputs:
+                if d["name"] == name:
+                    return i
+        if any(i == index for i, _ in inputs):
+            return index
+        return self.default_input_index()
+
+    def add_listener(self, callback):
+        """Her yeniden taramadan sonra çağrılacak fonksiyonu ekler (arka plan thread'inden çağrılır)."""
+        self._listeners.append(callback)
+
+    def acquire(self):
+        """
+        Bir kayıt akışının açılacağını bildirir (PortAudio yeniden başlatılmaz).
+        Akış oluşturulmadan ÖNCE çağrılmalıdır; aksi halde akış kurulurken yeniden başlatma araya girebilir.
+        """
+        with self._lock:
+            self._busy += 1
+
+    def release(self):
+        """acquire() ile bildirilen akışın kapandığını bildirir."""
+        with self._lock:
+            self._busy = max(0, self._busy - 1)
+
+    @contextmanager
+    def in_use(self):
+        """Kayıt akışı açılmadan önce girilir; akış kapanana kadar PortAudio'nun yeniden başlatılmasını engeller."""
+        self.acquire()
+        try:
+            yield
+        finally:
+            self.release()
+
+    def start_monitoring(self):
+        """Hot-plug tarama thread'ini başlatır; tarama yalnızca request_rescan() ile istendiğinde yapılır."""
+        if self._monitor and self._monitor.is_alive():
+            return
+        self._stop_event.clear()
+        self._monitor = threading.Thread(target=self._monitor_loop, daemon=True)
+        self._monitor.start()
+
+    def stop_monitoring(self):
+        """Hot-plug taramasını durdurur."""
+        self._stop_event.set()
+        self._rescan_event.set()
+
+    def request_rescan(self):
+        """
+        Cihazları PortAudio'yu yeniden başlatarak arka planda yeniden tarar (örn. kullanıcı
+        mikrofon listesini yeniledi veya kayıt bir cihaz hatasıyla bitti). PortAudio'nun özel
+        _terminate/_initialize çağrıları zamanlayıcıyla değil, yalnızca bu istekle yapılır.
+        Tarama bitince dinleyiciler çağrılır.
+        """
+        self.start_monitoring()
+        self._rescan_event.set()
+
+    def _monitor_loop(self):
+        while True:
+            self._rescan_event.wait()
+            self._rescan_event.clear()
+            if self._stop_event.is_set():
+                break
+            if self.refresh(reinitialize=True):
+                print("[*] Ses cihazı listesi değişti.")
+            for callback in list(self._listeners):
+                try:
+                    callback()
+                except Exception as e:
+                    print(f"Cihaz dinleyici hatası: {e}")
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_registry():
+    """Uygulama genelinde paylaşılan tek DeviceRegistry örneğini döner."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = DeviceRegistry()
+        return _registry
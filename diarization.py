@@ -0,0 +1,327 @@
+"""
+diarization.py - Konuşmacı Ayrıştırma (Diarization) Modülü
+Kaydedilmiş ses dosyalarında "kim, ne zaman konuştu" sorusunu CPU üzerinde yanıtlar.
+VAD ile konuşma bölgeleri bulunur, bu bölgelerden toplu (batch) konuşmacı
+gömmeleri (embedding) çıkarılır, gömmeler kümelenir ve Whisper segmentleri
+konuşmacı etiketleriyle eşleştirilir. Sonuçlar dosya başına önbelleğe alınır.
+"""
+
+import hashlib
+import json
+import os
+from functools import lru_cache
+
+import numpy as np
+import soundfile as sf
+from scipy import signal
+from scipy.cluster.hierarchy import fcluster, linkage
+from scipy.fft import dct
+from scipy.spatial.distance import cdist, squareform, pdist
+
+# Opsiyonel: speechbrain kuruluysa gerçek bir konuşmacı modeli (ECAPA) kullanılır
+try:
+    from speechbrain.inference.speaker import EncoderClassifier
+except ImportError:
+    EncoderClassifier = None
+
+SAMPLE_RATE = 16000
+N_FFT = 400 # 25 ms
+HOP = 160 # 10 ms
+N_MELS = 40
+N_MFCC = 20
+
+@lru_cache(maxsize=None)
+def _mel_filterbank(n_mels=N_MELS, n_fft=N_FFT, sr=SAMPLE_RATE):
+    """Üçgen mel filtre bankasını (bir kez) hesaplar: (n_mels, n_fft//2+1)."""
+    def hz_to_mel(f):
+        return 2595.0 * np.log10(1.0 + f / 700.0)
+    def mel_to_hz(m):
+        return 700.0 * (10 ** (m / 2595.0) - 1.0)
+    mels = np.linspace(hz_to_mel(20.0), hz_to_mel(sr / 2), n_mels + 2)
+    bins = np.floor((n_fft + 1) * mel_to_hz(mels) / sr).astype(int)
+    fb = np.zeros((n_mels, n_fft // 2 + 1), dtype=np.float32)
+    for m in range(1, n_mels + 1):
+        left, center, right = bins[m - 1], bins[m], bins[m + 1]
+        if center > left:
+            fb[m - 1, left:center] = (np.arange(left, center) - left) / (center - left)
+        if right > center:
+            fb[m - 1, center:right] = (right - np.arange(center, right)) / (right - center)
+    return fb
+
+def load_audio_16k(path):
+    """Ses dosyasını mono 16 kHz float32 olarak okur."""
+    audio, sr = sf.read(path, dtype="float32", always_2d=True)
+    audio = audio.mean(axis=1)
+    if sr != SAMPLE_RATE:
+        g = np.gcd(int(sr), SAMPLE_RATE)
+        audio = signal.resample_poly(audio, SAMPLE_RATE // g, int(sr) // g).astype(np.float32)
+    return audio
+
+class SpeakerDiarizer:
+    """
+    Kayıtlı dosyalar için çevrimdışı konuşmacı ayrıştırıcı.
+    Varsayılan gömme yöntemi MFCC istatistikleridir (ek bağımlılık gerektirmez);
+    speechbrain kuruluysa ECAPA gömmeleri kullanılır.
+    """
+    def __init__(self, window=1.5, hop=0.75, max_speakers=6, num_speakers=None,
+                 cache_dir=os.path.join("recordings", ".diarization"), batch_size=64):
+        """
+        Args:
+            window (float): Gömme penceresi uzunluğu (saniye).
+            hop (float): Pencere kaydırma adımı (saniye).
+            max_speakers (int): Otomatik modda denenecek en fazla konuşmacı sayısı.
+            num_speakers (int): Biliniyorsa sabit konuşmacı sayısı.
+            cache_dir (str): Sonuçların saklandığı klasör.
+            batch_size (int): ECAPA modeli için toplu işleme boyutu.
+        """
+        self.window = window
+        self.hop = hop
+        self.max_speakers = max_speakers
+        self.num_speakers = num_speakers
+        self.cache_dir = cache_dir
+        self.batch_size = batch_size
+        self._encoder = None
+
+    # --- ÖNBELLEK ---
+    def _cache_path(self, path):
+        stat = os.stat(path)
+        key = f"{os.path.abspath(path)}|{stat.st_size}|{stat.st_mtime}|{self.window}|{self.hop}|{self.num_speakers}|{self.max_speakers}|{self._method()}"
+        digest = hashlib.sha1(key.encode("utf-8")).hexdigest()[:16]
+        name = os.path.splitext(os.path.basename(path))[0]
+        return os.path.join(self.cache_dir, f"{name}_{digest}.json")
+
+    def _method(self):
+        return "ecapa" if EncoderClassifier else "mfcc"
+
+    def diarize_file(self, path):
+        """
+        Bir ses dosyasını ayrıştırır; aynı dosya için önbellekteki sonucu döner.
+
+        Returns:
+            list: [{"start": float, "end": float, "speaker": int}, ...]
+        """
+        cache_path = self._cache_path(path)
+        if os.path.exists(cache_path):
+            try:
+                with open(cache_path, "r", encoding="utf-8") as f:
+                    return json.load(f)
+            except Exception as e:
+                print(f"Diarization önbellek okuma hatası: {e}")
+
+        turns = self.diarize(load_audio_16k(path))
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            with open(cache_path, "w", encoding="utf-8") as f:
+                json.dump(turns, f)
+        except Exception as e:
+            print(f"Diarization önbellek yazma hatası: {e}")
+        return turns
+
+    def diarize(self, audio):
+        """16 kHz mono ses dizisini konuşmacı turlarına ayırır."""
+        regions = self._speech_regions(audio)
+        windows = self._windows(regions)
+        if not windows:
+            return []
+        embeddings = self._embed(audio, windows)
+        labels = self._cluster(embeddings)
+        return self._to_turns(windows, labels)
+
+    # --- VAD ---
+    def _speech_regions(self, audio, frame=0.03, min_gap=0.3, min_region=0.5):
+        """Enerji tabanlı VAD: uyarlanabilir eşikle konuşma bölgelerini (saniye) döner."""
+        frame_len = int(SAMPLE_RATE * frame)
+        n = len(audio) // frame_len
+        if n == 0:
+            return []
+        rms = np.sqrt(np.mean(audio[:n * frame_len].reshape(n, frame_len) ** 2, axis=1))
+        # Gürültü tabanının üstünde kalan çerçeveler konuşma sayılır; kayıt neredeyse
+        # tamamen konuşmaysa eşik, yüksek seviyenin dörtte biriyle sınırlanır
+        threshold = max(0.005, min(np.percentile(rms, 10) * 3.0, np.percentile(rms, 95) * 0.25))
+        voiced = rms >= threshold
+
+        regions = []
+        start = None
+        for i, v in enumerate(voiced):
+            if v and start is None:
+                start = i
+            elif not v and start is not None:
+                regions.append([start * frame, i * frame])
+                start = None
+        if start is not None:
+            regions.append([start * frame, n * frame])
+
+        merged = []
+        for r in regions:
+            if merged and r[0] - merged[-1][1] < min_gap:
+                merged[-1][1] = r[1]
+            else:
+                merged.append(r)
+        return [(s, e) for s, e in merged if e - s >= min_region]
+
+    def _windows(self, regions):
+        """Konuşma bölgelerini sabit uzunluklu, örtüşen pencerelere böler."""
+        windows = []
+        for s, e in regions:
+            if e - s <= self.window:
+                windows.append((s, e))
+                continue
+            t = s
+            while t + self.window <= e:
+                windows.append((t, t + self.window))
+                t += self.hop
+            if windows[-1][1] < e:
+                windows.append((e - self.window, e))
+        return windows
+
+    # --- GÖMMELER ---
+    def _embed(self, audio, windows):
+        if EncoderClassifier:
+            try:
+                return self._embed_ecapa(audio, windows)
+            except Exception as e:
+                print(f"ECAPA gömme hatası, MFCC'ye geçiliyor: {e}")
+        return self._embed_mfcc(audio, windows)
+
+    def _mfcc(self, audio):
+        """Tüm sinyalin MFCC'lerini tek seferde (vektörize) hesaplar: (frames, N_MFCC)."""
+        if len(audio) < N_FFT:
+            audio = np.pad(audio, (0, N_FFT - len(audio)))
+        frames = np.lib.stride_tricks.sliding_window_view(audio, N_FFT)[::HOP]
+        power = np.abs(np.fft.rfft(frames * np.hanning(N_FFT).astype(np.float32), axis=1)) ** 2
+        log_mel = np.log(power @ _mel_filterbank().T + 1e-10)
+        return dct(log_mel, type=2, axis=1, norm="ortho")[:, :N_MFCC]
+
+    def _embed_mfcc(self, audio, windows):
+        """Her pencere için MFCC ortalama + standart sapmasını gömme olarak kullanır."""
+        mfcc = self._mfcc(audio)
+        # Dosya genelinde normalizasyon (kanal/mikrofon etkisini azaltır)
+        mfcc = (mfcc - mfcc.mean(axis=0)) / (mfcc.std(axis=0) + 1e-8)
+        # Kümülatif toplamlarla tüm pencerelerin istatistikleri tek adımda çıkarılır
+        csum = np.vstack([np.zeros((1, mfcc.shape[1])), np.cumsum(mfcc, axis=0)])
+        csq = np.vstack([np.zeros((1, mfcc.shape[1])), np.cumsum(mfcc ** 2, axis=0)])
+        starts = np.clip((np.array([w[0] for w in windows]) * SAMPLE_RATE / HOP).astype(int), 0, len(mfcc) - 1)
+        ends = np.clip((np.array([w[1] for w in windows]) * SAMPLE_RATE / HOP).astype(int), starts + 1, len(mfcc))
+        counts = (ends - starts)[:, None]
+        mean = (csum[ends] - csum[starts]) / counts
+        var = np.maximum((csq[ends] - csq[starts]) / counts - mean ** 2, 0)
+        emb = np.hstack([mean, np.sqrt(var)])
+        return emb / (np.linalg.norm(emb, axis=1, keepdims=True) + 1e-8)
+
+    def _embed_ecapa(self, audio, windows):
+        """speechbrain ECAPA modeliyle pencere gömmelerini toplu (batch) olarak çıkarır."""
+        import torch
+        if self._encoder is None:
+            self._encoder = EncoderClassifier.from_hparams(
+                source="speechbrain/spkrec-ecapa-voxceleb", run_opts={"device": "cpu"})
+        length = int(self.window * SAMPLE_RATE)
+        chunks = []
+        for s, e in windows:
+            seg = audio[int(s * SAMPLE_RATE):int(e * SAMPLE_RATE)]
+            chunks.append(np.pad(seg, (0, max(0, length - len(seg))))[:length])
+        embs = []
+        with torch.no_grad():
+            for i in range(0, len(chunks), self.batch_size):
+                batch = torch.from_numpy(np.stack(chunks[i:i + self.batch_size]))
+                embs.append(self._encoder.encode_batch(batch).squeeze(1).numpy())
+        emb = np.vstack(embs)
+        return emb / (np.linalg.norm(emb, axis=1, keepdims=True) + 1e-8)
+
+    # --- KÜMELEME ---
+    def _cluster(self, embeddings, max_fit=2000):
+        """
+        Gömmeleri aglomeratif (ortalama bağlantılı, kosinüs) kümeleme ile gruplar.
+        Uzun kayıtlarda bellek için en fazla max_fit pencere kümelenir,
+        kalanlar en yakın küme merkezine atanır.
+        """
+        n = len(embeddings)
+        if n < 2:
+            return np.zeros(n, dtype=int)
+        fit_idx = np.linspace(0, n - 1, min(n, max_fit)).astype(int)
+        fit = embeddings[fit_idx]
+        dists = pdist(fit, metric="cosine")
+        tree = linkage(dists, method="average")
+
+        if self.num_speakers:
+            labels = fcluster(tree, t=self.num_speakers, criterion="maxclust")
+        else:
+            labels = self._auto_labels(tree, squareform(dists))
+
+        labels = labels - 1
+        centroids = np.stack([fit[labels == k].mean(axis=0) for k in range(labels.max() + 1)])
+        return np.argmin(cdist(embeddings, centroids, metric="cosine"), axis=1)
+
+    def _auto_labels(self, tree, dist_matrix, min_silhouette=0.1):
+        """Konuşmacı sayısını silüet skoruna göre seçer; ayrışma zayıfsa tek konuşmacı kabul eder."""
+        best_labels = np.ones(len(dist_matrix), dtype=int)
+        best_score = min_silhouette
+        for k in range(2, self.max_speakers + 1):
+            labels = fcluster(tree, t=k, criterion="maxclust")
+            if len(np.unique(labels)) < 2:
+                continue
+            score = self._silhouette(dist_matrix, labels)
+            if score > best_score:
+                best_score, best_labels = score, labels
+        return best_labels
+
+    def _silhouette(self, d, labels):
+        uniq = np.unique(labels)
+        # Her örneğin her kümeye ortalama uzaklığı: (n, k)
+        member = (labels[:, None] == uniq[None, :]).astype(float)
+        sizes = member.sum(axis=0)
+        sums = d @ member
+        own = np.searchsorted(uniq, labels)
+        own_size = sizes[own]
+        a = sums[np.arange(len(labels)), own] / np.maximum(own_size - 1, 1)
+        other = sums / sizes
+        other[np.arange(len(labels)), own] = np.inf
+        b = other.min(axis=1)
+        s = (b - a) / np.maximum(np.maximum(a, b), 1e-8)
+        s[own_size <= 1] = 0
+        return float(s.mean())
+
+    def _to_turns(self, windows, labels):
+        """Aynı konuşmacıya ait ardışık pencereleri konuşma turlarında birleştirir."""
+        # Etiketleri ilk konuşma sırasına göre yeniden numaralandır (Konuşmacı 1 ilk konuşan olsun)
+        order = {}
+        for lab in labels:
+            order.setdefault(int(lab), len(order))
+        turns = []
+        for (s, e), lab in zip(windows, labels):
+            spk = order[int(lab)]
+            if turns and turns[-1]["speaker"] == spk and s <= turns[-1]["end"] + 0.5:
+                turns[-1]["end"] = max(turns[-1]["end"], e)
+            else:
+                if turns and s < turns[-1]["end"]:
+                    # Örtüşen pencerelerde sınırı ortadan böl
+                    mid = (s + turns[-1]["end"]) / 2
+                    turns[-1]["end"] = mid
+                    s = mid
+                turns.append({"start": float(s), "end": float(e), "speaker": spk})
+        return turns
+
+def label_segments(segments, turns):
+    """
+    Whisper segmentlerine en çok örtüştükleri konuşmacıyı atar.
+
+    Args:
+        segments (list): Whisper sonucu res["segments"] (start/end/text içerir).
+        turns (list): SpeakerDiarizer çıktısı.
+
+    Returns:
+        list: Segmentlerin "speaker" alanı eklenmiş kopyaları.
+    """
+    labeled = []
+    for seg in segments:
+        overlap = {}
+        for t in turns:
+            o = min(seg["end"], t["end"]) - max(seg["start"], t["start"])
+            if o > 0:
+                overlap[t["speaker"]] = overlap.get(t["speaker"], 0) + o
+        spk = max(overlap, key=overlap.get) if overlap else None
+        if spk is None and turns:
+            # Örtüşme yoksa zaman olarak en yakın tura ata
+            mid = (seg["start"] + seg["end"]) / 2
+            spk = min(turns, key=lambda t: min(abs(mid - t["start"]), abs(mid - t["end"])))["speaker"]
+        labeled.append({**seg, "speaker": spk})
+    return labeled
@@ -0,0 +1,94 @@
+"""
+dual_decoder.py - Tek Encoder Geçişiyle Eşzamanlı Transkripsiyon + Çeviri
+Dil koçu kullanıcıları hem orijinal metni hem İngilizce çevirisini ister.
+Whisper'ı iki kez çalıştırmak encoder maliyetini ikiye katlar; bu modül her
+30 saniyelik pencere için encoder'ı bir kez çalıştırır ve aynı ses
+özelliklerinden (audio features) hem "transcribe" hem "translate" çözümler.
+"""
+
+import torch
+import whisper
+from whisper.audio import N_FRAMES, N_SAMPLES, HOP_LENGTH, SAMPLE_RATE
+
+FRAMES_PER_SECOND = SAMPLE_RATE // HOP_LENGTH # 100 mel karesi = 1 saniye
+
+class DualDecoder:
+    """
+    Aynı encoder çıktısından orijinal metin ve İngilizce çeviri üreten çözümleyici.
+    """
+    def __init__(self, model, device="cpu", beam_size=None, no_speech_threshold=0.6, logprob_threshold=-1.0):
+        """
+        Args:
+            model: Yüklenmiş Whisper modeli.
+            device (str): "cpu" veya "cuda" (FP16 kararı için).
+            beam_size (int): Beam search genişliği (None = greedy).
+            no_speech_threshold (float): Pencere sessizlik olasılığı eşiği.
+            logprob_threshold (float): Sessizlik kararında kullanılan ortalama log-olasılık eşiği.
+        """
+        self.model = model
+        self.fp16 = device == "cuda"
+        self.beam_size = beam_size
+        self.no_speech_threshold = no_speech_threshold
+        self.logprob_threshold = logprob_threshold
+
+    def decode(self, audio, language=None, initial_prompt=None):
+        """
+        Sesi pencere pencere çözer; her pencere için orijinal ve çeviri metni eşleştirir.
+
+        Args:
+            audio (np.ndarray | str): 16 kHz mono ses veya dosya yolu.
+            language (str): Kaynak dil (None ise ilk pencereden algılanır).
+            initial_prompt (str): Orijinal metin çözümlemesi için bağlam istemi.
+
+        Returns:
+            dict: transcribe() çıktısına benzer yapı; "translation" alanı ve
+                  segment başına "translation" içerir.
+        """
+        if isinstance(audio, str):
+            audio = whisper.load_audio(audio)
+        dtype = torch.float16 if self.fp16 else torch.float32
+        mel = whisper.log_mel_spectrogram(audio, self.model.dims.n_mels, padding=N_SAMPLES)
+        content_frames = mel.shape[-1] - N_FRAMES
+
+        segments = []
+        seek = 0
+        while seek < content_frames:
+            segment_frames = min(N_FRAMES, content_frames - seek)
+            window = whisper.pad_or_trim(mel[:, seek:seek + segment_frames], N_FRAMES)
+            window = window.to(self.model.device, dtype=dtype).unsqueeze(0)
+
+            # Encoder yalnızca bir kez çalışır; decode() bu şekli görünce encoder'ı atlar
+            with torch.no_grad():
+                features = self.model.embed_audio(window)
+            if language is None:
+                _, probs = self.model.detect_language(features)
+                language = max(probs[0], key=probs[0].get)
+
+            options = dict(language=language, beam_size=self.beam_size, fp16=self.fp16,
+                           temperature=0.0, without_timestamps=True)
+            original = whisper.decode(self.model, features,
+                                      whisper.DecodingOptions(task="transcribe", prompt=initial_prompt, **options))[0]
+            start, end = seek / FRAMES_PER_SECOND, (seek + segment_frames) / FRAMES_PER_SECOND
+            seek += segment_frames
+
+            # Sessiz pencere için çeviri çözümlemesine hiç girilmez
+            if original.no_speech_prob > self.no_speech_threshold and original.avg_logprob < self.logprob_threshold:
+                continue
+            translated = whisper.decode(self.model, features,
+                                        whisper.DecodingOptions(task="translate", **options))[0]
+            segments.append({
+                "start": start,
+                "end": end,
+                "text": " " + original.text.strip(),
+                "translation": translated.text.strip(),
+                "no_speech_prob": original.no_speech_prob,
+                "avg_logprob": original.avg_logprob,
+                "compression_ratio": original.compression_ratio,
+            })
+
+        return {
+            "text": "".join(seg["text"] for seg in segments),
+            "translation": " ".join(seg["translation"] for seg in segments),
+            "segments": segments,
+            "language": language,
+        }
@@ -6,6 +6,47 @@ analiz istekleri göndermek için kullanılır.
 
 import google.generativeai as genai
 import os
+import threading
+
+from model_health import get_health_registry
+
+# Varsayılan model (Kullanıcı tercihi) ve hata durumunda denenecek yedekler
+DEFAULT_MODEL = 'gemini-2.5-flash'
+# Sizin API hesabınızda ListModels ile doğrulanmış modeller:
+FALLBACK_MODELS = [
+    'gemini-2.0-flash-exp',
+    'gemini-1.5-flash-latest', 
+    'gemini-1.5-pro-latest',
+    'gemini-flash-latest'
+]
+# Tek bir denemenin en fazla süresi (saniye); yanıt vermeyen model tüm zinciri bekletmesin
+REQUEST_TIMEOUT = 60
+
+# genai.configure() süreç genelinde geçerlidir; aynı anahtarla tekrar çağrılmaz
+_configure_lock = threading.Lock()
+_configured_key = None
+_models = {} # model adı -> GenerativeModel (bağlantılar modeller arasında paylaşılır)
+
+class GenerationCancelled(Exception):
+    """Akış geri çağrısı isteği iptal ettiğinde fırlatılır; model hatası sayılmaz."""
+
+def _configure(api_key):
+    """Anahtar değiştiyse genai'yi yeniden yapılandırır ve model önbelleğini temizler."""
+    global _configured_key
+    with _configure_lock:
+        if _configured_key != api_key:
+            genai.configure(api_key=api_key)
+            _configured_key = api_key
+            _models.clear()
+            # Eski anahtarla alınan hatalar (geçersiz anahtar, kota) yeni anahtar için geçerli değil
+            get_health_registry().reset()
+
+def _get_model(model_name):
+    """Önbellekteki GenerativeModel nesnesini döner, yoksa oluşturur."""
+    with _configure_lock:
+        if model_name not in _models:
+            _models[model_name] = genai.GenerativeModel(model_name)
+        return _models[model_name]
 
 class GeminiClient:
     """
@@ -16,54 +57,67 @@ class GeminiClient:
         İstemciyi yapılandırır ve modeli başlatır.
         """
         self.api_key = api_key
-        genai.configure(api_key=self.api_key)
-        # Varsayılan model (Kullanıcı tercihi)
-        self.model_name = 'gemini-2.5-flash' 
-        self.model = genai.GenerativeModel(self.model_name)
+        _configure(self.api_key)
+        # Son sağlam model biliniyorsa ondan başla
+        self.model_name = get_health_registry().last_good or DEFAULT_MODEL
+        self.model = _get_model(self.model_name)
 
-    def generate_content(self, prompt, system_instruction=None):
+    def _generate(self, model, full_prompt, on_chunk):
+        """Tek bir modelden yanıt alır; on_chunk verilirse yanıtı akış halinde iletir."""
+        request_options = {"timeout": REQUEST_TIMEOUT}
+        if on_chunk is None:
+            return model.generate_content(full_prompt, request_options=request_options).text
+        parts = []
+        for chunk in model.generate_content(full_prompt, stream=True, request_options=request_options):
+            text = chunk.text
+            parts.append(text)
+            on_chunk(text)
+        return "".join(parts)
+
+    def generate_content(self, prompt, system_instruction=None, on_chunk=None):
         """
         Verilen isteme (prompt) dayanarak yapay zeka yanıtı oluşturur.
         [V19 Versiyonu]
+
+        Modeller süreç genelindeki sağlık kaydına göre sıralanır: son başarılı model
+        önce denenir, yakın zamanda hata veren modeller bekleme süresi dolana kadar atlanır.
+
+        on_chunk(metin) verilirse yanıt parçaları geldikçe çağrılır. Yedek modele
+        geçilirse akış baştan gelir; tam metin her durumda dönüş değeridir.
         """
         try:
             if system_instruction:
                 full_prompt = f"SYSTEM: {system_instruction}\n\nUSER: {prompt}"
             else:
                 full_prompt = prompt
+
+            health = get_health_registry()
+            candidates = [DEFAULT_MODEL] + [m for m in FALLBACK_MODELS if m != DEFAULT_MODEL]
+            attempts = health.order(candidates)
+            skipped = [m for m in candidates if m not in attempts]
+            if skipped:
+                print(f"[V19] Bekleme süresindeki modeller atlanıyor: {', '.join(skipped)}")
+
+            last_error = None
+            for model_name in attempts:
+                try:
+                    print(f"[V19] Deneniyor: {model_name}")
+                    text = self._generate(_get_model(model_name), full_prompt, on_chunk)
+                    health.record_success(model_name)
+                    self.model = _get_model(model_name)
+                    self.model_name = model_name
+                    return text
+                except GenerationCancelled:
+                    raise
+                except Exception as e:
+                    last_error = e
+                    backoff = health.record_failure(model_name, e)
+                    print(f"[V19] {model_name} başarısız ({backoff:.0f} sn atlanacak): {e}")
+
+            return f"[V19] Gemini Hatası: Modellerin hiçbiri yanıt vermedi. Lütfen API anahtarınızı (AIza...) ve internetinizi kontrol edin.\nDenenenler: {', '.join(attempts)}\nSon Hata: {str(last_error)}"
                 
-            try:
-                # Aktif modeli dene
-                print(f"[V19] Deneniyor: {self.model_name}")
-                response = self.model.generate_content(full_prompt)
-                return response.text
-            except Exception as e:
-                # 404 veya model hatası durumunda gerçek yedekleri dene
-                print(f"[V19] {self.model_name} hatası: {e}. Yedek can simidi başlatılıyor...")
-                
-                # Sizin API hesabınızda ListModels ile doğrulanmış modeller:
-                fallbacks = [
-                    'gemini-2.0-flash-exp',
-                    'gemini-1.5-flash-latest', 
-                    'gemini-1.5-pro-latest',
-                    'gemini-flash-latest'
-                ]
-                
-                for fallback in fallbacks:
-                    if fallback == self.model_name:
-                        continue
-                    try:
-                        print(f"[V19] Yedek deneniyor: {fallback}")
-                        temp_model = genai.GenerativeModel(fallback)
-                        response = temp_model.generate_content(full_prompt)
-                        self.model = temp_model 
-                        self.model_name = fallback
-                        return response.text
-                    except Exception as fe:
-                        print(f"[V19] {fallback} başarısız: {fe}")
-                        continue
-                
-                return f"[V19] Gemini Hatası: Modellerin hiçbiri yanıt vermedi. Lütfen API anahtarınızı (AIza...) ve internetinizi kontrol edin.\nDenenenler: {self.model_name}, {', '.join(fallbacks)}\nSon Hata: {str(e)}"
-                
+        except GenerationCancelled:
+            # İptal bir hata metni değildir; çağırana (fan-out, AIRuntime) ulaşmalı
+            raise
         except Exception as e:
             return f"[V19] Beklenmedik Hata: {str(e)}"
@@ -16,20 +16,38 @@ import json
 import torch
 import os
 import numpy as np
-from openai import OpenAI
 from fpdf import FPDF
 from docx import Document
 from docx.shared import Inches
-from gemini_client import GeminiClient
+from llm_provider import get_provider, DEFAULT_CHAT_MODELS, FANOUT_FIRST, FANOUT_MERGE
+from token_budget import PromptBudget, REQUIRED
+from ai_runtime import AIRuntime, POLICY_DROP, POLICY_REPLACE, is_cancelled
+from stream_writer import TextStreamWriter
+from map_reduce import TranscriptMapReduce
+from incremental_analysis import IncrementalAnalyzer
+from notes_index import NotesIndex, get_embedder, DEFAULT_MODEL as DEFAULT_EMBEDDING_MODEL
+from audio_utils import StreamingResampler, get_device_samplerate
+from multi_channel_recorder import MultiChannelRecorder, parse_channel_spec
+from device_registry import get_registry
+from config_manager import ConfigManager
+from diarization import SpeakerDiarizer, label_segments
+from pronunciation import PronunciationScorer
+from language_detector import SessionLanguageDetector
+from decoding_profiles import PROFILE_LABELS, get_decoding_options, resolve_profile
+from transcript_filter import HallucinationFilter
+from rolling_prompt import RollingPrompt, extract_terms
+from dual_decoder import DualDecoder
+from inference_scheduler import InferenceScheduler, JobCancelled, LIVE, INTERACTIVE, BACKGROUND, window_checkpoints
+from cpu_resources import get_cpu_manager
 from dotenv import load_dotenv, set_key
 import datetime
 import whisper
 import noisereduce as nr
 import pygame
 import shutil
+import tempfile
 import pywinstyles # Modern Windows pencere efektleri için
 from PIL import Image
-import requests
 import io
 
 # .env dosyasını yükle (API anahtarları için)
@@ -169,7 +187,12 @@ class App(ctk.CTk):
         self.audio_frames = [] # Kayıt sırasında ses verilerinin toplandığı liste
         self.api_key = "" # OpenAI key
         self.fs = 16000 # Whisper için standart örnekleme hızı (Sample Rate)
-        self.selected_mic_index = self.get_default_mic()
+        
+        # Cihazlar bir kez listelenip önbellekte tutulur; config.json'daki seçim doğrulanır
+        self.config_manager = ConfigManager()
+        self.device_registry = get_registry()
+        self.selected_mic_index = self.device_registry.resolve_input_index(
+            self.config_manager.get("mic_index"), self.config_manager.get("mic_name"))
         self.audio_queue = queue.Queue() # Ses verileri için iş parçacığı güvenli kuyruk
         self.all_session_transcripts = [] # Oturum boyuncaki tüm transkriptleri saklayan liste
         self.recording_buttons = [] # Bu artık otomatik eşleme için kullanılmayacak, ama referans için kalsın
@@ -186,10 +209,41 @@ class App(ctk.CTk):
         self.last_transcript = ""
         self.sentiment_stats = {'pos': 33, 'neg': 33, 'neu': 34}
         self.gemini_api_key = ""
+        # OpenAI/Gemini istemcileri ve bağlantı havuzu tüm AI özellikleri arasında paylaşılır
+        self.llm = get_provider(self.config_manager)
+        # Yapay zeka işleri tek bir asyncio döngüsünde sınırlı eşzamanlılıkla çalışır; arayüz güncellemeleri
+        # tek bir after() döngüsüyle ana thread'e aktarılır
+        self.ai = AIRuntime(max_concurrency=int(self.config_manager.get("ai_max_concurrency") or 4),
+                            timeout=float(self.config_manager.get("ai_task_timeout") or 600),
+                            max_branches=int(self.config_manager.get("ai_max_branches") or 4))
+        self.ai.attach(self)
+        # Uzun kayıtlar bölüm bölüm özetlenip (map) son analize özetler verilir (reduce)
+        self.map_reduce = TranscriptMapReduce(self.llm)
+        # Tekrarlanan analizlerde yalnızca son analizden sonra eklenen transkript gönderilir
+        self.incremental = IncrementalAnalyzer()
+        # Yüklenen notların vektör indeksi (konu sohbeti ve quiz yalnızca ilgili bölümleri kullanır)
+        self.notes_index = None
         
         # Whisper Model Önbelleği
-        self.whisper_model = None
-        self.current_model_type = None
+        # CPU iş parçacığı/çekirdek ayarları arayüzle aynı config nesnesinden okunur
+        self.cpu_manager = get_cpu_manager(self.config_manager)
+        # Whisper modelinin tek sahibi: canlı > dosya > arka plan öncelikli iş kuyruğu
+        self.scheduler = InferenceScheduler(device=self.device, use_onnx=bool(self.config_manager.get("onnx_encoder")))
+        
+        # Panel Modu (Çoklu Mikrofon) Kaydı
+        self.multi_recorder = None
+        self.panel_starting = False # Model yüklenirken ve stream'ler açılırken True
+        self._panel_lock = threading.Lock()
+        
+        # Geçmiş kayıtlar için konuşmacı ayrıştırıcı (sonuçlar dosya başına önbelleklenir)
+        self.diarizer = SpeakerDiarizer()
+        # "Otomatik Algıla" modunda kaydın dili bir kez belirlenip kilitlenir (her kayıtta yenilenir;
+        # dosya ve geçmiş kayıt işleri kendi algılayıcılarını kullanır)
+        self.language_detector = SessionLanguageDetector()
+        # Whisper halüsinasyonlarını (Altyazı M.K. vb.) ve tekrarları eleyen filtre
+        self.transcript_filter = HallucinationFilter(blocklist=self.config_manager.get("hallucination_blocklist"))
+        # Canlı kayıtlarda isim/terim tutarlılığı için kayan bağlam istemi (konu + not terimleri)
+        self.rolling_prompt = RollingPrompt()
         
         # Dil Öğrenme (Language Coach) Durumu
         self.target_language = "İngilizce"
@@ -357,23 +411,38 @@ class App(ctk.CTk):
             print(f"Temizlik sırasında hata: {e}")
 
     def get_default_mic(self):
-        """Sistemdeki varsayılan mikrofonun indeksini bulur."""
-        try:
-            devices = sd.query_devices()
-            for i, d in enumerate(devices):
-                if d['max_input_channels'] > 0:
-                    return i
-        except:
-            return None
-        return None
+        """Sistemdeki varsayılan mikrofonun indeksini (cihaz önbelleğinden) bulur."""
+        return self.device_registry.default_input_index()
 
     def get_mic_list(self):
-        """Kullanılabilir mikrofonların listesini döner."""
-        try:
-            devices = sd.query_devices()
-            return [f"{i}: {d['name']}" for i, d in enumerate(devices) if d['max_input_channels'] > 0]
-        except:
-            return ["Mikrofon Bulunamadı"]
+        """Kullanılabilir mikrofonların listesini (cihaz önbelleğinden) döner."""
+        return self.device_registry.get_microphones() or ["Mikrofon Bulunamadı"]
+
+    def _current_mic_label(self, mics):
+        """Seçili mikrofonun combo kutusundaki etiketini bulur."""
+        prefix = f"{self.selected_mic_index}:"
+        return next((m for m in mics if m.startswith(prefix)), mics[0])
+
+    def refresh_mics(self):
+        """Yeni takılan mikrofonları görmek için cihazları arka planda yeniden tarar."""
+        if self.is_recording:
+            self.status_label.configure(text="Kayıt sürerken mikrofon listesi yenilenemez.")
+            return
+        self.status_label.configure(text="Mikrofonlar taranıyor...")
+        self.device_registry.request_rescan()
+
+    def _on_devices_changed(self):
+        """Cihazlar yeniden tarandıktan sonra listeyi ve seçimi günceller (ana thread)."""
+        mics = self.get_mic_list()
+        self.mic_combo.configure(values=mics)
+        resolved = self.device_registry.resolve_input_index(
+            self.selected_mic_index, self.config_manager.get("mic_name"))
+        if resolved != self.selected_mic_index and not self.is_recording:
+            self.selected_mic_index = resolved
+            self.status_label.configure(text="Mikrofon değişti, varsayılan cihaza geçildi.")
+        elif self.status_label.cget("text") == "Mikrofonlar taranıyor...":
+            self.status_label.configure(text=f"{len(self.device_registry.input_devices())} mikrofon bulundu.")
+        self.mic_combo.set(self._current_mic_label(mics))
 
     def setup_ui(self):
         """
@@ -457,6 +526,11 @@ class App(ctk.CTk):
         color = "#ff007f" if self.device == "cuda" else "#ffea00"
         ctk.CTkLabel(self.status_bar, text=f"Donanım: {self.device.upper()}", text_color=color).pack(side="right", padx=20)
 
+        # Çalışan/sıradaki transkripsiyon işlerini iptal etme butonu
+        self.cancel_job_btn = ctk.CTkButton(self.status_bar, text="İşlemi İptal Et", width=110, fg_color="#8b0000",
+                                            hover_color="#5c0000", state="disabled", command=self.cancel_transcriptions)
+        self.cancel_job_btn.pack(side="right", padx=5)
+
         # Transkript Alanı
         self.textbox = ctk.CTkTextbox(self.home_frame, font=("Inter", 15), corner_radius=15, border_width=2, border_color="#ff007f")
         self.textbox.grid(row=2, column=0, padx=20, pady=10, sticky="nsew")
@@ -562,6 +636,20 @@ class App(ctk.CTk):
         self.export_btn = ctk.CTkButton(self.analysis_actions, text="RAPORU DIŞA AKTAR", fg_color="#e67e22", height=45, command=self.export_results)
         self.export_btn.grid(row=0, column=2, padx=5, sticky="ew")
 
+        # Aynı istem iki sağlayıcıya eşzamanlı gönderilir: ilk gelen kazanır veya ikisi birden raporlanır
+        self.dual_analyze_btn = ctk.CTkButton(self.analysis_actions, text="⚡ GPT-4o + GEMINI BİRLİKTE", fg_color="#6c5ce7", height=35, command=self.run_dual_analysis)
+        self.dual_analyze_btn.grid(row=1, column=0, columnspan=2, padx=5, pady=(5, 0), sticky="ew")
+        self.fanout_modes = {"İlk Gelen Kazanır": FANOUT_FIRST, "İkisini Birleştir": FANOUT_MERGE}
+        self.fanout_mode_btn = ctk.CTkSegmentedButton(self.analysis_actions, values=list(self.fanout_modes.keys()),
+                                                      command=lambda label: self.config_manager.save_config("llm_fanout_mode", self.fanout_modes[label]))
+        saved_fanout = self.config_manager.get("llm_fanout_mode") or FANOUT_FIRST
+        self.fanout_mode_btn.set(next(k for k, v in self.fanout_modes.items() if v == saved_fanout))
+        self.fanout_mode_btn.grid(row=1, column=2, padx=5, pady=(5, 0), sticky="ew")
+
+        # İşaretliyse aynı istem için önbellekteki yanıt yerine yeni yanıt üretilir
+        self.regenerate_var = ctk.BooleanVar(value=False)
+        ctk.CTkCheckBox(self.analysis_actions, text="🔄 Yeniden Üret (Önbelleği Atla)", variable=self.regenerate_var).grid(row=2, column=0, columnspan=3, pady=(5, 0))
+
         # --- AI CHAT (SORU-CEVAP) BÖLÜMÜ ---
         self.chat_frame = ctk.CTkFrame(self.analysis_frame, corner_radius=15, border_width=1, border_color="#ff007f")
         self.chat_frame.grid(row=5, column=0, columnspan=2, padx=20, pady=(0, 20), sticky="ew")
@@ -681,6 +769,7 @@ class App(ctk.CTk):
         self.topic_combo = ctk.CTkComboBox(self.topic_settings, values=list(self.scenarios_data.keys()), width=110, command=self._on_topic_change)
         self.topic_combo.set("Kodlama")
         self.topic_combo.pack(side="left", padx=2)
+        self._update_prompt_vocabulary()
 
         # Yeni Senaryo ve Alt Seçim Kutuları
         self.scenario_combo = ctk.CTkComboBox(self.topic_settings, values=[], width=140, command=self._on_scenario_change)
@@ -723,6 +812,8 @@ class App(ctk.CTk):
                                           command=self.generate_flashcards, width=70)
         self.flashcard_btn.pack(side="left", padx=5)
 
+        ctk.CTkCheckBox(self.topic_settings, text="🔄", width=30, variable=self.regenerate_var).pack(side="left", padx=5)
+
         self.topic_pdf_btn = ctk.CTkButton(self.topic_settings, text="📄 PDF", fg_color="#e67e22", font=("Inter", 12, "bold"),
                                           command=self.save_topic_pdf, width=50)
         self.topic_pdf_btn.pack(side="left", padx=5)
@@ -808,6 +899,11 @@ class App(ctk.CTk):
 
         ctk.CTkButton(self.api_group, text="Anahtarları Güvenli Kaydet", command=self.save_api_keys).pack(pady=15)
 
+        # İki anahtar da varsa konu sohbetinde Gemini ve OpenAI aynı anda sorulur, ilk gelen yanıt kullanılır
+        self.llm_race_var = ctk.BooleanVar(value=bool(self.config_manager.get("llm_race_topic_chat")))
+        ctk.CTkSwitch(self.api_group, text="Konu Sohbetinde Gemini ve OpenAI'ı Yarıştır (İlk Yanıt Kazanır)", variable=self.llm_race_var,
+                      command=lambda: self.config_manager.save_config("llm_race_topic_chat", self.llm_race_var.get())).pack(pady=(0, 15))
+
         # Model Ayarları Grubu
         self.model_group = ctk.CTkFrame(self.settings_frame)
         self.model_group.pack(padx=40, pady=10, fill="x")
@@ -834,13 +930,22 @@ class App(ctk.CTk):
             "İtalyanca": "italian", 
             "Rusça": "russian"
         }
-        self.lang_combo = ctk.CTkComboBox(model_grid, values=list(self.lang_options.keys()))
+        self.lang_combo = ctk.CTkComboBox(model_grid, values=list(self.lang_options.keys()),
+                                          command=lambda _: self.language_detector.reset())
         self.lang_combo.set("Türkçe")
         self.lang_combo.grid(row=1, column=1, pady=5)
 
         ctk.CTkLabel(model_grid, text="Mikrofon:").grid(row=2, column=0, padx=10)
-        self.mic_combo = ctk.CTkComboBox(model_grid, values=self.get_mic_list(), command=self.change_mic)
+        mic_list = self.get_mic_list()
+        self.mic_combo = ctk.CTkComboBox(model_grid, values=mic_list, command=self.change_mic)
+        self.mic_combo.set(self._current_mic_label(mic_list))
         self.mic_combo.grid(row=2, column=1, pady=5)
+        
+        ctk.CTkButton(model_grid, text="↻", width=30, command=self.refresh_mics).grid(row=2, column=2, padx=5)
+        
+        # Hot-plug: yeniden taramadan sonra combo kutusu güncellenir
+        self.device_registry.add_listener(lambda: self.after(0, self._on_devices_changed))
+        self.device_registry.start_monitoring()
 
         ctk.CTkLabel(model_grid, text="Yapay Zeka Sesi:").grid(row=3, column=0, padx=10)
         self.tts_voices = {
@@ -870,6 +975,10 @@ class App(ctk.CTk):
         # Switchler
         self.translate_var = ctk.BooleanVar(value=False)
         ctk.CTkSwitch(self.model_group, text="Tanımadan Sonra İngilizceye Çevir", variable=self.translate_var).pack(pady=5)
+
+        # Çift çıktı: tek encoder geçişiyle hem orijinal metin hem İngilizce çeviri
+        self.dual_output_var = ctk.BooleanVar(value=False)
+        ctk.CTkSwitch(self.model_group, text="Çift Çıktı (Orijinal + İngilizce Çeviri)", variable=self.dual_output_var).pack(pady=5)
         
         self.autosave_var = ctk.BooleanVar(value=True)
         ctk.CTkSwitch(self.model_group, text="Ses Kayıtlarını Otomatik Arşivle", variable=self.autosave_var).pack(pady=5)
@@ -885,6 +994,38 @@ class App(ctk.CTk):
         self.vad_threshold_slider.set(self.silence_threshold)
         self.vad_threshold_slider.pack(pady=5, padx=20)
 
+        # Panel Modu: Birden fazla mikrofon veya tek ses kartının kanalları
+        self.panel_mode_var = ctk.BooleanVar(value=False)
+        ctk.CTkSwitch(self.model_group, text="Panel Modu (Çoklu Mikrofon / Kanal)", variable=self.panel_mode_var).pack(pady=5)
+        ctk.CTkLabel(self.model_group, text="Panel Kanalları (Örn: 1,3 = iki mikrofon, 2:0,2:1 = aynı kartın iki kanalı):", font=("Arial", 11)).pack(pady=(5, 0))
+        self.panel_channels_entry = ctk.CTkEntry(self.model_group, width=300, placeholder_text="1,3")
+        self.panel_channels_entry.pack(pady=5)
+        ctk.CTkLabel(self.model_group, text="Eşzamanlı Model Kopyası (1 = kanallar sırayla çözülür, her ek kopya ayrı bellek kullanır):", font=("Arial", 11)).pack(pady=(5, 0))
+        self.panel_copies_combo = ctk.CTkComboBox(self.model_group, values=["1", "2", "3", "4"], width=80,
+                                                  command=lambda v: self.config_manager.save_config("panel_model_copies", int(v)))
+        self.panel_copies_combo.set(str(self.config_manager.get("panel_model_copies") or 1))
+        self.panel_copies_combo.pack(pady=5)
+
+        self.diarize_var = ctk.BooleanVar(value=True)
+        ctk.CTkSwitch(self.model_group, text="Geçmiş Kayıtlarda Konuşmacı Ayrıştırma", variable=self.diarize_var).pack(pady=5)
+
+        # Çözümleme profili: Otomatik = canlı kayıtta hız, dosyalarda doğruluk
+        ctk.CTkLabel(self.model_group, text="Çözümleme Profili (Otomatik = kayıtta hızlı, dosyada en doğru):", font=("Arial", 11)).pack(pady=(5, 0))
+        saved_profile = self.config_manager.get("decoding_profile")
+        profile_label = next((k for k, v in PROFILE_LABELS.items() if v == saved_profile), "Otomatik")
+        self.decoding_profile_combo = ctk.CTkComboBox(self.model_group, values=list(PROFILE_LABELS.keys()), command=self.change_decoding_profile)
+        self.decoding_profile_combo.set(profile_label)
+        self.decoding_profile_combo.pack(pady=5)
+
+        # CPU çıkarım ayarları (iş parçacığı dağılımı ve çekirdek sabitleme)
+        self.cpu_pinning_var = ctk.BooleanVar(value=bool(self.config_manager.get("cpu_pinning")))
+        ctk.CTkSwitch(self.model_group, text="Whisper İşçilerini CPU Çekirdeklerine Sabitle", variable=self.cpu_pinning_var,
+                      command=lambda: self.config_manager.save_config("cpu_pinning", self.cpu_pinning_var.get())).pack(pady=5)
+        ctk.CTkButton(self.model_group, text="CPU Kıyaslaması (En İyi İş Parçacığı Ayarı)", command=self.run_cpu_benchmark).pack(pady=5)
+        self.onnx_encoder_var = ctk.BooleanVar(value=bool(self.config_manager.get("onnx_encoder")))
+        ctk.CTkSwitch(self.model_group, text="ONNX Runtime Encoder (CPU Hızlandırma, onnxruntime gerekir)",
+                      variable=self.onnx_encoder_var, command=self.change_onnx_encoder).pack(pady=5)
+
         # ElevenLabs Ses Klonlama Grubu
         self.eleven_group = ctk.CTkFrame(self.settings_frame)
         self.eleven_group.pack(padx=40, pady=10, fill="x")
@@ -1039,7 +1180,8 @@ class App(ctk.CTk):
             pygame.mixer.music.load(file_path)
             pygame.mixer.music.play()
         except Exception as e:
-            messagebox.showerror("Hata", f"Ses oynatılamadı: {e}")
+            err = str(e)
+            self.ai.ui(lambda err=err: messagebox.showerror("Hata", f"Ses oynatılamadı: {err}"))
 
     def _speak_last_response(self):
         """Son AI yanıtını OpenAI TTS kullanarak seslendirir (Hyper-realistic)."""
@@ -1047,7 +1189,7 @@ class App(ctk.CTk):
             messagebox.showwarning("Uyarı", "Seslendirilecek bir yanıt yok.")
             return
             
-        threading.Thread(target=self._tts_worker, daemon=True).start()
+        self.ai.submit(self._tts_worker, group="tts", policy=POLICY_DROP)
 
     def _tts_worker(self):
         """TTS işlemini arka planda yapar."""
@@ -1059,9 +1201,11 @@ class App(ctk.CTk):
                 
                 if voice_id:
                     try:
-                        self.animator.start_loading("ElevenLabs Ses Sentezleniyor")
+                        self.ai.ui(self.animator.start_loading, "ElevenLabs Ses Sentezleniyor")
                         temp_mp3 = self.eleven_manager.generate_speech(self.last_analysis[:1000], voice_id)
-                        self.animator.stop("Ses Sentezlendi")
+                        if is_cancelled():
+                            return
+                        self.ai.ui(self.animator.stop, "Ses Sentezlendi")
                         if temp_mp3:
                             self._play_audio(temp_mp3)
                             return
@@ -1071,31 +1215,25 @@ class App(ctk.CTk):
 
             # --- STANDART OPENAI TTS ---
             if not self.api_key:
-                self.after(0, lambda: messagebox.showerror("Hata", "OpenAI API anahtarı bulunamadı."))
+                self.ai.ui(lambda: messagebox.showerror("Hata", "OpenAI API anahtarı bulunamadı."))
                 return
 
-            from openai import OpenAI
-            client = OpenAI(api_key=self.api_key)
-            
             # Kullanıcının seçtiği sesi al
             selected_voice_name = self.tts_voice_combo.get()
             selected_voice = self.tts_voices.get(selected_voice_name, "onyx")
 
             # Text-to-Speech İsteği
-            response = client.audio.speech.create(
-                model="tts-1",
-                voice=selected_voice,
-                input=self.last_analysis[:4000]
-            )
-            
-            import time
             temp_tts = f"temp_tts_{int(time.time())}.mp3"
-            response.stream_to_file(temp_tts)
+            self.llm.speech_to_file(self.last_analysis[:4000], selected_voice, temp_tts)
+            if is_cancelled():
+                return
             self._play_audio(temp_tts)
         except Exception as e:
+            if is_cancelled():
+                return # İptal edilen iş (yeni istek, zaman aşımı, kapanış) hata göstermez
             err = str(e)
-            self.after(0, lambda err=err: messagebox.showerror("TTS Hatası", f"Seslendirme başarısız: {err}"))
-            if hasattr(self, 'animator'): self.animator.stop("TTS Hatası")
+            self.ai.ui(lambda err=err: messagebox.showerror("TTS Hatası", f"Seslendirme başarısız: {err}"))
+            if hasattr(self, 'animator'): self.ai.ui(self.animator.stop, "TTS Hatası")
 
     def _send_quick_chat(self, prompt):
         """Hızlı aksiyon butonları için prompt gönderir."""
@@ -1106,13 +1244,59 @@ class App(ctk.CTk):
     def load_history_file(self, filename):
         path = os.path.join("recordings", filename)
         self.select_frame_by_name("home")
-        threading.Thread(target=lambda: self._transcribe_file(path), daemon=True).start()
+        diarize = self.diarize_var.get()
+        self._submit_transcription(path, INTERACTIVE, f"{filename} işleniyor", diarize=diarize)
+
 
+    def change_decoding_profile(self, value):
+        """Seçilen çözümleme profilini config.json'a kaydeder."""
+        self.config_manager.save_config("decoding_profile", PROFILE_LABELS.get(value))
+
+    def change_onnx_encoder(self):
+        """ONNX encoder tercihini kaydeder; model bir sonraki transkripsiyonda buna göre yüklenir."""
+        enabled = self.onnx_encoder_var.get()
+        self.config_manager.save_config("onnx_encoder", enabled)
+        self.scheduler.set_onnx(enabled)
+
+    def run_cpu_benchmark(self):
+        """Seçili model üzerinde en hızlı iş parçacığı sayısını ölçer (arka plan işi olarak)."""
+        def benchmark(model, job):
+            try:
+                return self.cpu_manager.benchmark(model, progress=job.set_progress)
+            finally:
+                # Kıyaslama ayarı değiştirdi: işçi thread'ini yeni ayarla yeniden yapılandır
+                self.cpu_manager.configure_worker(0, 1)
+
+        def on_done(job):
+            self.ai.ui(self._update_cancel_button)
+            if job.status != "done":
+                self.ai.ui(self.animator.stop, "CPU kıyaslaması tamamlanamadı.")
+                return
+            result = job.result
+            lines = "\n".join(f"{t} iş parçacığı: {sec:.2f} sn/pencere" for t, sec in sorted(result["timings"].items()))
+            self.ai.ui(self.animator.stop, "CPU kıyaslaması tamamlandı.")
+            self.ai.ui(lambda: messagebox.showinfo(
+                "CPU Kıyaslaması",
+                f"{lines}\n\nSeçilen ayar: {result['threads']} iş parçacığı. "
+                f"Çok kanallı kayıtta bu sayı eşzamanlı işçiler arasında bölünür. Ayar config.json'a kaydedildi."))
+
+        self.animator.start_loading("CPU kıyaslaması sırada")
+        self.scheduler.submit(benchmark, BACKGROUND, "CPU kıyaslaması", model_type=self.model_combo.get(),
+                              on_progress=self._on_job_progress, on_done=on_done)
+        self._update_cancel_button()
+
+    def _decoding_profile(self, default):
+        """Kullanıcı bir profil seçtiyse onu, yoksa giriş noktasının varsayılanını döner."""
+        return resolve_profile(PROFILE_LABELS.get(self.decoding_profile_combo.get()), default)
 
     def change_mic(self, value):
         """Kullanıcının seçtiği mikrofon indeksini günceller."""
         try:
             self.selected_mic_index = int(value.split(":")[0])
+            # Seçimi isimle birlikte sakla; indeks kayarsa isimle yeniden bulunur
+            device = self.device_registry.get_device(self.selected_mic_index)
+            self.config_manager.save_config("mic_index", self.selected_mic_index)
+            self.config_manager.save_config("mic_name", device["name"] if device else None)
         except:
             pass
 
@@ -1126,6 +1310,11 @@ class App(ctk.CTk):
         Kayıt butonuna her basışımızda bu fonksiyon tetiklenir.
         source: "home" veya "language" - Kaydın nereden başlatıldığını belirtir.
         """
+        # Panel Modu yalnızca Dashboard kaydında devreye girer
+        if source == "home" and (self.multi_recorder or self.panel_starting or (not self.is_recording and self.panel_mode_var.get())):
+            self._toggle_panel_recording()
+            return
+
         if not self.is_recording:
             self.is_recording = True
             self.active_recording_source = source
@@ -1138,12 +1327,27 @@ class App(ctk.CTk):
             self.status_label.configure(text="Kaydediliyor...")
             self.audio_frames = []
             
+            # Yeni kayıt önceki kaydın kilitlediği dili ve metin bağlamını devralmaz
+            # (sırada bekleyen iş eski algılayıcı ve istemi kullanır; sözlük korunur)
+            self.language_detector = SessionLanguageDetector()
+            self.rolling_prompt = self.rolling_prompt.fork()
+            
+            # Tk değişkenleri yalnızca ana thread'de okunur: kaydın ayarları başlangıçta sabitlenir
+            # (mikrofon kaydı: gecikme öncelikli, telaffuz testi: dengeli profil)
+            profile = "balanced" if source == "pronunciation" else "live"
+            recording = {
+                "source": source,
+                "profile": profile,
+                "settings": self._transcription_settings(profile, live=True),
+                "autosave": self.autosave_var.get(),
+            }
+            
             # VAD Durumlarını Sıfırla
             self.silence_start_time = None
             self.recording_start_time = time.time() # Kayıt başlangıç zamanı
             
             # Çakışmayı önlemek için kayıt işlemini ayrı bir thread'de başlat
-            threading.Thread(target=self._record_thread, daemon=True).start()
+            threading.Thread(target=self._record_thread, args=(recording,), daemon=True).start()
         else:
             self.is_recording = False
             
@@ -1157,8 +1361,197 @@ class App(ctk.CTk):
             # Asenkron güncellemeyi durduracak bir bayrak gerekirse burada set edilebilir
             # Ancak is_recording False olması yeterli
 
-    def _record_thread(self):
-        """Mikrofondan ham ses verilerini okuyan iş parçacığı (Yüksek Öncelikli)."""
+    def _toggle_panel_recording(self):
+        """Panel Modunda çok kanallı kaydı başlatır veya durdurur."""
+        with self._panel_lock:
+            starting = self.panel_starting
+            self.panel_starting = False
+        if starting:
+            # Model yüklenirken durduruldu: başlatma thread'i kaydediciyi açmadan (veya açar açmaz) kapatır
+            self.is_recording = False
+            self.record_btn.configure(text="KAYDI BAŞLAT", fg_color="green")
+            self.animator.stop("Panel kaydı iptal edildi.")
+            return
+
+        if self.multi_recorder:
+            recorder = self.multi_recorder
+            self.multi_recorder = None
+            self.is_recording = False
+            self.record_btn.configure(text="KAYDI BAŞLAT", fg_color="green")
+            self.animator.start_loading("Kalan panel segmentleri işleniyor")
+            
+            def finish():
+                recorder.stop()
+                # Kalan segmentler en fazla 60 sn beklenir; takılan bir kanal durum çubuğunu kilitli bırakmaz
+                deadline = time.time() + 60.0
+                for t in recorder.threads[1:]:
+                    t.join(timeout=max(0.0, deadline - time.time()))
+                if any(t.is_alive() for t in recorder.threads[1:]):
+                    print("Panel kanalları zamanında bitmedi, kalan segmentler arka planda işlenecek.")
+                    self.ai.ui(self.animator.stop, "Panel kaydı durduruldu (kalan segmentler işleniyor).")
+                else:
+                    self.ai.ui(self.animator.stop, "Panel kaydı tamamlandı.")
+            threading.Thread(target=finish, daemon=True).start()
+            return
+
+        try:
+            sources = parse_channel_spec(self.panel_channels_entry.get())
+        except ValueError:
+            sources = []
+        if not sources:
+            messagebox.showwarning("Panel Modu", "Lütfen Ayarlar sekmesinden geçerli panel kanallarını girin (Örn: 1,3).")
+            return
+
+        self.is_recording = True
+        self.panel_starting = True
+        self.active_recording_source = "home"
+        self.record_btn.configure(text="KAYDI DURDUR", fg_color="red")
+        self.animator.start_loading("Panel kaydı hazırlanıyor")
+        copies = max(1, int(self.config_manager.get("panel_model_copies") or 1))
+        # Tk değişkenleri yalnızca ana thread'de okunur: panel ayarları başlangıçta sabitlenir
+        settings = self._transcription_settings("live", live=True)
+        threading.Thread(target=self._start_panel_recording, args=(sources, settings, copies), daemon=True).start()
+
+    def _start_panel_recording(self, sources, settings, copies=1):
+        """
+        Modeli hazırlar ve çok kanallı kaydediciyi başlatır (arka planda).
+        settings, Tk thread'inde okunan arayüz ayarlarıdır (bkz. _transcription_settings).
+        copies = 1 iken kanallar zamanlayıcının tek modelini paylaşır ve segmentler sırayla çözülür.
+        """
+        recorder = None
+        try:
+            model_type = settings["model_type"]
+            # Modeli önceden yükle; panel segmentleri modeli canlı öncelikle ödünç alır
+            with self.scheduler.acquire(LIVE, model_type):
+                pass
+            pool = self.scheduler.pool_view(LIVE, model_type, copies=copies)
+            if not self.panel_starting:
+                return
+            recorder = MultiChannelRecorder(
+                sources, pool,
+                language=settings["language"],
+                task=settings["task"],
+                on_text=self._on_panel_text,
+                silence_threshold=self.silence_threshold,
+                decoding_profile=settings["decoding_profile"],
+                output_filter=self.transcript_filter,
+                rolling_prompt=self.rolling_prompt
+            )
+            recorder.start()
+            with self._panel_lock:
+                cancelled = not self.panel_starting
+                if not cancelled:
+                    self.multi_recorder = recorder
+                    self.panel_starting = False
+            if cancelled:
+                # Başlatılırken durdurma istendi
+                recorder.stop()
+                return
+            mode = "sırayla" if pool.size == 1 else f"{pool.size} eşzamanlı"
+            self.animator.stop(f"Panel kaydı: {len(sources)} kanal dinleniyor ({mode} çözümleme)...")
+        except Exception as e:
+            # Yarım başlatılan kaydedicinin stream'leri kapatılır, cihaz kaydı bırakılır
+            if recorder is not None:
+                recorder.stop()
+            with self._panel_lock:
+                was_starting = self.panel_starting
+                self.panel_starting = False
+            if not was_starting:
+                return # Kullanıcı zaten durdurdu
+            self.is_recording = False
+            err = str(e)
+            self.after(0, lambda: self.record_btn.configure(text="KAYDI BAŞLAT", fg_color="green"))
+            self.after(0, lambda err=err: messagebox.showerror("Donanım Hatası", f"Panel kaydı başlatılamadı: {err}"))
+
+    def _on_panel_text(self, speaker, stamp, text):
+        """Panel kaydından gelen konuşmacı etiketli metni arayüze ve oturuma ekler."""
+        self.all_session_transcripts.append({"time": stamp, "text": text, "speaker": speaker})
+        self.last_transcript = text
+        line = f"\n[{speaker} | {stamp}]: {text}\n"
+        self.after(0, lambda: self.textbox.insert("end", line))
+        self.after(0, lambda: self.textbox.see("end"))
+        self.after(0, lambda: self.analysis_textbox.insert("end", line))
+
+    def _format_entry(self, entry):
+        """Tek bir transkript kaydını zaman damgası, konuşmacı ve varsa çevirisiyle biçimlendirir."""
+        speaker = f" {entry['speaker']}:" if entry.get("speaker") else ""
+        line = f"[{entry['time']}]{speaker} {entry['text']}"
+        if entry.get("translation"):
+            line += f"\n    [EN]: {entry['translation']}"
+        return line
+
+    def _format_session_transcripts(self, separator="\n"):
+        """Oturum transkriptlerini zaman damgası (ve varsa konuşmacı / çeviri) ile birleştirir."""
+        text = ""
+        for entry in self.all_session_transcripts:
+            text += f"{self._format_entry(entry)}{separator}"
+        return text
+
+    def _submit_transcription(self, path, priority, description, source=None, settings=None, **kwargs):
+        """
+        Bir transkripsiyon işini zamanlayıcıya gönderir.
+        Kayıt kaynağı gönderim anında sabitlenir; iş sırada beklerken kaynak değişse bile sonuç doğru yere yazılır.
+        settings verilmezse arayüz ayarları burada okunur; bu durumda çağıran Tk ana thread'inde olmalıdır.
+        Arka plan thread'leri (mikrofon kaydı) Tk thread'inde önceden alınmış ayarları verir.
+        """
+        source = source or self.active_recording_source
+        cleanup = kwargs.pop("on_done", None)
+        settings = settings or self._transcription_settings(kwargs.get("profile", "archival"), live=priority == LIVE)
+        kwargs["settings"] = settings
+
+        def on_done(job):
+            if cleanup:
+                cleanup(job)
+            self.ai.ui(self._update_cancel_button)
+
+        job = self.scheduler.submit(
+            lambda model, job: self._transcribe_file(model, job, path, source=source, **kwargs),
+            priority=priority,
+            description=description,
+            model_type=settings["model_type"],
+            on_progress=self._on_job_progress,
+            on_done=on_done
+        )
+        self.ai.ui(self._update_cancel_button)
+        if len(self.scheduler.pending_jobs()) > 1:
+            self.ai.ui(self.animator.start_loading, f"{description} sırada bekliyor")
+        return job
+
+    def _transcription_settings(self, profile, live=False):
+        """
+        Transkripsiyon işinin kullanacağı arayüz ayarlarını toplar (yalnızca Tk ana thread'inden çağrılır).
+        Mikrofon kayıtları (live) kaydın dil algılayıcısını kullanır; her dosya işi kendi dilini bağımsız belirler.
+        """
+        return {
+            "model_type": self.model_combo.get(),
+            "task": "translate" if self.translate_var.get() else "transcribe",
+            "language": self.lang_options.get(self.lang_combo.get()), # None olabilir (auto)
+            "decoding_profile": self._decoding_profile(profile),
+            "dual": self.dual_output_var.get(),
+            "language_detector": self.language_detector if live else SessionLanguageDetector(),
+            "rolling_prompt": self.rolling_prompt,
+        }
+
+    def _update_cancel_button(self):
+        """İptal butonunu yalnızca bekleyen veya çalışan iş varken etkinleştirir."""
+        state = "normal" if self.scheduler.pending_jobs() else "disabled"
+        self.cancel_job_btn.configure(state=state)
+
+    def cancel_transcriptions(self):
+        """Çalışan ve sıradaki transkripsiyon işlerini iptal eder (bir sonraki pencere sınırında durur)."""
+        self.scheduler.cancel_all()
+        self.animator.start_loading("İptal ediliyor")
+
+    def _on_job_progress(self, job, progress):
+        """Çalışan işin ilerlemesini durum çubuğuna yansıtır."""
+        text = f"{job.description} (%{int(progress * 100)})"
+        self.ai.ui(setattr, self.animator, "original_text", text)
+
+    def _record_thread(self, recording):
+        """
+        Mikrofondan ham ses verilerini okuyan iş parçacığı (Yüksek Öncelikli).
+        recording, toggle_recording'in Tk thread'inde sabitlediği kayıt ayarlarıdır (kaynak, profil, ayarlar).
+        """
         try:
             # Kuyruğu temizle
             while not self.audio_queue.empty():
@@ -1167,14 +1560,33 @@ class App(ctk.CTk):
             # Asenkron görselleştirme döngüsünü başlat
             self.after(50, self._update_viz_loop)
             
+            # Seçili mikrofon çıkarılmış olabilir: kayıttan önce doğrula, gerekirse varsayılana geç
+            mic_index = self.device_registry.resolve_input_index(
+                self.selected_mic_index, self.config_manager.get("mic_name"))
+            if mic_index is None:
+                self.is_recording = False
+                self.after(0, lambda: messagebox.showwarning("Mikrofon Bulunamadı", "Sistemde kullanılabilir bir mikrofon yok. Lütfen bir mikrofon bağlayın."))
+                return
+            if mic_index != self.selected_mic_index:
+                print(f"Seçili mikrofon ({self.selected_mic_index}) bulunamadı, {mic_index} kullanılıyor.")
+                self.selected_mic_index = mic_index
+            
+            # Mikrofonu doğal hızında aç, Whisper için 16 kHz'e akış halinde dönüştür
+            device_rate = get_device_samplerate(self.selected_mic_index)
+            resampler = StreamingResampler(device_rate, self.fs)
+            
             # latency='low' ve blocksize=0 (otomatik) ile en kararlı akışı sağla
-            with sd.InputStream(samplerate=self.fs, channels=1, callback=self._audio_callback, 
+            # Cihaz kaydı akış oluşturulmadan önce meşgul işaretlenir (PortAudio yeniden başlatılmasın)
+            with self.device_registry.in_use(), \
+                 sd.InputStream(samplerate=device_rate, channels=1, callback=self._audio_callback, 
                                 device=self.selected_mic_index, blocksize=0, latency='low'):
                 while self.is_recording:
                     # Kuyruktan gelen verileri topla
                     try:
                         while not self.audio_queue.empty():
-                            data = self.audio_queue.get_nowait()
+                            data = resampler.process(self.audio_queue.get_nowait())
+                            if len(data) == 0:
+                                continue
                             self.audio_frames.append(data)
                             
                             # --- Manuel Kontrol: Kayıt durdurulana kadar devam eder ---
@@ -1200,6 +1612,8 @@ class App(ctk.CTk):
                     time.sleep(0.05) # İşlemciyi yormadan kuyruğu boşalt
         except Exception as e:
             self.is_recording = False
+            # Cihaz çıkarılmış olabilir: listeyi yeniden tara, bir sonraki kayıt geçerli cihazla başlasın
+            self.device_registry.request_rescan()
             err = str(e)
             self.after(0, lambda err=err: messagebox.showerror("Donanım Hatası", f"Mikrofon hatası: {err}"))
             return
@@ -1210,7 +1624,9 @@ class App(ctk.CTk):
             return
 
         try:
-            audio_path = "temp_recording.wav"
+            # Her kayıt kendi geçici dosyasına yazılır (önceki kayıt hâlâ sırada olabilir)
+            fd, audio_path = tempfile.mkstemp(suffix=".wav", prefix="kayit_")
+            os.close(fd)
             audio_data = np.concatenate(self.audio_frames, axis=0)
             
             # 1. Normalizasyon (Ses seviyesini dengeleme)
@@ -1234,14 +1650,23 @@ class App(ctk.CTk):
             return
 
         # Eğer otomatik kayıt açıksa recordings klasörüne tarih-saat ile kaydet
-        if self.autosave_var.get():
+        if recording["autosave"]:
             timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
             save_path = os.path.join("recordings", f"kayit_{timestamp}.wav")
             sf.write(save_path, audio_data, self.fs)
             print(f"Ses kaydedildi: {save_path}")
 
-        # Transkripsiyon sürecini başlat
-        self._transcribe_file(audio_path)
+        # Transkripsiyon sürecini kayıt başında sabitlenen ayarlarla başlat
+        self._submit_transcription(audio_path, LIVE, "Metne dönüştürülüyor", source=recording["source"],
+                                   settings=recording["settings"], profile=recording["profile"],
+                                   on_done=lambda job: self._remove_temp_file(audio_path))
+
+    def _remove_temp_file(self, path):
+        """Geçici kayıt dosyasını siler."""
+        try:
+            os.remove(path)
+        except OSError as e:
+            print(f"Geçici dosya silinemedi: {e}")
 
     def _audio_callback(self, indata, frames, time, status):
         """Mikrofondan gelen ses paketini en hızlı şekilde kuyruğa atar."""
@@ -1260,74 +1685,165 @@ class App(ctk.CTk):
             # 30ms sonra tekrar çalış (yaklaşık 33 FPS)
             self.after(30, self._update_viz_loop)
 
-    def _transcribe_file(self, path):
-        """Ses dosyasını Whisper kullanarak metne dönüştürür."""
+    def _diarize_segments(self, path, segments):
+        """
+        Whisper segmentlerini konuşmacılara göre etiketler ve aynı konuşmacının
+        ardışık segmentlerini tek blokta birleştirir.
+        """
         try:
-            task = "translate" if self.translate_var.get() else "transcribe"
-            model_type = self.model_combo.get()
-            
-            # Model yükleme veya önbellekten alma
-            if self.whisper_model is None or self.current_model_type != model_type:
-                self.animator.start_loading(f"Model yükleniyor ({model_type})")
-                self.whisper_model = whisper.load_model(model_type, device=self.device)
-                self.current_model_type = model_type
-            
-            self.animator.start_loading("Metne dönüştürülüyor")
-            
-            # Dil eşleştirmesini yap
-            selected_lang_tr = self.lang_combo.get()
-            whisper_lang = self.lang_options.get(selected_lang_tr) # None olabilir (auto)
-            
-            # Whisper transkripsiyon işlemi (En yüksek kalite parametreleri ile)
-            res = self.whisper_model.transcribe(
-                path, 
-                language=whisper_lang, 
-                task=task,
-                beam_size=5,
-                temperature=0.0,
-                fp16=True if self.device == "cuda" else False
-            )
+            self.ai.ui(self.animator.start_loading, "Konuşmacılar ayrıştırılıyor")
+            turns = self.diarizer.diarize_file(path)
+        except Exception as e:
+            print(f"Konuşmacı ayrıştırma hatası: {e}")
+            return []
+        if not turns:
+            return []
+
+        blocks = []
+        for seg in label_segments(segments, turns):
+            text = seg["text"].strip()
+            if not text:
+                continue
+            speaker = f"Konuşmacı {seg['speaker'] + 1}"
+            translation = seg.get("translation", "").strip()
+            if blocks and blocks[-1]["speaker"] == speaker:
+                blocks[-1]["text"] += " " + text
+                if translation:
+                    blocks[-1]["translation"] = (blocks[-1].get("translation", "") + " " + translation).strip()
+            else:
+                blocks.append({
+                    "time": time.strftime("%H:%M:%S", time.gmtime(seg["start"])),
+                    "speaker": speaker,
+                    "text": text
+                })
+                if translation:
+                    blocks[-1]["translation"] = translation
+        return blocks
+
+    def _transcribe_file(self, model, job, path, source="home", diarize=False, profile="archival", settings=None):
+        """
+        Ses dosyasını Whisper kullanarak metne dönüştürür (zamanlayıcı işi olarak çalışır).
+        source, sonucun yazılacağı kayıt kaynağıdır (home, language, topic_chat, pronunciation).
+        diarize=True ise (geçmiş kayıtlar) segmentler konuşmacılara göre etiketlenir.
+        profile, Ayarlar'da profil seçilmemişse kullanılacak çözümleme profilidir.
+        settings, gönderim anında okunan arayüz ayarlarıdır (bkz. _transcription_settings).
+        """
+        try:
+            settings = settings or self._transcription_settings(profile)
+            task = settings["task"]
+            
+            self.ai.ui(self.animator.start_loading, job.description)
+            job.set_progress(0.0)
+            
+            whisper_lang = settings["language"]
+            
+            # Telaffuz testinde kelime zaman damgaları ve olasılıkları aynı geçişte istenir
+            want_words = source == "pronunciation"
+            
+            # Ses bir kez yüklenir; süre, pencere bazlı ilerleme hesabında kullanılır
+            audio = whisper.load_audio(path)
+            duration = len(audio) / whisper.audio.SAMPLE_RATE
+            auto_lang = whisper_lang is None
+            if auto_lang:
+                # Otomatik modda oturum dili kilitliyse tekrar algılama yapılmaz
+                whisper_lang = settings["language_detector"].language_for(model, audio)
+            
+            # Canlı mikrofon kayıtları önceki metin ve sözlükle bağlanır; telaffuz testi ve
+            # dosyalar bağımsız çözülür (hedef cümleye doğru yönlendirme olmasın)
+            live_context = profile == "live"
+            
+            decoding_options = get_decoding_options(settings["decoding_profile"], self.device)
+            initial_prompt = settings["rolling_prompt"].build() if live_context else None
+            
+            # Çift çıktı modu (ana sayfa ve dil koçu): encoder bir kez çalışır, iki görev çözülür
+            dual = settings["dual"] and source in ("home", "language")
+            job.check_cancelled()
+            job.set_progress(0.1)
+            # Her 30 sn'lik pencerenin başında iptal kontrol edilir ve ilerleme güncellenir
+            with window_checkpoints(model, job, duration):
+                if dual:
+                    decoder = DualDecoder(model, self.device, beam_size=decoding_options["beam_size"])
+                    res = decoder.decode(audio, language=whisper_lang, initial_prompt=initial_prompt)
+                else:
+                    # Whisper transkripsiyon işlemi (profil: beam, sıcaklık planı ve kalite eşikleri)
+                    res = model.transcribe(
+                        audio, 
+                        language=whisper_lang, 
+                        task=task,
+                        word_timestamps=want_words,
+                        initial_prompt=initial_prompt,
+                        **decoding_options
+                    )
+            
+            job.set_progress(0.8)
+            if auto_lang:
+                settings["language_detector"].observe(res)
+            
+            # Halüsinasyon ve tekrar segmentleri oturuma ve LLM istemlerine girmeden atılır
+            res = self.transcript_filter.filter(res)
+            if live_context:
+                settings["rolling_prompt"].commit(res["text"])
             
             full_text = res['text'].encode('utf-8', 'replace').decode('utf-8')
+            translation = res.get("translation", "")
             self.last_transcript = full_text 
-            self.all_session_transcripts.append({
-                "time": datetime.datetime.now().strftime("%H:%M:%S"),
-                "text": full_text
-            })
+            
+            job.check_cancelled()
+            speaker_blocks = self._diarize_segments(path, res["segments"]) if diarize else []
+            if speaker_blocks:
+                # Konuşmacı etiketli bloklar (zaman damgası kayıt içindeki konumdur)
+                self.all_session_transcripts.extend(speaker_blocks)
+                full_text = "\n".join(f"[{b['time']}] {b['speaker']}: {b['text']}" for b in speaker_blocks)
+                display_text = "\n".join(self._format_entry(b) for b in speaker_blocks)
+            else:
+                entry = {
+                    "time": datetime.datetime.now().strftime("%H:%M:%S"),
+                    "text": full_text
+                }
+                if translation:
+                    entry["translation"] = translation
+                if full_text.strip():
+                    self.all_session_transcripts.append(entry)
+                display_text = f"{full_text}\n[ÇEVİRİ]: {translation}" if translation else full_text
             
             # Kaynağa göre ilgili metin kutusuna yazdır
-            if self.active_recording_source == "home":
-                self.after(0, lambda: self.textbox.insert("end", f"\n[TRANSKRIPT]:\n{full_text}\n"))
-                self.after(0, lambda: self.textbox.see("end"))
-            elif self.active_recording_source == "language":
-                self.after(0, lambda: self.language_textbox.insert("end", f"\n[TRANSKRIPT]:\n{full_text}\n"))
-                self.after(0, lambda: self.language_textbox.see("end"))
-            elif self.active_recording_source == "topic_chat":
+            if source == "home":
+                self.ai.ui(lambda: self.textbox.insert("end", f"\n[TRANSKRIPT]:\n{display_text}\n"))
+                self.ai.ui(lambda: self.textbox.see("end"))
+            elif source == "language":
+                self.ai.ui(lambda: self.language_textbox.insert("end", f"\n[TRANSKRIPT]:\n{display_text}\n"))
+                self.ai.ui(lambda: self.language_textbox.see("end"))
+            elif source == "topic_chat":
                 # Sesle yazma: Metni girişe koy ve otomatik gönder
-                self.after(0, lambda: self.topic_chat_entry.delete(0, "end"))
-                self.after(0, lambda: self.topic_chat_entry.insert(0, full_text))
-                self.after(0, lambda: self.run_topic_ai_chat())
-            elif self.active_recording_source == "pronunciation":
-                self.after(0, lambda: self._compare_pronunciation(full_text))
+                self.ai.ui(lambda: self.topic_chat_entry.delete(0, "end"))
+                self.ai.ui(lambda: self.topic_chat_entry.insert(0, full_text))
+                self.ai.ui(lambda: self.run_topic_ai_chat())
+            elif source == "pronunciation":
+                words = [w for seg in res["segments"] for w in seg.get("words", [])]
+                self.ai.ui(lambda: self._compare_pronunciation(full_text, words))
                 
             # Analiz sekmesi her zaman güncellenebilir (opsiyonel, bağımsızlık için kaldırılabilir)
-            self.after(0, lambda: self.analysis_textbox.insert("end", f"\n[TRANSKRIPT]:\n{full_text}\n"))
+            self.ai.ui(lambda: self.analysis_textbox.insert("end", f"\n[TRANSKRIPT]:\n{full_text}\n"))
             
             # İstatistikleri güncelle
             words = len(full_text.split())
             self.stats_manager.add_session(words=words, minutes=0.5) # Yaklaşık 0.5 dk varsayılan çalışma
-            self.update_stats_ui()
+            self.ai.ui(self.update_stats_ui)
             
-            self.animator.stop("İşlem tamamlandı.")
+            job.set_progress(1.0)
+            self.ai.ui(self.animator.stop, "İşlem tamamlandı.")
+        except JobCancelled:
+            self.ai.ui(self.animator.stop, "İşlem iptal edildi.")
+            raise
         except Exception as e:
             err = str(e)
-            self.after(0, lambda err=err: messagebox.showerror("Hata", f"Transkripsiyon Hatası: {err}"))
+            self.ai.ui(lambda err=err: messagebox.showerror("Hata", f"Transkripsiyon Hatası: {err}"))
 
     def process_audio_file(self):
         """Bilgisayardan bir ses dosyası seçilmesini sağlar."""
         path = filedialog.askopenfilename(filetypes=[("Ses Dosyası", "*.wav *.mp3 *.m4a")])
         if path:
-            threading.Thread(target=lambda: self._transcribe_file(path), daemon=True).start()
+            self._submit_transcription(path, INTERACTIVE, f"{os.path.basename(path)} işleniyor")
 
     def open_recordings_folder(self):
         """Kayıtların tutulduğu klasörü Windows Explorer'da açar."""
@@ -1341,77 +1857,146 @@ class App(ctk.CTk):
     def run_analysis(self):
         """Metin kutusundaki verileri GPT-4o ile analiz etmek üzere gönderir."""
         # Session geçmişini kullanarak zaman damgalı metin oluştur
-        text_with_timestamps = ""
-        for entry in self.all_session_transcripts:
-            text_with_timestamps += f"[{entry['time']}] {entry['text']}\n"
+        text_with_timestamps = self._format_session_transcripts()
+        from_session = bool(text_with_timestamps)
         
         # Eğer geçmiş boşsa (manuel düzeltme yapılmış olabilir), kutudaki ham metni al
         if not text_with_timestamps:
             text_with_timestamps = self.textbox.get("1.0", "end").strip()
             
         if text_with_timestamps:
-            threading.Thread(target=self._gpt_logic, args=(text_with_timestamps,), daemon=True).start()
+            self.ai.submit(self._gpt_logic, text_with_timestamps, from_session, group="analysis_openai", policy=POLICY_DROP)
 
-    def _gpt_logic(self, text):
+    def _gpt_logic(self, text, from_session=False):
         """Arka planda OpenAI API isteğini yönetir."""
         try:
             if not self.api_key:
-                self.after(0, lambda: messagebox.showwarning("Anahtar Eksik", "Lütfen OpenAI API anahtarınızı kaydedin."))
+                self.ai.ui(lambda: messagebox.showwarning("Anahtar Eksik", "Lütfen OpenAI API anahtarınızı kaydedin."))
                 return
 
             safe_text = text.encode('utf-8', 'replace').decode('utf-8')
-            client = OpenAI(api_key=self.api_key)
-            self.animator.start_loading("GPT-4o analiz ediyor")
+            self.ai.ui(self.animator.start_loading, "GPT-4o analiz ediyor")
             
-            prompt = self._get_analysis_prompt(safe_text)
             system_msg = self._get_system_prompt()
+            prompt, previous_segments = self._plan_analysis(safe_text, "openai", system_msg, from_session)
+            if prompt is None:
+                self._process_analysis_result(self.incremental.replay("OpenAI"), safe_text, "OpenAI",
+                                              previous_segments=previous_segments)
+                return
 
-            response = client.chat.completions.create(
-                model="gpt-4o",
-                messages=[
-                    {"role": "system", "content": system_msg},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            analysis = response.choices[0].message.content
-            self._process_analysis_result(analysis, safe_text, "OpenAI")
+            stream = self._analysis_stream("OpenAI")
+            analysis = self._stream_chat("openai", prompt, stream, system_instruction=system_msg, model="gpt-4o",
+                                         use_cache=not self.regenerate_var.get())
+            self._process_analysis_result(analysis, safe_text, "OpenAI", stream=stream,
+                                          record_context=system_msg if from_session else None,
+                                          previous_segments=previous_segments)
         except Exception as e:
+            if is_cancelled():
+                return # İptal edilen iş (yeni istek, zaman aşımı, kapanış) hata göstermez
             err = str(e).encode('utf-8', 'ignore').decode('utf-8')
-            self.after(0, lambda err=err: messagebox.showerror("API Hatası", f"Hata: {err}"))
+            self.ai.ui(lambda err=err: messagebox.showerror("API Hatası", f"Hata: {err}"))
 
     # --- GEMINI ANALİZ METOTLARI ---
     def run_gemini_analysis(self):
         """Metin kutusundaki verileri Google Gemini ile analiz eder."""
         # Session geçmişini kullanarak zaman damgalı metin oluştur
-        text_with_timestamps = ""
-        for entry in self.all_session_transcripts:
-            text_with_timestamps += f"[{entry['time']}] {entry['text']}\n"
+        text_with_timestamps = self._format_session_transcripts()
+        from_session = bool(text_with_timestamps)
             
         if not text_with_timestamps:
             text_with_timestamps = self.textbox.get("1.0", "end").strip()
             
         if text_with_timestamps:
-            threading.Thread(target=self._gemini_logic, args=(text_with_timestamps,), daemon=True).start()
+            self.ai.submit(self._gemini_logic, text_with_timestamps, from_session, group="analysis_gemini", policy=POLICY_DROP)
 
-    def _gemini_logic(self, text):
+    def _gemini_logic(self, text, from_session=False):
         """Arka planda Gemini API isteğini yönetir."""
         try:
             if not self.gemini_api_key:
-                self.after(0, lambda: messagebox.showwarning("Anahtar Eksik", "Lütfen Gemini API anahtarınızı kaydedin."))
+                self.ai.ui(lambda: messagebox.showwarning("Anahtar Eksik", "Lütfen Gemini API anahtarınızı kaydedin."))
                 return
 
             safe_text = text.encode('utf-8', 'replace').decode('utf-8')
-            client = GeminiClient(api_key=self.gemini_api_key)
-            self.animator.start_loading("Gemini analiz ediyor")
+            self.ai.ui(self.animator.start_loading, "Gemini analiz ediyor")
             
-            prompt = self._get_analysis_prompt(safe_text)
             system_msg = self._get_system_prompt()
+            prompt, previous_segments = self._plan_analysis(safe_text, "gemini", system_msg, from_session)
+            if prompt is None:
+                self._process_analysis_result(self.incremental.replay("Gemini"), safe_text, "Gemini",
+                                              previous_segments=previous_segments)
+                return
             
-            analysis = client.generate_content(prompt, system_instruction=system_msg)
-            self._process_analysis_result(analysis, safe_text, "Gemini")
+            stream = self._analysis_stream("Gemini")
+            analysis = self._stream_chat("gemini", prompt, stream, system_instruction=system_msg,
+                                         use_cache=not self.regenerate_var.get())
+            self._process_analysis_result(analysis, safe_text, "Gemini", stream=stream,
+                                          record_context=system_msg if from_session else None,
+                                          previous_segments=previous_segments)
         except Exception as e:
+            if is_cancelled():
+                return # İptal edilen iş (yeni istek, zaman aşımı, kapanış) hata göstermez
             err = str(e).encode('utf-8', 'ignore').decode('utf-8')
-            self.after(0, lambda err=err: messagebox.showerror("API Hatası", f"Hata: {err}"))
+            self.ai.ui(lambda err=err: messagebox.showerror("API Hatası", f"Hata: {err}"))
+
+    # --- ÇİFT SAĞLAYICI (GPT-4o + GEMINI) ANALİZİ ---
+    def run_dual_analysis(self):
+        """Aynı analiz istemini GPT-4o ve Gemini'ye eşzamanlı gönderir."""
+        if not self.api_key or not self.gemini_api_key:
+            messagebox.showwarning("Anahtar Eksik", "Çift analiz için hem OpenAI hem Gemini API anahtarı gereklidir.")
+            return
+
+        text_with_timestamps = self._format_session_transcripts()
+        from_session = bool(text_with_timestamps)
+        if not text_with_timestamps:
+            text_with_timestamps = self.textbox.get("1.0", "end").strip()
+
+        if text_with_timestamps:
+            mode = self.fanout_modes[self.fanout_mode_btn.get()]
+            self.ai.submit(self._dual_analysis_logic, text_with_timestamps, mode, from_session,
+                           group="analysis_dual", policy=POLICY_DROP)
+
+    def _dual_analysis_logic(self, text, mode, from_session=False):
+        """
+        Fan-out analizi: FANOUT_FIRST'te ilk başarılı yanıt raporlanır ve diğeri iptal edilir;
+        FANOUT_MERGE'de iki yanıt da analysis_results'a (ve PDF raporuna) eklenir.
+        """
+        try:
+            safe_text = text.encode('utf-8', 'replace').decode('utf-8')
+            self.ai.ui(self.animator.start_loading, "GPT-4o ve Gemini birlikte analiz ediyor")
+
+            # Uzun kayıtlarda bölüm özetleri bir kez (Gemini ile) çıkarılır, son analiz iki sağlayıcıya gider
+            prompt = self._build_analysis_prompt(safe_text, "gemini")
+            system_msg = self._get_system_prompt()
+            names = {"openai": "OpenAI", "gemini": "Gemini"}
+            streams = {provider: self._analysis_stream(name) for provider, name in names.items()}
+
+            try:
+                result = self.llm.fan_out(prompt, system_instruction=system_msg, mode=mode, models={"openai": "gpt-4o"},
+                                          on_chunk=lambda provider, chunk: streams[provider].write(chunk),
+                                          use_cache=not self.regenerate_var.get())
+            except Exception:
+                for stream in streams.values():
+                    stream.cancel()
+                raise
+
+            if mode == FANOUT_FIRST:
+                winner, analysis = result
+                result = {winner: analysis}
+
+            for provider, stream in streams.items():
+                analysis = result.get(provider)
+                if analysis:
+                    # Tam analiz sonucu, sağlayıcının sonraki artımlı güncellemelerine temel olur
+                    self._process_analysis_result(analysis, safe_text, names[provider], stream=stream,
+                                                  record_context=system_msg if from_session else None)
+                else:
+                    stream.cancel()
+        except Exception as e:
+            if is_cancelled():
+                return # İptal edilen iş (yeni istek, zaman aşımı, kapanış) hata göstermez
+            err = str(e).encode('utf-8', 'ignore').decode('utf-8')
+            self.ai.ui(lambda err=err: messagebox.showerror("API Hatası", f"Hata: {err}"))
+            self.ai.ui(self.animator.stop, "Çift analiz başarısız.")
 
     # --- AI CHAT (SORU-CEVAP) MANTIĞI ---
     def ask_ai_question(self):
@@ -1425,7 +2010,7 @@ class App(ctk.CTk):
             return
             
         self.ask_btn.configure(state="disabled", text="...")
-        threading.Thread(target=self._chat_logic, args=(question, transcript), daemon=True).start()
+        self.ai.submit(self._chat_logic, question, transcript, group="qa", policy=POLICY_DROP)
 
     def _chat_logic(self, question, transcript):
         """Arka planda AI chat isteğini yönetir."""
@@ -1433,45 +2018,57 @@ class App(ctk.CTk):
             # Varsa Gemini, yoksa OpenAI kullan
             system_msg = self._get_system_prompt()
             if self.gemini_api_key:
-                client = GeminiClient(api_key=self.gemini_api_key)
-                prompt = f"Şu transkript üzerinden soruyu cevapla:\n\nTRANSKRİPT:\n{transcript}\n\nSORU: {question}"
-                response = client.generate_content(prompt, system_instruction=system_msg)
-                answer = response
+                provider = "gemini"
             elif self.api_key:
-                client = OpenAI(api_key=self.api_key)
-                prompt = f"Şu transkript üzerinden soruyu cevapla:\n\nTRANSKRİPT:\n{transcript}\n\nSORU: {question}"
-                res = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {"role": "system", "content": system_msg},
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                answer = res.choices[0].message.content
+                provider = "openai"
             else:
-                self.after(0, lambda: messagebox.showwarning("Hata", "Lütfen API anahtarlarını kontrol et."))
+                self.ai.ui(lambda: messagebox.showwarning("Hata", "Lütfen API anahtarlarını kontrol et."))
                 return
 
+            # Transkript bütçeyi aşarsa en son konuşulanlar korunur
+            budget = self._prompt_budget(provider)
+            budget.add("system", system_msg, priority=REQUIRED)
+            budget.add("question", question, priority=REQUIRED)
+            budget.add("transcript", transcript, priority=1, keep="end")
+            parts = budget.fit()
+            prompt = f"Şu transkript üzerinden soruyu cevapla:\n\nTRANSKRİPT:\n{parts['transcript']}\n\nSORU: {question}"
+
+            stream = TextStreamWriter(self.analysis_textbox, header=f"\n\n--- SORU-CEVAP ---\nSoru: {question}\nCevap: ", ui=self.ai.ui)
+            answer = self._stream_chat(provider, prompt, stream, system_instruction=system_msg,
+                                       use_cache=not self.regenerate_var.get())
             self.last_analysis = answer # Seslendirilebilmesi için son cevabı kaydet
-            self.after(0, lambda q=question, a=answer: self._add_chat_to_ui(q, a))
+            self.ai.ui(lambda q=question, a=answer: self._add_chat_to_ui(q, a, stream))
         except Exception as e:
+            if is_cancelled():
+                return # İptal edilen iş (yeni istek, zaman aşımı, kapanış) hata göstermez
             err = str(e)
-            self.after(0, lambda err=err: messagebox.showerror("Chat Hatası", f"Hata: {err}"))
+            self.ai.ui(lambda err=err: messagebox.showerror("Chat Hatası", f"Hata: {err}"))
         finally:
-            self.after(0, lambda: self.ask_btn.configure(state="normal", text="SOR"))
-            self.after(0, lambda: self.chat_entry.delete(0, "end"))
-
-    def _add_chat_to_ui(self, question, answer):
-        """Soruyu ve cevabı analiz kutusuna ekler."""
-        chat_text = f"\n\n--- SORU-CEVAP ---\nSoru: {question}\nCevap: {answer}\n------------------\n"
-        self.analysis_textbox.insert("end", chat_text)
-        self.analysis_textbox.see("end")
+            self.ai.ui(lambda: self.ask_btn.configure(state="normal", text="SOR"))
+            self.ai.ui(lambda: self.chat_entry.delete(0, "end"))
+
+    def _add_chat_to_ui(self, question, answer, stream=None):
+        """Soruyu ve cevabı analiz kutusuna ekler (stream verilirse cevap zaten akışla yazılmıştır)."""
+        if stream:
+            stream.finish(answer, footer="\n------------------\n")
+        else:
+            chat_text = f"\n\n--- SORU-CEVAP ---\nSoru: {question}\nCevap: {answer}\n------------------\n"
+            self.analysis_textbox.insert("end", chat_text)
+            self.analysis_textbox.see("end")
         self.status_label.configure(text="AI sorunu cevapladı.")
 
-    def _get_analysis_prompt(self, safe_text):
-        """AI modellerine akademik ve profesyonel bitirme projesi seviyesinde analiz komutu döner."""
+    def _get_analysis_prompt(self, safe_text, summarized=False):
+        """
+        AI modellerine akademik ve profesyonel bitirme projesi seviyesinde analiz komutu döner.
+        summarized=True ise safe_text, uzun kaydın zaman damgalı bölüm özetleridir (map-reduce).
+        """
+        if summarized:
+            task = "GÖREV: Aşağıda çok uzun bir kaydın bölüm bölüm çıkarılmış, zaman damgalı özetleri var. " \
+                   "Bu özetleri bütün kaydın kendisi gibi ele alarak analiz et; duygu segmentleri için özetlerdeki ALINTI satırlarını kullan."
+        else:
+            task = "GÖREV: Aşağıdaki zaman damgalı transkriptleri analiz et."
         return f"""
-        GÖREV: Aşağıdaki zaman damgalı transkriptleri analiz et.
+        {task}
         
         [KRİTİK TALİMATLAR]:
         1. HER BİR transkript segmentini (zaman damgasıyla birlikte) MUTLAKA ayrı ayrı incele.
@@ -1526,6 +2123,51 @@ class App(ctk.CTk):
         {safe_text}
         """
 
+    def _build_analysis_prompt(self, safe_text, provider):
+        """
+        Analiz istemini oluşturur. Transkript tek isteme sığmayacak kadar uzunsa önce bölümler
+        provider ile paralel özetlenir; önbellekteki bölümler yeniden özetlenmez.
+        """
+        if not self.map_reduce.needs_map_reduce(safe_text):
+            return self._get_analysis_prompt(safe_text)
+
+        def progress(done, total):
+            self.animator.original_text = f"Uzun kayıt özetleniyor ({done}/{total} bölüm)"
+
+        summaries = self.map_reduce.summarize(safe_text, provider, progress=progress)
+        return self._get_analysis_prompt(summaries, summarized=True)
+
+    def _plan_analysis(self, safe_text, provider, system_msg, from_session):
+        """
+        Analizin tam mı artımlı mı yapılacağına karar verir.
+        Aynı sağlayıcının önceki analizi oturumun başını kapsıyorsa yalnızca yeni segmentler
+        önceki rapor ve skorlarla birlikte gönderilir.
+
+        Returns:
+            tuple: (istem, önceki segmentler). Tam analizde önceki segmentler None'dır; transkript
+            son analizden beri değişmediyse istem None'dır ve kayıtlı rapor yeniden gösterilir.
+        """
+        key = "OpenAI" if provider == "openai" else "Gemini"
+        if from_session and not self.regenerate_var.get():
+            delta = self.incremental.delta_for(key, safe_text, system_msg)
+            if delta is not None and not delta.strip():
+                print(f"[*] Transkript değişmedi ({key}), önceki analiz gösteriliyor")
+                return None, self.incremental.previous_segments(key)
+            if delta:
+                print(f"[*] Artımlı analiz ({key}): {len(delta)} yeni karakter")
+                return self.incremental.build_update_prompt(key, delta), self.incremental.previous_segments(key)
+        return self._build_analysis_prompt(safe_text, provider), None
+
+    def _prompt_budget(self, provider, model=None, max_tokens=None):
+        """
+        İstem parçalarını sağlayıcının modeline göre token bütçesine sığdıracak PromptBudget döner.
+        Bütçe config.json'daki llm_prompt_budget_tokens ile (ve verilirse max_tokens ile) sınırlanır.
+        """
+        limit = self.config_manager.get("llm_prompt_budget_tokens")
+        if max_tokens:
+            limit = min(limit, max_tokens) if limit else max_tokens
+        return PromptBudget(model or DEFAULT_CHAT_MODELS[provider], max_tokens=limit)
+
     # --- AI DİL KOÇU MANTIĞI ---
     def run_language_analysis(self):
         """
@@ -1544,7 +2186,7 @@ class App(ctk.CTk):
         self.language_analysis_result = ""
         self.coach_chat_history = [] # Yeni analizde geçmişi sıfırla
         self.run_coach_btn.configure(state="disabled", text="ANALİZ EDİLİYOR...")
-        threading.Thread(target=self._language_coach_logic, args=(text,), daemon=True).start()
+        self.ai.submit(self._language_coach_logic, text, group="language_coach", policy=POLICY_DROP)
 
     def _language_coach_logic(self, text):
         """Arka planda Dil Koçu API isteğini yönetir."""
@@ -1554,40 +2196,40 @@ class App(ctk.CTk):
             level = self.coach_level_combo.get()
             mode = self.coach_mode_combo.get()
             
-            self.animator.start_loading(f"Dil Koçu ({target_lang}) analiz ediyor")
+            self.ai.ui(self.animator.start_loading, f"Dil Koçu ({target_lang}) analiz ediyor")
             
-            prompt = self._get_language_coach_prompt(text, target_lang, level, mode)
             system_msg = "Sen uzman bir dil eğitmeni ve polyglot bir mentorsun. Öğrencilerine destekleyici, öğretici ve profesyonel geri bildirimler verirsin."
 
             if self.gemini_api_key:
-                client = GeminiClient(api_key=self.gemini_api_key)
-                response = client.generate_content(prompt, system_instruction=system_msg)
-                result = response
+                provider = "gemini"
             elif self.api_key:
-                client = OpenAI(api_key=self.api_key)
-                res = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {"role": "system", "content": system_msg},
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                result = res.choices[0].message.content
+                provider = "openai"
             else:
-                self.after(0, lambda: messagebox.showwarning("Hata", "Lütfen API anahtarlarını kontrol et."))
+                self.ai.ui(lambda: messagebox.showwarning("Hata", "Lütfen API anahtarlarını kontrol et."))
                 return
 
+            budget = self._prompt_budget(provider)
+            budget.add("system", system_msg, priority=REQUIRED)
+            budget.add("text", text, priority=1, keep="end")
+            prompt = self._get_language_coach_prompt(budget.fit()["text"], target_lang, level, mode)
+
+            stream = TextStreamWriter(self.language_textbox, clear=True, ui=self.ai.ui)
+            result = self._stream_chat(provider, prompt, stream, system_instruction=system_msg,
+                                       use_cache=not self.regenerate_var.get())
             self.language_analysis_result = result
-            self.after(0, lambda r=result: self._update_language_ui(r))
+            self.ai.ui(lambda r=result: self._update_language_ui(r, stream))
         except Exception as e:
+            if is_cancelled():
+                return # İptal edilen iş (yeni istek, zaman aşımı, kapanış) hata göstermez
             err = str(e)
-            self.after(0, lambda err=err: messagebox.showerror("Dil Koçu Hatası", f"Hata: {err}"))
+            self.ai.ui(lambda err=err: messagebox.showerror("Dil Koçu Hatası", f"Hata: {err}"))
         finally:
-            self.after(0, lambda: self.run_coach_btn.configure(state="normal", text="DİL ANALİZİ BAŞLAT"))
+            self.ai.ui(lambda: self.run_coach_btn.configure(state="normal", text="DİL ANALİZİ BAŞLAT"))
 
     # --- SENARYO YÖNETİMİ ---
     def _on_topic_change(self, choice):
         """Konu değiştiğinde senaryo listesini güncelle."""
+        self._update_prompt_vocabulary()
         if choice in self.scenarios_data:
             scenarios = list(self.scenarios_data[choice].keys())
             self.scenario_combo.configure(values=scenarios)
@@ -1629,7 +2271,7 @@ class App(ctk.CTk):
                 return
             
             self.magic_wand_btn.configure(state="disabled", text="✨")
-            threading.Thread(target=self._custom_scenario_logic, args=(interest,), daemon=True).start()
+            self.ai.submit(self._custom_scenario_logic, interest, group="custom_scenario", policy=POLICY_DROP)
 
     def _custom_scenario_logic(self, interest):
         """AI'dan ilgi alanına uygun senaryo ve karakterler üretir."""
@@ -1647,8 +2289,7 @@ class App(ctk.CTk):
             # 1. Öncelik: Gemini
             if self.gemini_api_key:
                 try:
-                    client = GeminiClient(api_key=self.gemini_api_key)
-                    response = client.generate_content(prompt, system_instruction=system_msg)
+                    response = self.llm.chat("gemini", prompt, system_instruction=system_msg, use_cache=False)
                     # Eğer hata mesajı DEĞİLSE ve boş değilse sonucu al
                     if response and not response.startswith("[V19]"):
                         result = response
@@ -1662,12 +2303,7 @@ class App(ctk.CTk):
             if not result and self.api_key:
                 try:
                     print("[*] GPT-4o ile devam ediliyor...")
-                    client = OpenAI(api_key=self.api_key)
-                    res = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[{"role": "system", "content": system_msg}, {"role": "user", "content": prompt}]
-                    )
-                    result = res.choices[0].message.content
+                    result = self.llm.chat("openai", prompt, system_instruction=system_msg, use_cache=False)
                     used_model = "GPT-4o"
                 except Exception as gpt_ex:
                     print(f"GPT Hatası: {gpt_ex}")
@@ -1697,17 +2333,19 @@ class App(ctk.CTk):
                 self.scenarios_data[custom_topic][s_name] = chars
                 
                 # UI Güncelle
-                self.after(0, lambda t=custom_topic, s=s_name: self._update_custom_topic_ui(t, s))
+                self.ai.ui(lambda t=custom_topic, s=s_name: self._update_custom_topic_ui(t, s))
             
             else:
                 # Eğer hiçbir modelden sonuç alınamadıysa
-                self.after(0, lambda: messagebox.showwarning("Hata", "AI senaryo üretemedi. Lütfen API kotalarını veya bağlantınızı kontrol edin."))
+                self.ai.ui(lambda: messagebox.showwarning("Hata", "AI senaryo üretemedi. Lütfen API kotalarını veya bağlantınızı kontrol edin."))
                 
         except Exception as e:
+            if is_cancelled():
+                return # İptal edilen iş (yeni istek, zaman aşımı, kapanış) hata göstermez
             error_msg = str(e)
-            self.after(0, lambda m=error_msg: messagebox.showerror("Hata", f"Senaryo oluşturulamadı: {m}"))
+            self.ai.ui(lambda m=error_msg: messagebox.showerror("Hata", f"Senaryo oluşturulamadı: {m}"))
         finally:
-            self.after(0, lambda: self.magic_wand_btn.configure(state="normal", text="🪄"))
+            self.ai.ui(lambda: self.magic_wand_btn.configure(state="normal", text="🪄"))
 
     def _update_custom_topic_ui(self, topic, scenario):
         """Yeni üretilen senaryoyu combo boxlara ekler."""
@@ -1795,33 +2433,35 @@ class App(ctk.CTk):
         msg = f"Lütfen şu cümleyi yüksek sesle tekrar et:\n\n\"{suggestion}\"\n\nKayıt otomatik başlayacak."
         if messagebox.askokcancel("Telaffuz Testi", msg):
             self.target_test_sentence = suggestion
-            self.active_recording_source = "pronunciation"
-            self.toggle_recording(source="language") # Kaydı başlat
-
-    def _compare_pronunciation(self, user_text):
-        """Kullanıcının söylediği ile hedef cümleyi karşılaştırır."""
-        target = self.target_test_sentence.lower().strip()
-        user = user_text.lower().strip()
-        
-        # Gereksiz noktalamaları temizle
-        import string
-        target = target.translate(str.maketrans('', '', string.punctuation))
-        user = user.translate(str.maketrans('', '', string.punctuation))
-        
-        # Kelime bazlı karşılaştırma
-        target_words = target.split()
-        user_words = user.split()
-        
-        matches = 0
-        for word in user_words:
-            if word in target_words:
-                matches += 1
-                
-        score = int((matches / len(target_words)) * 100) if target_words else 0
+            self.toggle_recording(source="pronunciation") # Kaydı başlat (Dil Koçu butonu üzerinden)
+
+    def _compare_pronunciation(self, user_text, words=None):
+        """
+        Kullanıcının söylediği ile hedef cümleyi kelime hizalamasıyla karşılaştırır.
+        Whisper'ın kelime olasılıkları ile atlanan, yanlış ve belirsiz kelimeleri raporlar.
+        """
+        if not words:
+            # Kelime zaman damgası yoksa metni tam güvenle söylenmiş kelimeler olarak kullan
+            words = [{"word": w, "start": 0.0, "end": 0.0, "probability": 1.0} for w in user_text.split()]
+        
+        result = PronunciationScorer().score(self.target_test_sentence, words)
+        score = result["score"]
         
         result_msg = f"Hedef: {self.target_test_sentence}\nSöylenen: {user_text}\n\n"
         result_msg += f"🎯 Telaffuz Skoru: %{score}\n\n"
         
+        if result["missed"]:
+            result_msg += f"⛔ Atlanan kelimeler: {', '.join(result['missed'])}\n"
+        if result["wrong"]:
+            wrong = ", ".join(f"{w['expected']} → {w['heard']} ({w['start']:.1f}s)" for w in result["wrong"])
+            result_msg += f"❌ Yanlış söylenen: {wrong}\n"
+        if result["slurred"]:
+            slurred = ", ".join(f"{w['word']} ({w['start']:.1f}s, %{int(w['probability'] * 100)})" for w in result["slurred"])
+            result_msg += f"🌀 Net anlaşılmayan: {slurred}\n"
+        if result["extra"]:
+            result_msg += f"➕ Fazladan söylenen: {', '.join(result['extra'])}\n"
+        result_msg += "\n"
+        
         if score > 90:
             result_msg += "Mükemmel! Tıpkı bir ana dil konuşuru gibisin. 🌟"
         elif score > 60:
@@ -1849,12 +2489,12 @@ class App(ctk.CTk):
             self.topic_textbox.insert("end", f"--- {sub_option if sub_option != '-' else scenario} ile Bağlantı Kuruluyor... ---\n")
             
             # Yeni bir sohbet başlatılıyorsa görseli güncelle
-            threading.Thread(target=self.generate_topic_image, args=(scenario, f"{scenario} - {sub_option} context"), daemon=True).start()
+            self.ai.submit(self.generate_topic_image, scenario, f"{scenario} - {sub_option} context", group="topic_image", policy=POLICY_REPLACE)
         
         self.start_topic_btn.configure(state="disabled", text="...")
         self.topic_ask_btn.configure(state="disabled")
         
-        threading.Thread(target=self._topic_chat_logic, args=(topic, user_input, scenario, sub_option), daemon=True).start()
+        self.ai.submit(self._topic_chat_logic, topic, user_input, scenario, sub_option, group="topic_chat", policy=POLICY_DROP)
 
     def generate_topic_image(self, topic, description):
         """DALL-E 3 kullanarak konuya uygun görsel oluşturur ve arayüze basar."""
@@ -1863,9 +2503,7 @@ class App(ctk.CTk):
 
         try:
             # UI işlemleri ana thread'de yapılmalı
-            self.after(0, lambda: self.topic_image_label.configure(text="Görsel Oluşturuluyor..."))
-            
-            client = OpenAI(api_key=self.api_key)
+            self.ai.ui(lambda: self.topic_image_label.configure(text="Görsel Oluşturuluyor..."))
             
             # Prompt'u optimize et ve güvenlik filtreleri için rafine et
             # DALL-E'nin 'safe' politikalarına uygun bir dille betimleme yap
@@ -1890,37 +2528,21 @@ class App(ctk.CTk):
                     image_prompt += " Ottoman Empire architecture and 15th century historical style."
 
             try:
-                response = client.images.generate(
-                    model="dall-e-3",
-                    prompt=image_prompt[:1000],
-                    size="1792x1024",
-                    quality="standard",
-                    n=1,
-                )
+                img_data = self.llm.generate_image(image_prompt[:1000])
             except Exception as e:
                 err_msg = str(e).lower()
                 if "content_policy_violation" in err_msg or "safety_system" in err_msg:
                     # İlk deneme filtreye takıldıysa daha güvenli bir dille sessizce tekrar dene
                     safe_image_prompt = f"Peaceful and educational concept art illustration for {topic}. Cinematic lighting, soft colors, professional concept art."
                     try:
-                        response = client.images.generate(
-                            model="dall-e-3",
-                            prompt=safe_image_prompt,
-                            size="1792x1024",
-                            quality="standard",
-                            n=1,
-                        )
+                        img_data = self.llm.generate_image(safe_image_prompt)
                     except Exception as e2:
                         raise Exception(f"Görsel üretimi güvenlik kısıtlamasına takıldı: {e2}")
                 else:
                     raise e
+            if is_cancelled():
+                return
 
-            image_url = response.data[0].url
-            
-            # Resmi indir
-            response = requests.get(image_url)
-            img_data = response.content
-            
             # PIL ile aç ve CTkImage'a çevir
             pil_image = Image.open(io.BytesIO(img_data))
             
@@ -1931,16 +2553,21 @@ class App(ctk.CTk):
             
             ctk_image = ctk.CTkImage(light_image=pil_image, dark_image=pil_image, size=(new_width, new_height))
             
-            self.after(0, lambda: self.topic_image_label.configure(image=ctk_image, text=""))
+            # Bu sırada yeni bir görsel istendiyse (iş iptal edildi) eski görsel yenisinin üzerine yazılmaz
+            if is_cancelled():
+                return
+            self.ai.ui(lambda: self.topic_image_label.configure(image=ctk_image, text=""))
             
         except Exception as e:
+            if is_cancelled():
+                return # İptal edilen iş (yeni istek, zaman aşımı, kapanış) hata göstermez
             err_msg = str(e)
             print(f"Görsel oluşturma hatası: {err_msg}")
             # Güvenlik hatası ise kullanıcıyı bilgilendir
             if "content_policy_violation" in err_msg:
-                self.after(0, lambda: self.topic_image_label.configure(text="Güvenlik Politikası Gereği Görsel Üretilemedi"))
+                self.ai.ui(lambda: self.topic_image_label.configure(text="Güvenlik Politikası Gereği Görsel Üretilemedi"))
             else:
-                self.after(0, lambda: self.topic_image_label.configure(text="Sistem Hatası: Görsel Üretilemedi"))
+                self.ai.ui(lambda: self.topic_image_label.configure(text="Sistem Hatası: Görsel Üretilemedi"))
 
     def manual_image_generation(self):
         """Kullanıcının isteğiyle görsel oluşturur."""
@@ -1951,7 +2578,7 @@ class App(ctk.CTk):
         if hasattr(self, 'last_topic_response') and self.last_topic_response:
              desc += f". Context: {self.last_topic_response[:150]}"
         
-        threading.Thread(target=self.generate_topic_image, args=(topic, desc), daemon=True).start()
+        self.ai.submit(self.generate_topic_image, topic, desc, group="topic_image", policy=POLICY_REPLACE)
 
     def upload_topic_notes(self):
         """Kullanıcının yüklediği ders notlarını (PDF/TXT) okur ve bağlama ekler."""
@@ -1979,21 +2606,60 @@ class App(ctk.CTk):
                     content = f.read()
 
             if content:
-                # İçeriği sakla
-                self.uploaded_notes_contet = content[:5000] # Çok uzun olmasın, token limiti
-                messagebox.showinfo("Başarılı", "Notlar yüklendi! Artık sorularınızı bu notlara göre sorabilirsiniz.")
-                self.topic_textbox.insert("end", f"\n[SİSTEM]: '{os.path.basename(file_path)}' içeriği bağlama eklendi.\n")
+                # İçeriğin tamamı saklanır; isteklere yalnızca soruyla ilgili bölümler eklenir
+                self.uploaded_notes_contet = content
+                self.notes_index = None
+                self._update_prompt_vocabulary()
+                self.topic_textbox.insert("end", f"\n[SİSTEM]: '{os.path.basename(file_path)}' indeksleniyor...\n")
+                self.ai.submit(self._index_notes_logic, content, os.path.basename(file_path), group="notes_index", policy=POLICY_REPLACE)
         except Exception as e:
             messagebox.showerror("Hata", f"Dosya okunamadı: {e}")
 
+    def _index_notes_logic(self, content, name):
+        """Notları arka planda bölümlere ayırıp gömme vektörleriyle indeksler (aynı dosya için diskteki indeks kullanılır)."""
+        try:
+            embedder = get_embedder(self.config_manager.get("notes_embedding_model") or DEFAULT_EMBEDDING_MODEL)
+            index = NotesIndex.build(content, embedder, source=name)
+            if self.uploaded_notes_contet is not content:
+                return # Bu sırada başka bir dosya yüklendi
+            self.notes_index = index
+            self.ai.ui(lambda: self.topic_textbox.insert("end", f"[SİSTEM]: '{name}' bağlama eklendi ({len(index.chunks)} bölüm).\n"))
+            self.ai.ui(lambda: messagebox.showinfo("Başarılı", "Notlar yüklendi! Artık sorularınızı bu notlara göre sorabilirsiniz."))
+        except Exception as e:
+            if is_cancelled():
+                return # İptal edilen iş (yeni istek, zaman aşımı, kapanış) hata göstermez
+            err = str(e)
+            print(f"Not indeksleme hatası: {err}")
+            self.ai.ui(lambda err=err: messagebox.showerror("Hata", f"Notlar indekslenemedi, ilk 5000 karakter kullanılacak: {err}"))
+
+    def _notes_context(self, query, k=None):
+        """
+        Yüklenen notlardan sorguyla en ilgili k bölümü döner. Sorgu boşsa notların tamamına yayılan
+        bölümler seçilir; indeks henüz hazır değilse notların başı kullanılır.
+        """
+        notes = getattr(self, 'uploaded_notes_contet', "")
+        if not notes:
+            return ""
+        if self.notes_index is None or not self.notes_index.chunks:
+            return notes[:5000]
+        k = k or int(self.config_manager.get("notes_top_k") or 4)
+        if query.strip():
+            chunks = [chunk for _, _, chunk in self.notes_index.search(query, k)]
+        else:
+            chunks = self.notes_index.spread(k)
+        return "\n\n".join(f"[Bölüm {i + 1}]\n{chunk}" for i, chunk in enumerate(chunks))
+
+    def _update_prompt_vocabulary(self):
+        """Aktif konu ve yüklenen notlardaki terimleri canlı transkripsiyon sözlüğüne aktarır."""
+        terms = [self.topic_combo.get()]
+        notes = getattr(self, 'uploaded_notes_contet', "")
+        if notes:
+            terms += extract_terms(notes)
+        self.rolling_prompt.set_vocabulary(terms)
+
     def _topic_chat_logic(self, topic, user_input, scenario, sub_option):
         """Arka planda bağımsız konu chat isteğini yönetir ve hafızayı kullanır."""
         try:
-            # Hafızayı Derle (Son 5 mesaj)
-            history_context = ""
-            for h in self.topic_chat_history[-5:]:
-                history_context += f"Öğrenci: {h['input']}\nSen: {h['output']}\n"
-
             # Sistem Mesajını (Persona) Oluştur
             system_msg = f"Sen {topic} konusunda uzmansın. "
             
@@ -2032,10 +2698,27 @@ class App(ctk.CTk):
             # RAG (Doküman) Entegrasyonu
             # RAG (Doküman) Entegrasyonu - EN YÜKSEK ÖNCELİK
             # Eğer doküman yüklendiyse, sistem mesajının başına ekliyoruz ki talimatları override edebilsin.
-            if hasattr(self, 'uploaded_notes_contet') and self.uploaded_notes_contet:
+            notes = ""
+            if getattr(self, 'uploaded_notes_contet', ""):
+                # Kısa takip soruları ("biraz daha açar mısın?") için önceki soru da sorguya eklenir
+                last_input = self.topic_chat_history[-1]['input'] if self.topic_chat_history else ""
+                query = f"{last_input} {user_input}" if user_input else f"{topic} {scenario}"
+                notes = self._notes_context(query)
+
+            # Bütçe aşılırsa önce en eski sohbet mesajları, sonra doküman bölümleri kırpılır
+            budget = self._prompt_budget("gemini" if self.gemini_api_key else "openai")
+            budget.add("system", system_msg, priority=REQUIRED)
+            budget.add("user", user_input, priority=REQUIRED)
+            budget.add("notes", notes, priority=2)
+            budget.add_items("history", [f"Öğrenci: {h['input']}\nSen: {h['output']}\n" for h in self.topic_chat_history[-10:]],
+                             priority=1)
+            parts = budget.fit()
+            history_context = parts["history"]
+
+            if notes:
                 rag_instruction = f"""
-                [KULLANICI EKLİ DOKÜMAN BAŞLANGIÇ]
-                {self.uploaded_notes_contet}
+                [KULLANICI EKLİ DOKÜMAN BAŞLANGIÇ (soruyla ilgili bölümler)]
+                {parts['notes']}
                 [KULLANICI EKLİ DOKÜMAN BİTİŞ]
                 
                 TALİMAT: Cevaplarını SADECE ve ÖNCELİKLE yukarıdaki dokümana dayandır. 
@@ -2049,17 +2732,37 @@ class App(ctk.CTk):
             
             # RPG Görsel Tetikleyici
             if topic == "RPG Oyunu" and (len(self.topic_chat_history) == 0):
-                 threading.Thread(target=self.generate_topic_image, args=(scenario, f"{scenario} atmosphere"), daemon=True).start()
+                 self.ai.submit(self.generate_topic_image, scenario, f"{scenario} atmosphere", group="topic_image", policy=POLICY_REPLACE)
 
             # API Çağrısı ve Fallback (Yedekleme) Mantığı
             result = ""
             used_model = "None"
-            
+            # Yanıt konu kutusuna akış halinde yazılır; yedek modele geçilirse bitişte son yanıtla değiştirilir
+            header = f"\n[SEN]: {user_input}\n[AI ({topic})]: " if user_input else f"\n--- {topic} HAKKINDA BİR FİKİR/ÖNERİ ---\n"
+            stream = TextStreamWriter(self.topic_textbox, header=header, ui=self.ai.ui)
+            
+            # Yarış modu: iki sağlayıcı aynı anda sorulur, ilk başarılı yanıt kullanılır (diğeri iptal edilir)
+            if self.gemini_api_key and self.api_key and self.llm_race_var.get():
+                leader = [] # İlk parça gönderen sağlayıcı ekrana akıtılır
+                def on_chunk(provider, chunk):
+                    if not leader:
+                        leader.append(provider)
+                    if leader[0] == provider:
+                        stream.write(chunk)
+                try:
+                    winner, result = self.llm.fan_out(prompt, system_instruction=system_msg, mode=FANOUT_FIRST,
+                                                      on_chunk=on_chunk, use_cache=False)
+                    used_model = "Gemini" if winner == "gemini" else "GPT-4o"
+                except Exception as race_error:
+                    err = str(race_error)
+                    stream.cancel()
+                    self.ai.ui(lambda err=err: messagebox.showerror("API Hatası", f"Tüm modeller başarısız oldu. {err}"))
+                    return
+
             # 1. Öncelik: Gemini
-            if self.gemini_api_key:
+            if not result and self.gemini_api_key:
                 try:
-                    client = GeminiClient(api_key=self.gemini_api_key)
-                    response = client.generate_content(prompt, system_instruction=system_msg)
+                    response = self.llm.chat("gemini", prompt, system_instruction=system_msg, on_chunk=stream.write, use_cache=False)
                     
                     # Hata kontrolü: Eğer response bir string ise ve hata mesajı içeriyorsa
                     if isinstance(response, str) and ("quota_dimensions" in response or "RESOURCE_EXHAUSTED" in response or "quota" in response):
@@ -2073,46 +2776,42 @@ class App(ctk.CTk):
                     print(f"Gemini Hatası (Fallback devreye giriyor): {err}")
                     # Gemini hata verdiyse ve OpenAI key varsa devam et, yoksa hata fırlat
                     if not self.api_key:
-                        self.after(0, lambda err=err: messagebox.showerror("API Hatası", f"Gemini hatası ve OpenAI anahtarı yok: {err}"))
+                        stream.cancel()
+                        self.ai.ui(lambda err=err: messagebox.showerror("API Hatası", f"Gemini hatası ve OpenAI anahtarı yok: {err}"))
                         return
 
             # 2. Öncelik (veya Fallback): OpenAI (GPT)
             if not result and self.api_key:
                 try:
-                    client = OpenAI(api_key=self.api_key)
-                    res = client.chat.completions.create(
-                        model="gpt-4o-mini",
-                        messages=[
-                            {"role": "system", "content": system_msg},
-                            {"role": "user", "content": prompt}
-                        ]
-                    )
-                    result = res.choices[0].message.content
+                    result = self._stream_chat("openai", prompt, stream, system_instruction=system_msg, use_cache=False)
                     used_model = "GPT-4o"
                 except Exception as gpt_error:
                      err = str(gpt_error)
-                     self.after(0, lambda err=err: messagebox.showerror("API Hatası", f"Tüm modeller başarısız oldu. {err}"))
+                     self.ai.ui(lambda err=err: messagebox.showerror("API Hatası", f"Tüm modeller başarısız oldu. {err}"))
                      return
             
             if not result:
-                self.after(0, lambda: messagebox.showwarning("Hata", "API anahtarı eksik veya geçersiz."))
+                stream.cancel()
+                self.ai.ui(lambda: messagebox.showwarning("Hata", "API anahtarı eksik veya geçersiz."))
                 return
 
             self.last_topic_response = result
             self.topic_chat_history.append({"topic": topic, "input": user_input, "output": result})
-            self.after(0, lambda t=topic, u=user_input, r=result: self._update_topic_ui(t, u, r))
+            self.ai.ui(lambda t=topic, u=user_input, r=result: self._update_topic_ui(t, u, r, stream))
             
             # Otomatik Seslendirme Kontrolü
             if self.auto_tts_topic_var.get():
-                self.after(0, self._speak_topic_last_response)
+                self.ai.ui(self._speak_topic_last_response)
                 
         except Exception as e:
+            if is_cancelled():
+                return # İptal edilen iş (yeni istek, zaman aşımı, kapanış) hata göstermez
             err = str(e)
-            self.after(0, lambda err=err: messagebox.showerror("Konu Sohbet Hatası", f"Hata: {err}"))
+            self.ai.ui(lambda err=err: messagebox.showerror("Konu Sohbet Hatası", f"Hata: {err}"))
         finally:
-            self.after(0, lambda: self.start_topic_btn.configure(state="normal", text="SOHBETİ BAŞLAT"))
-            self.after(0, lambda: self.topic_ask_btn.configure(state="normal"))
-            self.after(0, lambda: self.topic_chat_entry.delete(0, "end"))
+            self.ai.ui(lambda: self.start_topic_btn.configure(state="normal", text="SOHBETİ BAŞLAT"))
+            self.ai.ui(lambda: self.topic_ask_btn.configure(state="normal"))
+            self.ai.ui(lambda: self.topic_chat_entry.delete(0, "end"))
 
     def _get_topic_prompt(self, topic, user_input, scenario, sub_option, history=""):
         prompt = f"Konu: {topic}\nSenaryo: {scenario}\n"
@@ -2140,20 +2839,22 @@ class App(ctk.CTk):
             
         def tts_worker():
             try:
-                self.status_label.configure(text="Ses hazırlanıyor...")
+                self.ai.ui(lambda: self.status_label.configure(text="Ses hazırlanıyor..."))
                 # --- ELEVENLABS SES KLONLAMA KONTROLÜ ---
                 if self.eleven_enable_var.get() and self.eleven_manager:
                     selected_voice_name = self.eleven_voice_combo.get()
                     voice_id = next((v[1] for v in self.eleven_voices if v[0] == selected_voice_name), None)
                     if voice_id:
                         temp_mp3 = self.eleven_manager.generate_speech(self.last_topic_response[:1000], voice_id)
+                        if is_cancelled():
+                            return
                         if temp_mp3:
-                            self.status_label.configure(text="Ses oynatılıyor (ElevenLabs)...")
+                            self.ai.ui(lambda: self.status_label.configure(text="Ses oynatılıyor (ElevenLabs)..."))
                             self._play_audio(temp_mp3)
                             return
                 
                 # --- STANDART OPENAI TTS ---
-                self.status_label.configure(text="Ses hazırlanıyor (OpenAI)...")
+                self.ai.ui(lambda: self.status_label.configure(text="Ses hazırlanıyor (OpenAI)..."))
                 # Karakter sesini belirle (Eğer seçilen bir karakter varsa)
                 sub_option = self.sub_option_combo.get()
                 character_voice = self.character_voices.get(sub_option)
@@ -2161,30 +2862,33 @@ class App(ctk.CTk):
                 # Eğer karakter sesi varsa onu kullan, yoksa ayarlardaki sesi kullan
                 selected_voice = character_voice if character_voice else self.tts_voices.get(self.tts_voice_combo.get(), "nova")
                 
-                client = OpenAI(api_key=self.api_key)
-                response = client.audio.speech.create(
-                    model="tts-1",
-                    voice=selected_voice,
-                    input=self.last_topic_response[:2000] # Hız için limit
-                )
                 temp_file = f"temp_topic_tts_{int(time.time())}.mp3"
-                response.stream_to_file(temp_file)
-                self.status_label.configure(text="Ses oynatılıyor...")
+                self.llm.speech_to_file(self.last_topic_response[:2000], selected_voice, temp_file) # Hız için limit
+                if is_cancelled():
+                    return
+                self.ai.ui(lambda: self.status_label.configure(text="Ses oynatılıyor..."))
                 self._play_audio(temp_file)
             except Exception as e:
-                self.status_label.configure(text=f"Ses Hatası: {e}")
+                if is_cancelled():
+                    return
+                err = str(e)
+                self.ai.ui(lambda err=err: self.status_label.configure(text=f"Ses Hatası: {err}"))
                 print(f"Topic TTS Error: {e}")
                 
-        threading.Thread(target=tts_worker, daemon=True).start()
+        self.ai.submit(tts_worker, group="tts", policy=POLICY_DROP)
 
-    def _update_topic_ui(self, topic, user_input, result):
-        if user_input:
-            msg = f"\n[SEN]: {user_input}\n[AI ({topic})]: {result}\n"
+    def _update_topic_ui(self, topic, user_input, result, stream=None):
+        if stream:
+            # Yanıt zaten akışla yazıldı; bölge son yanıtla tamamlanır
+            stream.finish(result, footer="\n")
         else:
-            msg = f"\n--- {topic} HAKKINDA BİR FİKİR/ÖNERİ ---\n{result}\n"
-            
-        self.topic_textbox.insert("end", msg)
-        self.topic_textbox.see("end")
+            if user_input:
+                msg = f"\n[SEN]: {user_input}\n[AI ({topic})]: {result}\n"
+            else:
+                msg = f"\n--- {topic} HAKKINDA BİR FİKİR/ÖNERİ ---\n{result}\n"
+                
+            self.topic_textbox.insert("end", msg)
+            self.topic_textbox.see("end")
         self.status_label.configure(text=f"{topic} sohbeti güncellendi.")
         
         # Eğer RPG Modundaysak ve AI seçenekler sunduysa butonları göster
@@ -2192,7 +2896,7 @@ class App(ctk.CTk):
             self._update_rpg_stats(result)
             self._parse_and_show_rpg_choices(result)
             # Otomatik Görsel Güncelleme (Her mesajda)
-            threading.Thread(target=self.generate_topic_image, args=("RPG Oyunu", result[:200]), daemon=True).start()
+            self.ai.submit(self.generate_topic_image, "RPG Oyunu", result[:200], group="topic_image", policy=POLICY_REPLACE)
     def _update_rpg_stats(self, text):
         """AI yanıtındaki [HP:x] ve [INV:y] etiketlerini parslar ve UI'ı günceller."""
         import re
@@ -2290,18 +2994,24 @@ class App(ctk.CTk):
             history_context += f"Öğrenci: {h['input']}\nSen: {h['output']}\n"
             
         self.start_quiz_btn.configure(state="disabled", text="HAZIRLANIYOR...")
-        threading.Thread(target=self._quiz_logic, args=(topic, history_context), daemon=True).start()
+        self.ai.submit(self._quiz_logic, topic, history_context, group="quiz", policy=POLICY_DROP)
 
     def _quiz_logic(self, topic, context):
         try:
+            # Uzun sohbet geçmişi bütçeye göre kırpılır (en son konuşulanlar korunur)
+            budget = self._prompt_budget("gemini" if self.gemini_api_key else "openai", max_tokens=3000)
+            budget.add("context", context, priority=1, keep="end")
+            context = budget.fit()["context"]
+
             # RAG (Doküman) Entegrasyonu - Quiz için Öncelik
-            if hasattr(self, 'uploaded_notes_contet') and self.uploaded_notes_contet:
+            if getattr(self, 'uploaded_notes_contet', ""):
+                # Sohbet varsa konuşulan bölümler, yoksa notların geneline yayılan bölümler sorulur
                 prompt_content = f"""
                 DİKKAT: Kullanıcı bir ders notu yükledi (aşağıda).
                 Görevin: SADECE bu nottaki bilgilere dayanan 5 soruluk bir sınav hazırlamak.
                 
                 [YÜKLENEN NOTLAR]:
-                {self.uploaded_notes_contet}
+                {self._notes_context(context, k=6)}
                 
                 [TALİMAT]:
                 1. Sorular sadece yukarıdaki metinden çıkmalı.
@@ -2326,20 +3036,17 @@ class App(ctk.CTk):
             ]
             """
             
+            # Her quiz'de farklı sorular istendiği için önbellek kullanılmaz
             if self.gemini_api_key:
-                client = GeminiClient(api_key=self.gemini_api_key)
-                response = client.generate_content(prompt)
-                result = response
+                result = self.llm.chat("gemini", prompt, use_cache=False)
             elif self.api_key:
-                client = OpenAI(api_key=self.api_key)
-                res = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                result = res.choices[0].message.content
+                result = self.llm.chat("openai", prompt, use_cache=False)
             else:
                 self.is_quiz_active = False
-                self.after(0, lambda: messagebox.showwarning("Hata", "API anahtarı eksik."))
+                self.ai.ui(lambda: messagebox.showwarning("Hata", "API anahtarı eksik."))
+                return
+            if is_cancelled():
+                self.is_quiz_active = False
                 return
 
             # JSON temizleme ve yükleme
@@ -2356,16 +3063,18 @@ class App(ctk.CTk):
             if start_idx != -1 and end_idx != -1:
                 clean_result = clean_result[start_idx:end_idx+1]
                 self.current_quiz_questions = json.loads(clean_result)
-                self.after(0, self._show_next_quiz_question)
+                self.ai.ui(self._show_next_quiz_question)
             else:
                 raise ValueError("AI geçerli bir JSON quiz üretmedi.")
                 
         except Exception as e:
             self.is_quiz_active = False
+            if is_cancelled():
+                return # İptal edilen iş (yeni istek, zaman aşımı, kapanış) hata göstermez
             err = str(e)
-            self.after(0, lambda err=err: messagebox.showerror("Quiz Hatası", f"Quiz oluşturulamadı: {err}"))
+            self.ai.ui(lambda err=err: messagebox.showerror("Quiz Hatası", f"Quiz oluşturulamadı: {err}"))
         finally:
-            self.after(0, lambda: self.start_quiz_btn.configure(state="normal", text="📝 QUIZ"))
+            self.ai.ui(lambda: self.start_quiz_btn.configure(state="normal", text="📝 QUIZ"))
 
     def _show_next_quiz_question(self):
         if self.current_quiz_index < len(self.current_quiz_questions):
@@ -2439,10 +3148,15 @@ class App(ctk.CTk):
             for h in self.topic_chat_history:
                 chat_text += f"{h['input']} {h['output']} "
         
-        threading.Thread(target=self._flashcard_logic, args=(topic, chat_text), daemon=True).start()
+        self.ai.submit(self._flashcard_logic, topic, chat_text, group="flashcards", policy=POLICY_DROP)
 
     def _flashcard_logic(self, topic, chat_text):
         try:
+            # Bilgi kartları için birkaç kavram yeterli; metnin başı kısa bir bütçeyle gönderilir
+            budget = self._prompt_budget("gemini" if self.gemini_api_key else "openai", max_tokens=1500)
+            budget.add("chat", chat_text, priority=1)
+            chat_text = budget.fit()["chat"]
+
             prompt = f"""
             GÖREV: Aşağıdaki sohbet metnini veya konu başlığını analiz et ve öğrenci için çalışma kartları (Flashcards) oluştur.
             
@@ -2458,29 +3172,28 @@ class App(ctk.CTk):
             🎴 [TERİM]: [AÇIKLAMA]
             
             Analiz Edilecek Metin:
-            {chat_text[:4000]}
+            {chat_text}
             """
             
+            use_cache = not self.regenerate_var.get()
             if self.gemini_api_key:
-                client = GeminiClient(api_key=self.gemini_api_key)
-                result = client.generate_content(prompt)
+                result = self.llm.chat("gemini", prompt, use_cache=use_cache)
             elif self.api_key:
-                client = OpenAI(api_key=self.api_key)
-                res = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[{"role": "user", "content": prompt}]
-                )
-                result = res.choices[0].message.content
+                result = self.llm.chat("openai", prompt, use_cache=use_cache)
             else:
                 return
+            if is_cancelled():
+                return
 
             self.topic_flashcards = result
-            self.after(0, lambda t=topic, r=result: self._update_flashcard_ui(t, r))
+            self.ai.ui(lambda t=topic, r=result: self._update_flashcard_ui(t, r))
         except Exception as e:
+            if is_cancelled():
+                return # İptal edilen iş (yeni istek, zaman aşımı, kapanış) hata göstermez
             err = str(e)
-            self.after(0, lambda err=err: messagebox.showerror("Hata", f"Kartlar üretilemedi: {err}"))
+            self.ai.ui(lambda err=err: messagebox.showerror("Hata", f"Kartlar üretilemedi: {err}"))
         finally:
-            self.after(0, lambda: self.flashcard_btn.configure(state="normal", text="🎴 KARTLAR"))
+            self.ai.ui(lambda: self.flashcard_btn.configure(state="normal", text="🎴 KARTLAR"))
 
     def _update_flashcard_ui(self, topic, result):
         msg = f"\n✨ {topic} İÇİN ÖZEL BİLGİ KARTLARI ✨\n{result}\n"
@@ -2521,11 +3234,14 @@ class App(ctk.CTk):
             messagebox.showerror("Hata", f"PDF oluşturulamadı: {e}")
 
 
-    def _update_language_ui(self, result):
-        """Dil analizi sonucunu ekrana yazdırır."""
-        self.language_textbox.delete("1.0", "end")
-        self.language_textbox.insert("1.0", result)
-        self.language_textbox.see("1.0")
+    def _update_language_ui(self, result, stream=None):
+        """Dil analizi sonucunu ekrana yazdırır (stream verilirse sonuç zaten akışla yazılmıştır)."""
+        if stream:
+            stream.finish(result, see_start=True)
+        else:
+            self.language_textbox.delete("1.0", "end")
+            self.language_textbox.insert("1.0", result)
+            self.language_textbox.see("1.0")
         self.status_label.configure(text="Dil Koçu geri bildirimini sundu.")
 
     def _get_language_coach_prompt(self, text, lang, level, mode):
@@ -2556,7 +3272,7 @@ class App(ctk.CTk):
             
         # Sadece düzeltmeleri ve önerileri seslendirmek daha mantıklı olabilir 
         # ama şimdilik tümünü gönderelim (OpenAI TTS sınırı 4000 karakter)
-        threading.Thread(target=self._language_tts_worker, daemon=True).start()
+        self.ai.submit(self._language_tts_worker, group="tts", policy=POLICY_DROP)
 
     def _language_tts_worker(self):
         try:
@@ -2566,31 +3282,27 @@ class App(ctk.CTk):
                 voice_id = next((v[1] for v in self.eleven_voices if v[0] == selected_voice_name), None)
                 if voice_id:
                     temp_mp3 = self.eleven_manager.generate_speech(self.language_analysis_result[:1000], voice_id)
-                    if temp_mp3:
+                    if temp_mp3 and not is_cancelled():
                         self._play_audio(temp_mp3)
                     return
 
             # --- STANDART OPENAI TTS ---
             if not self.api_key:
-                self.after(0, lambda: messagebox.showerror("Hata", "OpenAI API anahtarı bulunamadı (TTS için gereklidir)."))
+                self.ai.ui(lambda: messagebox.showerror("Hata", "OpenAI API anahtarı bulunamadı (TTS için gereklidir)."))
                 return
 
-            client = OpenAI(api_key=self.api_key)
             selected_voice = self.tts_voices.get(self.tts_voice_combo.get(), "nova")
 
-            response = client.audio.speech.create(
-                model="tts-1",
-                voice=selected_voice,
-                input=self.language_analysis_result[:4000]
-            )
-            
-            import time
             temp_tts = f"temp_tts_coach_{int(time.time())}.mp3"
-            response.stream_to_file(temp_tts)
+            self.llm.speech_to_file(self.language_analysis_result[:4000], selected_voice, temp_tts)
+            if is_cancelled():
+                return
             self._play_audio(temp_tts)
         except Exception as e:
+            if is_cancelled():
+                return # İptal edilen iş (yeni istek, zaman aşımı, kapanış) hata göstermez
             err = str(e)
-            self.after(0, lambda err=err: messagebox.showerror("TTS Hatası", f"Seslendirme başarısız: {err}"))
+            self.ai.ui(lambda err=err: messagebox.showerror("TTS Hatası", f"Seslendirme başarısız: {err}"))
 
     def ask_coach_ai_question(self):
         """Dil Koçu sekmesinde kullanıcının sorduğu soruyu yanıtlar."""
@@ -2600,7 +3312,7 @@ class App(ctk.CTk):
         if not question: return
             
         self.coach_ask_btn.configure(state="disabled", text="...")
-        threading.Thread(target=self._coach_chat_logic, args=(question, transcript), daemon=True).start()
+        self.ai.submit(self._coach_chat_logic, question, transcript, group="coach_chat", policy=POLICY_DROP)
 
     def _coach_chat_logic(self, question, transcript):
         """Dil Koçu chat isteğini arka planda yürütür."""
@@ -2612,54 +3324,55 @@ class App(ctk.CTk):
             system_msg = f"Sen uzman bir Dil Koçu ve Mentorluk asistanısın. Kullanıcı {lang} öğreniyor ve seviyesi {level}. " \
                          f"Soruları sadece transkripte bağlı kalarak değil, genel dil eğitimi bilginle (kelime listeleri, stratejiler, gramer kuralları) bir mentor gibi cevapla."
             
-            # Sohbet geçmişini derle
-            history_context = ""
-            for q, a in self.coach_chat_history[-5:]: # Son 5 mesajı al
-                history_context += f"Soru: {q}\nCevap: {a}\n"
+            # Gemini veya OpenAI kullan
+            if self.gemini_api_key:
+                provider = "gemini"
+            elif self.api_key:
+                provider = "openai"
+            else:
+                self.ai.ui(lambda: messagebox.showwarning("Hata", "API anahtarı bulunamadı."))
+                return
+
+            # Sohbet geçmişi ve konuşma örneği bütçeye sığdırılır (önce en eski mesajlar atılır)
+            budget = self._prompt_budget(provider)
+            budget.add("system", system_msg, priority=REQUIRED)
+            budget.add("question", question, priority=REQUIRED)
+            budget.add("transcript", transcript, priority=2, keep="end")
+            budget.add_items("history", [f"Soru: {q}\nCevap: {a}\n" for q, a in self.coach_chat_history[-10:]], priority=1)
+            parts = budget.fit()
+            history_context = parts["history"]
 
             prompt = f"Kullanıcı Seviyesi: {level}\nHedef Dil: {lang}\n"
             if transcript:
-                prompt += f"Mevcut Konuşma Örneği: {transcript}\n"
+                prompt += f"Mevcut Konuşma Örneği: {parts['transcript']}\n"
             
             if history_context:
                 prompt += f"\nGeçmiş Konuşma:\n{history_context}"
                 
             prompt += f"\nKullanıcının Yeni Sorusu: {question}"
 
-            # Gemini veya OpenAI kullan
-            if self.gemini_api_key:
-                client = GeminiClient(api_key=self.gemini_api_key)
-                response = client.generate_content(prompt, system_instruction=system_msg)
-                answer = response
-            elif self.api_key:
-                client = OpenAI(api_key=self.api_key)
-                res = client.chat.completions.create(
-                    model="gpt-4o-mini",
-                    messages=[
-                        {"role": "system", "content": system_msg},
-                        {"role": "user", "content": prompt}
-                    ]
-                )
-                answer = res.choices[0].message.content
-            else:
-                self.after(0, lambda: messagebox.showwarning("Hata", "API anahtarı bulunamadı."))
-                return
-
+            stream = TextStreamWriter(self.language_textbox, header=f"\n\n❓ SORU: {question}\n💡 CEVAP: ", ui=self.ai.ui)
+            answer = self._stream_chat(provider, prompt, stream, system_instruction=system_msg)
             self.coach_chat_history.append((question, answer))
-            self.after(0, lambda q=question, a=answer: self._add_coach_chat_to_ui(q, a))
+            self.ai.ui(lambda q=question, a=answer: self._add_coach_chat_to_ui(q, a, stream))
         except Exception as e:
+            if is_cancelled():
+                return # İptal edilen iş (yeni istek, zaman aşımı, kapanış) hata göstermez
             err = str(e)
-            self.after(0, lambda err=err: messagebox.showerror("Koç Chat Hatası", f"Hata: {err}"))
+            self.ai.ui(lambda err=err: messagebox.showerror("Koç Chat Hatası", f"Hata: {err}"))
         finally:
-            self.after(0, lambda: self.coach_ask_btn.configure(state="normal", text="SOR"))
-            self.after(0, lambda: self.coach_chat_entry.delete(0, "end"))
-
-    def _add_coach_chat_to_ui(self, question, answer):
-        """Soruyu ve cevabı dil koçu metin kutusuna ekler."""
-        chat_text = f"\n\n❓ SORU: {question}\n💡 CEVAP: {answer}\n" \
-                    f"{'-'*30}\n"
-        self.language_textbox.insert("end", chat_text)
-        self.language_textbox.see("end")
+            self.ai.ui(lambda: self.coach_ask_btn.configure(state="normal", text="SOR"))
+            self.ai.ui(lambda: self.coach_chat_entry.delete(0, "end"))
+
+    def _add_coach_chat_to_ui(self, question, answer, stream=None):
+        """Soruyu ve cevabı dil koçu metin kutusuna ekler (stream verilirse cevap zaten akışla yazılmıştır)."""
+        if stream:
+            stream.finish(answer, footer=f"\n{'-'*30}\n")
+        else:
+            chat_text = f"\n\n❓ SORU: {question}\n💡 CEVAP: {answer}\n" \
+                        f"{'-'*30}\n"
+            self.language_textbox.insert("end", chat_text)
+            self.language_textbox.see("end")
         self.status_label.configure(text="Dil Koçu sorunu cevapladı.")
 
     def save_coach_pdf(self):
@@ -2689,8 +3402,29 @@ class App(ctk.CTk):
         except Exception as e:
             messagebox.showerror("Hata", f"PDF oluşturulamadı: {e}")
 
-    def _process_analysis_result(self, analysis, safe_text, provider):
-        """AI'dan gelen analiz sonucunu işler ve görselleri üretir."""
+    def _stream_chat(self, provider, prompt, stream, system_instruction=None, model=None, use_cache=True):
+        """LLM yanıtını TextStreamWriter'a akıtarak alır; istek hata verirse yazılan kısım geri alınır."""
+        try:
+            return self.llm.chat(provider, prompt, system_instruction=system_instruction, model=model,
+                                 on_chunk=stream.write, use_cache=use_cache)
+        except Exception:
+            stream.cancel()
+            raise
+
+    def _analysis_stream(self, provider):
+        """Analiz yanıtını Analiz sekmesine akış halinde yazan yazıcıyı oluşturur (ham veri bloğu gösterilmez)."""
+        return TextStreamWriter(self.analysis_textbox, header=f"\n\n[ANALİZ ({provider})]:\n", hide_after="[[DATA_START]]", ui=self.ai.ui)
+
+    def _process_analysis_result(self, analysis, safe_text, provider, stream=None, record_context=None,
+                                 previous_segments=None):
+        """
+        AI'dan gelen analiz sonucunu işler ve görselleri üretir.
+        stream verilirse analiz Analiz sekmesine zaten akışla yazılmıştır; yalnızca temizlenmiş metinle tamamlanır.
+        record_context verilirse (oturum transkripti analizleri) sonuç artımlı analiz durumu olarak saklanır;
+        previous_segments verilirse sonuç artımlı bir güncellemedir ve yeni segmentler bunlara eklenir.
+        """
+        segments = list(previous_segments or [])
+        stats = None
         if AnalyticsGenerator:
             try:
                 analyzer = AnalyticsGenerator()
@@ -2719,15 +3453,16 @@ class App(ctk.CTk):
                 neg_match = re.search(r"NEGATİF:?\s*(?:%)?\s*(\d+)", data_block, re.IGNORECASE)
                 neu_match = re.search(r"NÖTR:?\s*(?:%)?\s*(\d+)", data_block, re.IGNORECASE)
                 
-                # Segmentleri Ayıkla
-                segments = []
+                # Segmentleri Ayıkla (artımlı güncellemede yalnızca yeni segmentler gelir)
                 try:
                     seg_match = re.search(r"SEGMENTS:?\s*(?:```(?:json|python)?)?\s*(\[.*?\])", data_block, re.DOTALL)
                     if seg_match:
                         seg_json = seg_match.group(1).strip()
                         seg_json = seg_json.replace("```json", "").replace("```", "").strip()
-                        segments = json.loads(seg_json)
-                        self.after(0, lambda: self.sentiment_timeline.update_timeline(segments))
+                        segments += json.loads(seg_json)
+                    if segments:
+                        timeline = list(segments)
+                        self.ai.ui(lambda: self.sentiment_timeline.update_timeline(timeline))
                 except Exception as e:
                     print(f"Segment parsing failure: {e}")
 
@@ -2766,12 +3501,20 @@ class App(ctk.CTk):
 
         self.last_analysis = analysis 
         self.analysis_results[provider] = analysis        # Transkript ve Analizi ilgili kutulara yazdır
-        self.after(0, lambda p=provider, a=analysis: self.textbox.insert("end", f"\n\n[ANALİZ ({p})]:\n{a}\n"))
-        self.after(0, lambda p=provider, a=analysis: self.analysis_textbox.insert("end", f"\n\n[ANALİZ ({p})]:\n{a}\n"))
+        self.ai.ui(lambda p=provider, a=analysis: self.textbox.insert("end", f"\n\n[ANALİZ ({p})]:\n{a}\n"))
+        if stream:
+            stream.finish(analysis, footer="\n")
+        else:
+            self.ai.ui(lambda p=provider, a=analysis: self.analysis_textbox.insert("end", f"\n\n[ANALİZ ({p})]:\n{a}\n"))
+        
+        if record_context is not None and not analysis.startswith("[V19]"):
+            provider_key = "OpenAI" if "OpenAI" in provider else "Gemini"
+            self.incremental.record(provider_key, safe_text, analysis, stats, segments, context=record_context,
+                                    incremental=previous_segments is not None)
         
         # Uygulama içi görselleri güncelle
-        self.after(0, self._update_analysis_images)
-        self.animator.stop(f"Analiz {provider} ile tamamlandı.")
+        self.ai.ui(self._update_analysis_images)
+        self.ai.ui(self.animator.stop, f"Analiz {provider} ile tamamlandı.")
 
     def _get_system_prompt(self):
         """Seçilen AI personasına göre sistem talimatını döner."""
@@ -2848,9 +3591,7 @@ class App(ctk.CTk):
             return
         
         # Tüm transkript metnini hazırla
-        combined_transcript = ""
-        for entry in self.all_session_transcripts:
-            combined_transcript += f"[{entry['time']}] {entry['text']}\n\n"
+        combined_transcript = self._format_session_transcripts(separator="\n\n")
         
         # Eğer henüz hiçbir şey kaydedilmemişse son metni kullan
         if not combined_transcript:
@@ -2906,7 +3647,9 @@ class App(ctk.CTk):
             
             # Transkript
             doc.add_heading('Konuşma Dökümü', level=1)
-            doc.add_paragraph(self.last_transcript if self.last_transcript else "Transkript bulunamadı.")
+            # Oturum kayıtları varsa (çift çıktı modunda çevirileriyle birlikte) onları kullan
+            transcript = self._format_session_transcripts(separator="\n\n") or self.last_transcript
+            doc.add_paragraph(transcript if transcript else "Transkript bulunamadı.")
             
             # Analizler
             doc.add_heading('Yapay Zeka Analizleri', level=1)
@@ -2990,6 +3733,8 @@ class App(ctk.CTk):
         
         config.pop("openai_api_key", None)
         config.pop("gemini_api_key", None)
+        self.config_manager.config.pop("openai_api_key", None)
+        self.config_manager.config.pop("gemini_api_key", None)
         
         with open("config.json", "w", encoding="utf-8") as f:
             json.dump(config, f, indent=4)
@@ -2997,6 +3742,7 @@ class App(ctk.CTk):
         self.api_key = openai_key
         self.gemini_api_key = gemini_key
         self.eleven_api_key = eleven_key
+        self.llm.update_keys(openai_key, gemini_key)
         
         if self.eleven_manager:
             self.eleven_manager.update_key(eleven_key)
@@ -3053,6 +3799,8 @@ class App(ctk.CTk):
                     self.eleven_api_entry.insert(0, self.eleven_api_key)
                 if self.eleven_manager:
                     self.eleven_manager.update_key(self.eleven_api_key)
+
+            self.llm.update_keys(self.api_key, self.gemini_api_key)
                         
         except Exception as e:
             print(f"Konfigürasyon yükleme hatası: {e}")
@@ -3060,6 +3808,18 @@ class App(ctk.CTk):
     def on_app_closing(self):
         """Uygulama kapatılırken çalışan temizlik fonksiyonu."""
         self.is_recording = False
+        with self._panel_lock:
+            # Başlatılmakta olan panel kaydı, başlatma thread'inde kapatılır
+            self.panel_starting = False
+        if self.multi_recorder:
+            self.multi_recorder.stop()
+        self.device_registry.stop_monitoring()
+        # Sıradaki işler iptal edilir, çalışan iş bir sonraki pencere sınırında durur;
+        # bekleme Tk thread'ini bloklamaz, geçici dosya temizliği kapanışta tamamlanır
+        self.scheduler.shutdown(timeout=5.0)
+        # Bekleyen yapay zeka işleri iptal edilir, akan yanıtlar bir sonraki parçada durur
+        self.ai.shutdown()
+        self.llm.close()
         self.destroy()
 
 if __name__ == "__main__":
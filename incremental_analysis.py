@@ -0,0 +1,151 @@
+"""
+incremental_analysis.py - Artımlı Oturum Analizi
+Canlı bir oturumda "Analiz Et" her basıldığında tüm transkript yeniden
+gönderilir; oysa son analizden bu yana belki tek bir cümle eklenmiştir. Bu modül
+sağlayıcı başına son analizin durumunu (rapor, duygu skorları, zaman çizelgesi
+segmentleri ve analiz edilen metnin özeti) saklar ve yalnızca yeni eklenen
+transkripti, önceki durumla birlikte LLM'e göndererek raporu güncelletir.
+Böylece tekrar eden analizlerin maliyeti toplam değil, yeni içerikle orantılı olur.
+"""
+
+import hashlib
+import threading
+
+UPDATE_PROMPT = """
+GÖREV: Aşağıda bu oturumun ÖNCEKİ ANALİZ RAPORU ve rapordan sonra transkripte eklenen YENİ segmentler var.
+Raporu yeni segmentleri de kapsayacak şekilde güncelle.
+
+[KRİTİK TALİMATLAR]:
+1. Önceki raporun yapısını (1-6 numaralı başlıklar) koru ve raporun GÜNCEL HALİNİN TAMAMINI yaz (yalnızca farkı değil).
+2. Yeni segmentlerden bahsederken zaman damgalarını KÖŞELİ PARANTEZ içinde belirt.
+3. Yeni segmentler önceki sonuçları değiştiriyorsa (örn. yeni bir karar veya aksiyon maddesi) ilgili bölümü güncelle.
+
+[ÖNCEKİ DUYGU SKORLARI] ({segment_count} segment üzerinden):
+POZİTİF: {pos}
+NEGATİF: {neg}
+NÖTR: {neu}
+
+[ÖNCEKİ ANALİZ RAPORU]:
+{report}
+
+[[DATA_START]]
+(ÖNEMLİ: Bu satırdan sonrasını SADECE veri formatında hazırla. Kullanıcı bu kısmı görmeyecek.)
+
+POZİTİF: [TÜM oturum için güncel sayı]
+NEGATİF: [TÜM oturum için güncel sayı]
+NÖTR: [TÜM oturum için güncel sayı]
+
+(ÖNEMLİ: SEGMENTS listesine SADECE YENİ segmentleri ekle; önceki segmentler zaten kayıtlı. JSON bloğunda çift tırnak (") kullan.)
+SEGMENTS:
+[
+  {{"text": "...", "sentiment": "pos/neg/neu"}},
+  ...
+]
+
+[YENİ TRANSKRİPT SEGMENTLERİ]:
+{delta}
+"""
+
+def _digest(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+class AnalysisState:
+    """Bir sağlayıcının son analiz durumu."""
+    def __init__(self, length, digest, context, report, stats, segments, updates=0):
+        self.length = length # Analiz edilen metnin uzunluğu
+        self.digest = digest # Analiz edilen metnin özeti (transkript değişti mi?)
+        self.context = context # Sistem talimatının özeti (persona değişti mi?)
+        self.report = report # Kullanıcıya gösterilen rapor ([[DATA_START]] bloğu hariç)
+        self.stats = stats # {'pos', 'neg', 'neu'}
+        self.segments = segments # Zaman çizelgesi segmentleri
+        self.updates = updates # Son tam analizden beri yapılan artımlı güncelleme sayısı
+
+class IncrementalAnalyzer:
+    """
+    Sağlayıcı başına analiz durumunu tutar ve bir sonraki analizin tam mı yoksa
+    artımlı mı yapılacağına karar verir.
+    """
+    def __init__(self, max_updates=8):
+        """
+        Args:
+            max_updates (int): Bu kadar artımlı güncellemeden sonra rapor kaymasını önlemek için tam analiz yapılır.
+        """
+        self.max_updates = max_updates
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def reset(self, provider=None):
+        """Bir sağlayıcının (veya tüm sağlayıcıların) durumunu siler."""
+        with self._lock:
+            if provider is None:
+                self._states.clear()
+            else:
+                self._states.pop(provider, None)
+
+    def get_state(self, provider):
+        with self._lock:
+            return self._states.get(provider)
+
+    def delta_for(self, provider, text, context=""):
+        """
+        Önceki analiz metni text'in başlangıcıysa yalnızca yeni eklenen kısmı döner.
+
+        Args:
+            provider (str): "OpenAI" veya "Gemini".
+            text (str): Oturumun güncel transkripti.
+            context (str): Analizin sistem talimatı; persona değiştiyse rapor baştan üretilir.
+
+        Returns:
+            str veya None: Yeni kısım (transkript değişmediyse boş metin); tam analiz gerekiyorsa None.
+        """
+        state = self.get_state(provider)
+        if state is None or state.updates >= self.max_updates:
+            return None
+        if state.context != _digest(context):
+            return None
+        if len(text) < state.length:
+            return None
+        if _digest(text[:state.length]) != state.digest:
+            return None # Oturum temizlendi veya transkript düzenlendi
+        return text[state.length:]
+
+    def build_update_prompt(self, provider, delta):
+        """Önceki durum ve yeni segmentlerden güncelleme istemini oluşturur."""
+        state = self.get_state(provider)
+        stats = state.stats or {"pos": 0, "neg": 0, "neu": 100}
+        return UPDATE_PROMPT.format(
+            segment_count=len(state.segments), pos=stats["pos"], neg=stats["neg"], neu=stats["neu"],
+            report=state.report, delta=delta.strip(),
+        )
+
+    def replay(self, provider):
+        """
+        Transkript değişmediğinde kaydedilen raporu, analiz yanıtıyla aynı biçimde
+        ([[DATA_START]] bloğu ve skorlarla) döner; segmentler previous_segments() ile eklenir.
+        """
+        state = self.get_state(provider)
+        stats = state.stats or {"pos": 0, "neg": 0, "neu": 100}
+        return f"{state.report}\n[[DATA_START]]\nPOZİTİF: {stats['pos']}\nNEGATİF: {stats['neg']}\nNÖTR: {stats['neu']}\nSEGMENTS:\n[]"
+
+    def previous_segments(self, provider):
+        """Artımlı güncellemede yeni segmentlerin ekleneceği önceki segmentleri döner."""
+        state = self.get_state(provider)
+        return list(state.segments) if state else []
+
+    def record(self, provider, text, report, stats, segments, context="", incremental=False):
+        """
+        Bir analizin sonucunu sağlayıcının yeni durumu olarak kaydeder.
+
+        Args:
+            text (str): Analiz edilen (tüm) transkript.
+            report (str): Temizlenmiş rapor metni.
+            stats (dict): Duygu skorları.
+            segments (list): Tüm oturumun zaman çizelgesi segmentleri.
+            context (str): Analizin sistem talimatı.
+            incremental (bool): Sonuç artımlı güncellemeyle mi üretildi.
+        """
+        with self._lock:
+            previous = self._states.get(provider)
+            updates = previous.updates + 1 if (incremental and previous) else 0
+            self._states[provider] = AnalysisState(len(text), _digest(text), _digest(context), report,
+                                                  stats, list(segments), updates)
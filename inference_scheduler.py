@@ -0,0 +1,396 @@
+"""
+inference_scheduler.py - Merkezi Whisper Çıkarım Zamanlayıcısı
+Canlı kayıt, dosya yükleme ve geçmiş kayıtlar aynı Whisper modelini kullanır.
+Bu modül modelin tek sahibidir: işleri öncelik sınıfına göre (canlı >
+etkileşimli dosya > arka plan toplu iş) sıraya koyar, modeli aynı anda yalnızca
+bir işe verir, iptal ve iş başına ilerleme bilgisi sağlar. Uzun bir dosya işi
+30 saniyelik pencere sınırlarında modeli daha yüksek öncelikli işlere bırakır.
+"""
+
+import heapq
+import itertools
+import queue
+import threading
+from contextlib import contextmanager
+
+import whisper
+
+from cpu_resources import get_cpu_manager
+from onnx_encoder import enable_onnx_encoder
+
+# Öncelik sınıfları (küçük sayı = yüksek öncelik)
+LIVE = 0
+INTERACTIVE = 1
+BACKGROUND = 2
+
+PRIORITY_NAMES = {LIVE: "Canlı", INTERACTIVE: "Dosya", BACKGROUND: "Arka Plan"}
+
+WINDOW_SECONDS = 30.0 # Whisper encoder'ının tek seferde işlediği pencere
+
+class JobCancelled(Exception):
+    """İptal edilen bir işin çalışmayı bırakması için fırlatılır."""
+
+class InferenceJob:
+    """
+    Zamanlayıcıya gönderilen tek bir çıkarım işi.
+    İş fonksiyonu fn(model, job) şeklinde çağrılır; uzun işler job.set_progress()
+    ile ilerleme bildirmeli ve job.check_cancelled() ile iptali kontrol etmelidir.
+    """
+    def __init__(self, fn, priority, description="", model_type=None, on_progress=None, on_done=None):
+        self.fn = fn
+        self.priority = priority
+        self.description = description
+        self.model_type = model_type
+        self.on_progress = on_progress
+        self.on_done = on_done
+        self.status = "queued" # queued, running, done, cancelled, failed
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self._cancel_event = threading.Event()
+        self._done_event = threading.Event()
+        self._scheduler = None # İşi çalıştıran zamanlayıcı (pencere sınırında modeli bırakmak için)
+
+    @property
+    def cancelled(self):
+        return self._cancel_event.is_set()
+
+    def cancel(self):
+        """İşi iptal eder. Sırada bekliyorsa hiç çalışmaz; çalışıyorsa ilk kontrol noktasında durur."""
+        self._cancel_event.set()
+
+    def check_cancelled(self):
+        """İş iptal edildiyse JobCancelled fırlatır."""
+        if self._cancel_event.is_set():
+            raise JobCancelled(self.description)
+
+    def set_progress(self, value):
+        """İlerlemeyi (0.0 - 1.0) günceller ve varsa geri çağrıyı tetikler."""
+        self.progress = max(0.0, min(1.0, value))
+        if self.on_progress:
+            self.on_progress(self, self.progress)
+
+    def wait(self, timeout=None):
+        """İş bitene kadar bekler; bittiyse True döner."""
+        return self._done_event.wait(timeout)
+
+    def _finish(self, status):
+        self.status = status
+        self._done_event.set()
+        if self.on_done:
+            try:
+                self.on_done(self)
+            except Exception as e:
+                print(f"İş bitiş geri çağrısı hatası ({self.description}): {e}")
+
+@contextmanager
+def window_checkpoints(model, job, duration=None, start=0.1, end=0.8):
+    """
+    Whisper encoder'ına bir ön-hook kurar; her 30 saniyelik pencerenin başında
+    iptal kontrol edilir ve ilerleme güncellenir. Böylece transcribe() kendi
+    döngüsünü değiştirmeden pencere sınırlarında durdurulabilir. İş zamanlayıcıdan
+    geliyorsa pencere sınırında model daha yüksek öncelikli bekleyenlere bırakılır.
+
+    Args:
+        model: İş süresince yalnızca bu işe ait Whisper modeli.
+        job (InferenceJob): İptal ve ilerleme bilgisinin bağlandığı iş.
+        duration (float): Ses süresi (saniye); verilirse ilerleme hesaplanır.
+        start, end (float): Bu aşamanın toplam ilerlemedeki aralığı.
+    """
+    windows = [0]
+
+    def hook(module, inputs):
+        scheduler = job._scheduler
+        if scheduler is not None:
+            # Model başka bir işe bırakıldığında (araya giren iş, panel kanalı) hook o çağrıları saymaz
+            if not scheduler._owns(job):
+                return
+            job.check_cancelled()
+            scheduler._checkpoint(job)
+        job.check_cancelled()
+        if duration:
+            done = min(1.0, windows[0] * WINDOW_SECONDS / duration)
+            job.set_progress(start + (end - start) * done)
+        windows[0] += 1
+
+    handle = model.encoder.register_forward_pre_hook(hook)
+    try:
+        yield
+    finally:
+        handle.remove()
+
+class _PriorityPoolView:
+    """
+    ModelPool arayüzünü (size, device, acquire) taklit eden görünüm.
+    Akış tabanlı bileşenler (örn. MultiChannelRecorder) paylaşılan modeli bu görünüm üzerinden,
+    belirli bir öncelikle zamanlayıcıdan ödünç alır. Ek kopyalar verilirse bunlar zamanlayıcıyı
+    beklemeden kullanılır ve size eşzamanlı çözümleme sayısını gösterir.
+    """
+    def __init__(self, scheduler, priority, model_type, extra_models=()):
+        self.scheduler = scheduler
+        self.priority = priority
+        self.model_type = model_type
+        self.device = scheduler.device
+        self._free = queue.Queue()
+        # Ek kopyalar önce verilir; paylaşılan model (None) dosya işleriyle yarıştığı için en son
+        for model in extra_models:
+            self._free.put(model)
+        self._free.put(None)
+        self.size = len(extra_models) + 1
+
+    @contextmanager
+    def acquire(self):
+        model = self._free.get()
+        try:
+            if model is None:
+                with self.scheduler.acquire(self.priority, self.model_type) as shared:
+                    yield shared
+            else:
+                yield model
+        finally:
+            self._free.put(model)
+
+class InferenceScheduler:
+    """
+    Whisper modelinin tek sahibi olan öncelikli iş zamanlayıcısı.
+    Öncelik, model serbest kaldığında sıradaki işin seçiminde uygulanır. window_checkpoints
+    kullanan uzun işler ayrıca her pencere sınırında, aynı modeli isteyen daha yüksek
+    öncelikli bir iş veya bekleyen varsa modeli ona bırakır ve ardından kaldığı yerden sürer.
+    """
+    def __init__(self, device="cpu", model_type="medium", use_onnx=False):
+        """
+        Args:
+            device (str): "cpu" veya "cuda".
+            model_type (str): Varsayılan Whisper model boyutu.
+            use_onnx (bool): CPU'da encoder'ı ONNX Runtime ile çalıştır.
+        """
+        self.device = device
+        self.model_type = model_type
+        self.use_onnx = use_onnx
+        self.model = None
+        self.loaded_model_type = None
+        self._copies = [] # Akış bileşenlerinin eşzamanlı çözümleme için kullandığı ek model kopyaları
+        self._copies_type = None
+        self._copies_lock = threading.Lock()
+
+        self._seq = itertools.count()
+        self._jobs = queue.PriorityQueue()
+        self._pending = [] # Bekleyen işler (iptal ve durum sorgusu için)
+        self._pending_lock = threading.Lock()
+
+        # Modelin kullanımını öncelik sırasıyla dağıtan kilit
+        self._cond = threading.Condition()
+        self._waiters = []
+        self._busy = False
+        self._active = None # Modeli işçi thread'inde kullanan iş
+
+        self._running = True
+        self._worker = threading.Thread(target=self._worker_loop, daemon=True)
+        self._worker.start()
+
+    def _load(self, model_type):
+        """İstenen model yüklü değilse yükler (yalnızca model kilidi tutulurken çağrılır)."""
+        model_type = model_type or self.model_type
+        if self.model is None or self.loaded_model_type != model_type:
+            print(f"[*] Whisper modeli yükleniyor: {model_type} ({self.device})")
+            self.model = None
+            self.model = whisper.load_model(model_type, device=self.device)
+            if self.use_onnx and self.device == "cpu":
+                enable_onnx_encoder(self.model, model_type)
+            self.loaded_model_type = model_type
+        return self.model
+
+    def _load_copies(self, model_type, count):
+        """Ek model kopyalarını yükler veya fazlasını bırakır (önceki oturumların kopyaları yeniden kullanılır)."""
+        model_type = model_type or self.model_type
+        with self._copies_lock:
+            if self._copies_type != model_type:
+                self._copies = []
+                self._copies_type = model_type
+            del self._copies[max(0, count):]
+            while len(self._copies) < count:
+                print(f"[*] Ek Whisper kopyası yükleniyor: {model_type} ({len(self._copies) + 1}/{count})")
+                model = whisper.load_model(model_type, device=self.device)
+                if self.use_onnx and self.device == "cpu":
+                    enable_onnx_encoder(model, model_type)
+                self._copies.append(model)
+            return list(self._copies)
+
+    def set_onnx(self, enabled):
+        """ONNX encoder tercihini değiştirir; model bir sonraki kullanımda yeniden yüklenir."""
+        with self._cond:
+            if self.use_onnx != enabled:
+                self.use_onnx = enabled
+                self.loaded_model_type = None
+
+    @contextmanager
+    def acquire(self, priority=LIVE, model_type=None):
+        """
+        Modeli verilen öncelikle ödünç alır; daha yüksek öncelikli bekleyenler önce hizmet alır.
+
+        Yields:
+            Yüklenmiş Whisper modeli.
+        """
+        self._take((priority, next(self._seq), model_type or self.model_type))
+        try:
+            yield self._load(model_type)
+        finally:
+            self._release()
+
+    def _take(self, ticket):
+        """Bilet (öncelik, sıra, model boyutu) sıranın başına gelip model boşalana kadar bekler."""
+        with self._cond:
+            heapq.heappush(self._waiters, ticket)
+            while self._busy or self._waiters[0] != ticket:
+                self._cond.wait()
+            heapq.heappop(self._waiters)
+            self._busy = True
+
+    def _release(self):
+        with self._cond:
+            self._busy = False
+            self._cond.notify_all()
+
+    def _owns(self, job):
+        """Hook'u tetikleyen çağrı işin kendisine mi ait (işçi thread'inde ve araya giren iş yokken)."""
+        return threading.current_thread() is self._worker and self._active is job
+
+    def _next_preempting(self, job, model_type):
+        """Sıradaki iş aynı modeli isteyen daha yüksek öncelikli bir işse onu kuyruktan alır."""
+        with self._jobs.mutex:
+            if not self._running or not self._jobs.queue:
+                return None
+            priority, _, queued = self._jobs.queue[0]
+            if queued is None or priority >= job.priority or (queued.model_type or self.model_type) != model_type:
+                return None
+            heapq.heappop(self._jobs.queue)
+            return queued
+
+    def _checkpoint(self, job):
+        """
+        Pencere sınırında çağrılır. Aynı modeli isteyen daha yüksek öncelikli işler varsa model bırakılır:
+        kuyruktaki işler bu (işçi) thread'inde hemen çalıştırılır, acquire() ile bekleyen akış bileşenleri
+        modeli sırayla kullanır. Ardından iş, aynı öncelikteki diğer bekleyenlerin önünde modeli geri alır.
+        """
+        model_type = job.model_type or self.model_type
+        with self._cond:
+            waiting = bool(self._waiters) and self._waiters[0][0] < job.priority and self._waiters[0][2] == model_type
+        queued = self._next_preempting(job, model_type)
+        if not waiting and queued is None:
+            return
+        print(f"[*] {job.description} daha yüksek öncelikli işe yer açmak için duraklatıldı.")
+        self._release()
+        try:
+            while queued is not None:
+                self._run(queued)
+                queued = self._next_preempting(job, model_type)
+        finally:
+            self._take((job.priority, -1, model_type))
+
+    def pool_view(self, priority=LIVE, model_type=None, copies=1):
+        """
+        ModelPool yerine kullanılabilecek, önceliği sabit bir görünüm döner.
+
+        Args:
+            copies (int): Eşzamanlı çözümleme sayısı. 1 ise yalnızca paylaşılan model kullanılır ve
+                segmentler sırayla çözülür; fazlası için copies - 1 ek model yüklenir (her biri ayrı bellek).
+        """
+        extra = self._load_copies(model_type, copies - 1) if copies > 1 else []
+        return _PriorityPoolView(self, priority, model_type, extra)
+
+    def submit(self, fn, priority=INTERACTIVE, description="", model_type=None, on_progress=None, on_done=None):
+        """
+        Bir işi kuyruğa ekler.
+
+        Args:
+            fn (callable): fn(model, job) imzalı iş fonksiyonu.
+            priority (int): LIVE, INTERACTIVE veya BACKGROUND.
+            description (str): Durum çubuğunda gösterilecek açıklama.
+            model_type (str): Gerekli Whisper model boyutu.
+            on_progress (callable): on_progress(job, ilerleme) geri çağrısı.
+            on_done (callable): on_done(job) geri çağrısı (başarı, iptal veya hata).
+
+        Returns:
+            InferenceJob: İptal ve ilerleme takibi için iş nesnesi.
+        """
+        job = InferenceJob(fn, priority, description, model_type, on_progress, on_done)
+        job._scheduler = self
+        with self._pending_lock:
+            self._pending.append(job)
+        self._jobs.put((priority, next(self._seq), job))
+        return job
+
+    def pending_jobs(self):
+        """Sırada bekleyen veya çalışan işlerin listesini döner."""
+        with self._pending_lock:
+            return list(self._pending)
+
+    def cancel_all(self, priority=None):
+        """Tüm işleri (veya yalnızca verilen öncelik sınıfındakileri) iptal eder."""
+        for job in self.pending_jobs():
+            if priority is None or job.priority == priority:
+                job.cancel()
+
+    def shutdown(self, timeout=5.0):
+        """
+        Bekleyen işleri iptal eder ve işçi döngüsünü durdurur.
+        Çalışan iş bir sonraki pencere sınırında durur. Çağıran (Tk ana thread'i) beklemez:
+        işçi, daemon olmayan ayrı bir thread'de en fazla timeout saniye beklenir; böylece süreç
+        kapanırken iptal edilen işlerin on_done temizliği (geçici dosyalar) tamamlanabilir.
+
+        Returns:
+            threading.Thread: Bekleme thread'i (gerekirse join edilebilir).
+        """
+        self._running = False
+        self.cancel_all()
+        self._jobs.put((-1, next(self._seq), None))
+        waiter = threading.Thread(target=self._worker.join, args=(timeout,), name="scheduler-shutdown")
+        waiter.start()
+        return waiter
+
+    def _worker_loop(self):
+        # Tek çıkarım işçisi: ayrılmış çekirdekler dışındaki fiziksel çekirdekleri kullanır
+        get_cpu_manager().configure_worker(0, 1)
+        while self._running:
+            _, _, job = self._jobs.get()
+            if job is None:
+                break
+            self._run(job)
+
+        # Kapanışta sırada kalan işler çalıştırılmadan kapatılır (on_done temizliği yine çalışır)
+        while not self._jobs.empty():
+            _, _, job = self._jobs.get_nowait()
+            if job is not None:
+                self._forget(job)
+                job._finish("cancelled")
+
+    def _forget(self, job):
+        """İşi bekleyenler listesinden çıkarır."""
+        with self._pending_lock:
+            if job in self._pending:
+                self._pending.remove(job)
+
+    def _run(self, job):
+        """Tek bir işi model kilidiyle çalıştırır ve sonucunu işe yazar."""
+        try:
+            if job.cancelled:
+                raise JobCancelled(job.description)
+            with self.acquire(job.priority, job.model_type) as model:
+                # Pencere sınırında araya giren iş bittiğinde önceki iş modeli geri alır
+                previous, self._active = self._active, job
+                try:
+                    job.status = "running"
+                    job.check_cancelled()
+                    job.result = job.fn(model, job)
+                finally:
+                    self._active = previous
+            status = "done"
+        except JobCancelled:
+            status = "cancelled"
+        except Exception as e:
+            job.error = e
+            print(f"Çıkarım işi hatası ({job.description}): {e}")
+            status = "failed"
+        finally:
+            self._forget(job)
+        job._finish(status)
@@ -0,0 +1,108 @@
+"""
+language_detector.py - Oturum Bazlı Dil Algılama Modülü
+"Otomatik Algıla" modunda Whisper her kısa blokta ayrı bir dil algılama
+geçişi yapar ve kısa bloklarda diller arasında gidip gelebilir. Bu modül dili
+oturumun ilk saniyelerinden bir kez belirler, güven yeterliyse kilitler ve
+yalnızca çözümleme güveni düştüğünde yeniden kontrol eder.
+"""
+
+import threading
+
+import numpy as np
+import whisper
+
+SAMPLE_RATE = 16000
+
+class SessionLanguageDetector:
+    """
+    Oturum boyunca sabit kalan (yapışkan) dil kararı veren yardımcı sınıf.
+    """
+    def __init__(self, warmup_seconds=6.0, min_confidence=0.7, recheck_logprob=-1.0, recheck_patience=2):
+        """
+        Args:
+            warmup_seconds (float): Karar için biriktirilecek en fazla ses süresi.
+            min_confidence (float): Dili kilitlemek için gereken olasılık.
+            recheck_logprob (float): Segment ortalama log-olasılığı bunun altına düşerse güven düşük sayılır.
+            recheck_patience (int): Kaç ardışık düşük güvenli bloktan sonra dilin yeniden algılanacağı.
+        """
+        self.warmup_samples = int(warmup_seconds * SAMPLE_RATE)
+        self.min_confidence = min_confidence
+        self.recheck_logprob = recheck_logprob
+        self.recheck_patience = recheck_patience
+        # Aynı dedektör birden fazla işçi thread'inden çağrılabilir
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Kilidi ve biriken sesi temizler (yeni oturum veya dil ayarı değişince)."""
+        with self._lock:
+            self._clear()
+
+    def _clear(self):
+        self.language = None
+        self.confidence = 0.0
+        self.locked = False
+        self._warmup = np.zeros(0, dtype=np.float32)
+        self._low_confidence_count = 0
+
+    def language_for(self, model, audio):
+        """
+        Bir ses bloğu için kullanılacak dili döner.
+        Kilitliyse ek hesaplama yapmaz; değilse biriken ses üzerinde tek bir
+        algılama geçişi yapar ve en olası dili döner (Whisper'ın kendi
+        algılamasını tekrar çalıştırmaması için).
+
+        Args:
+            model: Yüklenmiş Whisper modeli.
+            audio (np.ndarray): 16 kHz mono float32 ses.
+
+        Returns:
+            str: Whisper dil kodu (örn. "tr").
+        """
+        with self._lock:
+            return self._detect(model, audio)
+
+    def _detect(self, model, audio):
+        if self.locked:
+            return self.language
+
+        # Karar oturumun ilk saniyelerinden verilir: tampon baştan doldurulur, taşan kısım alınmaz
+        room = self.warmup_samples - len(self._warmup)
+        if room > 0:
+            self._warmup = np.concatenate([self._warmup, audio[:room].astype(np.float32)])
+        mel = whisper.log_mel_spectrogram(whisper.pad_or_trim(self._warmup), model.dims.n_mels)
+        mel = mel.to(model.device, dtype=next(model.parameters()).dtype)
+        _, probs = model.detect_language(mel)
+        self.language = max(probs, key=probs.get)
+        self.confidence = float(probs[self.language])
+
+        if self.confidence >= self.min_confidence or len(self._warmup) >= self.warmup_samples:
+            self.locked = True
+            self._low_confidence_count = 0
+            print(f"[*] Oturum dili kilitlendi: {self.language} (%{int(self.confidence * 100)})")
+        return self.language
+
+    def observe(self, result):
+        """
+        Çözümleme sonucunu inceler; güven art arda düşükse kilidi açar.
+
+        Args:
+            result (dict): model.transcribe() çıktısı.
+        """
+        with self._lock:
+            self._observe(result)
+
+    def _observe(self, result):
+        if not self.locked:
+            return
+        segments = [s for s in result.get("segments", []) if s.get("text", "").strip()]
+        if not segments:
+            return
+        avg_logprob = sum(s["avg_logprob"] for s in segments) / len(segments)
+        if avg_logprob < self.recheck_logprob:
+            self._low_confidence_count += 1
+            if self._low_confidence_count >= self.recheck_patience:
+                print(f"[*] Çözümleme güveni düştü ({avg_logprob:.2f}), dil yeniden algılanacak.")
+                self._clear()
+        else:
+            self._low_confidence_count = 0
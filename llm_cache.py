@@ -0,0 +1,123 @@
+"""
+llm_cache.py - LLM Yanıtları İçin Kalıcı Önbellek
+Aynı oturum transkriptinin tekrar analiz edilmesi veya değişmeyen bir sohbet
+için bilgi kartlarının yeniden üretilmesi API'ye birebir aynı istemi gönderir.
+Bu modül yanıtları (sağlayıcı, model, sistem talimatı, istem özeti,
+parametreler) parmak izine göre diskte saklar; süre aşımı (TTL) ve boyut
+sınırıyla en uzun süredir kullanılmayan kayıtları siler.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+DEFAULT_CACHE_DIR = os.path.join("cache", "llm")
+
+def fingerprint(provider, model, system_instruction, prompt, params=None):
+    """İsteği benzersiz tanımlayan SHA-256 parmak izini döner."""
+    prompt_hash = hashlib.sha256((prompt or "").encode("utf-8")).hexdigest()
+    payload = json.dumps({
+        "provider": provider,
+        "model": model,
+        "system": system_instruction or "",
+        "prompt": prompt_hash,
+        "params": params or {},
+    }, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+class LLMResponseCache:
+    """
+    Her yanıtı ayrı bir JSON dosyasında tutan disk önbelleği.
+    Dosyanın değişiklik zamanı son kullanım zamanı olarak güncellenir; sınır aşıldığında
+    en eski kullanılan kayıtlar silinir (LRU).
+    """
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, ttl_hours=168, max_entries=500, max_mb=20):
+        """
+        Args:
+            cache_dir (str): Önbellek klasörü.
+            ttl_hours (float): Kaydın geçerlilik süresi (saat).
+            max_entries (int): En fazla kayıt sayısı.
+            max_mb (float): Önbelleğin en fazla disk boyutu (MB).
+        """
+        self.cache_dir = cache_dir
+        self.ttl = ttl_hours * 3600
+        self.max_entries = max_entries
+        self.max_bytes = int(max_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, f"{key}.json")
+
+    def get(self, key):
+        """Geçerli bir kayıt varsa yanıt metnini, yoksa None döner."""
+        path = self._path(key)
+        with self._lock:
+            try:
+                with open(path, "r", encoding="utf-8") as f:
+                    entry = json.load(f)
+            except (OSError, ValueError):
+                return None
+            if time.time() - entry.get("created", 0) > self.ttl:
+                self._remove(path)
+                return None
+            try:
+                os.utime(path, None) # Son kullanım zamanı (LRU)
+            except OSError:
+                pass
+        return entry.get("response")
+
+    def put(self, key, response, provider="", model=""):
+        """Yanıtı önbelleğe yazar ve gerekirse eski kayıtları siler."""
+        entry = {"created": time.time(), "provider": provider, "model": model, "response": response}
+        with self._lock:
+            try:
+                os.makedirs(self.cache_dir, exist_ok=True)
+                tmp_path = self._path(key) + ".tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(entry, f, ensure_ascii=False)
+                os.replace(tmp_path, self._path(key))
+            except OSError as e:
+                print(f"LLM önbelleği yazılamadı: {e}")
+                return
+            self._evict()
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+    def _evict(self):
+        """Süresi dolmuş kayıtları ve sınırı aşan en eski kullanılmış kayıtları siler."""
+        now = time.time()
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".json"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            # Kayıt en az TTL kadar önce yazılmıştır; kullanılmadan TTL geçtiyse kesinlikle geçersizdir
+            if now - stat.st_mtime > self.ttl:
+                self._remove(path)
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        entries.sort() # En eski kullanılan başta
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop(0)
+            total -= size
+            self._remove(path)
+
+    def clear(self):
+        """Tüm önbelleği siler."""
+        with self._lock:
+            if not os.path.isdir(self.cache_dir):
+                return
+            for name in os.listdir(self.cache_dir):
+                self._remove(os.path.join(self.cache_dir, name))
@@ -0,0 +1,303 @@
+"""
+llm_provider.py - Ortak LLM Sağlayıcı Katmanı
+Arayüzdeki tüm yapay zeka özellikleri (analiz, sohbet, quiz, bilgi kartları,
+dil koçu, görsel üretimi ve TTS) OpenAI ve Gemini'ye bu katman üzerinden
+erişir. İstemciler her tıklamada yeniden oluşturulmaz: uzun ömürlü istemciler
+ve keep-alive bağlantı havuzu sayesinde TLS el sıkışması ve istemci kurulumu
+yalnızca ilk istekte (veya anahtar değiştiğinde) yapılır. Aynı isteklerin
+yanıtları llm_cache ile diskten karşılanır; her isteğin token kullanımı ve
+tahmini maliyeti token_budget.UsageTracker ile kaydedilir.
+"""
+
+import threading
+
+import httpx
+import requests
+from openai import OpenAI
+
+from ai_runtime import is_cancelled, spawn
+from config_manager import ConfigManager
+from gemini_client import DEFAULT_MODEL as GEMINI_DEFAULT_MODEL, GeminiClient, GenerationCancelled
+from llm_cache import LLMResponseCache, fingerprint
+from token_budget import UsageTracker, count_tokens
+
+# OpenAI bağlantı havuzu ayarları
+OPENAI_TIMEOUT = httpx.Timeout(120.0, connect=10.0)
+OPENAI_LIMITS = httpx.Limits(max_connections=10, max_keepalive_connections=5, keepalive_expiry=120.0)
+
+# Sağlayıcı başına varsayılan sohbet modelleri
+DEFAULT_CHAT_MODELS = {"openai": "gpt-4o-mini", "gemini": GEMINI_DEFAULT_MODEL}
+
+# Çift sağlayıcı (fan-out) modları
+FANOUT_FIRST = "first" # İlk başarılı yanıt kazanır, diğeri iptal edilir
+FANOUT_MERGE = "merge" # İki yanıt da beklenir
+
+class LLMProvider:
+    """
+    OpenAI ve Gemini istemcilerinin tek sahibi.
+    Anahtarlar update_keys() ile verilir; istemciler ilk kullanımda oluşturulur ve
+    anahtar değişene kadar tüm thread'ler tarafından paylaşılır.
+    Önbellek ayarları config.json'dan okunur:
+        llm_cache_enabled: Yanıt önbelleğini kullan
+        llm_cache_ttl_hours: Kaydın geçerlilik süresi
+        llm_cache_max_mb: Önbelleğin en fazla disk boyutu
+    """
+    def __init__(self, config_manager=None, openai_key="", gemini_key=""):
+        self.config_manager = config_manager or ConfigManager()
+        self.cache = LLMResponseCache(
+            ttl_hours=self._setting("llm_cache_ttl_hours", 168),
+            max_mb=self._setting("llm_cache_max_mb", 20),
+        )
+        self._lock = threading.Lock()
+        self.openai_key = ""
+        self.gemini_key = ""
+        self._openai = None
+        self._http_client = None
+        self._gemini = None
+        self.usage = UsageTracker()
+        # Görsel indirme gibi düz HTTP istekleri için keep-alive oturumu
+        self.http = requests.Session()
+        self.update_keys(openai_key, gemini_key)
+
+    def _setting(self, key, default):
+        value = self.config_manager.get(key)
+        return default if value is None else value
+
+    def update_keys(self, openai_key=None, gemini_key=None):
+        """Anahtarları günceller; değişen sağlayıcının istemcisi bir sonraki istekte yeniden kurulur."""
+        with self._lock:
+            if openai_key is not None and openai_key != self.openai_key:
+                self.openai_key = openai_key
+                self._close_openai()
+            if gemini_key is not None and gemini_key != self.gemini_key:
+                self.gemini_key = gemini_key
+                self._gemini = None
+
+    def _close_openai(self):
+        if self._http_client is not None:
+            self._http_client.close()
+        self._openai = None
+        self._http_client = None
+
+    def openai(self):
+        """Paylaşılan OpenAI istemcisini döner."""
+        with self._lock:
+            if not self.openai_key:
+                raise ValueError("OpenAI API anahtarı bulunamadı.")
+            if self._openai is None:
+                self._http_client = httpx.Client(timeout=OPENAI_TIMEOUT, limits=OPENAI_LIMITS)
+                self._openai = OpenAI(api_key=self.openai_key, http_client=self._http_client)
+            return self._openai
+
+    def gemini(self):
+        """Paylaşılan GeminiClient örneğini döner (genai.configure yalnızca bir kez çalışır)."""
+        with self._lock:
+            if not self.gemini_key:
+                raise ValueError("Gemini API anahtarı bulunamadı.")
+            if self._gemini is None:
+                self._gemini = GeminiClient(api_key=self.gemini_key)
+            return self._gemini
+
+    def chat(self, provider, prompt, system_instruction=None, model=None, on_chunk=None, use_cache=True):
+        """
+        Tek turluk metin isteği gönderir.
+
+        Args:
+            provider (str): "openai" veya "gemini".
+            prompt (str): Kullanıcı istemi.
+            system_instruction (str): Sistem talimatı (opsiyonel).
+            model (str): OpenAI model adı (None = varsayılan). Gemini kendi yedek zincirini kullanır.
+            on_chunk (callable): Verilirse yanıt akış halinde alınır ve her parça için on_chunk(metin) çağrılır.
+            use_cache (bool): False ise önbellek atlanır ("yeniden üret"); yeni yanıt yine önbelleğe yazılır.
+
+        Returns:
+            str: Model yanıtı (Gemini hataları "[V19]" ile başlayan metin olarak döner).
+        """
+        model = model or DEFAULT_CHAT_MODELS[provider]
+        if is_cancelled():
+            raise GenerationCancelled(provider)
+        if on_chunk is not None:
+            # İş iptal edilirse (zaman aşımı, kapanış) akış bir sonraki parçada durur
+            stream_chunk = on_chunk
+            def on_chunk(text):
+                if is_cancelled():
+                    raise GenerationCancelled(provider)
+                stream_chunk(text)
+        caching = bool(self._setting("llm_cache_enabled", True))
+        key = fingerprint(provider, model, system_instruction, prompt)
+        if caching and use_cache:
+            cached = self.cache.get(key)
+            if cached is not None:
+                print(f"[*] LLM yanıtı önbellekten alındı ({provider}/{model})")
+                self.usage.record(provider, model, 0, 0, cached=True)
+                if on_chunk:
+                    on_chunk(cached)
+                return cached
+
+        response, usage = self._request(provider, prompt, system_instruction, model, on_chunk)
+        self._record_usage(provider, model, prompt, system_instruction, response, usage)
+        # Hata metinleri ve boş yanıtlar önbelleğe alınmaz
+        if caching and response and not response.startswith("[V19]"):
+            self.cache.put(key, response, provider, model)
+        return response
+
+    def _record_usage(self, provider, model, prompt, system_instruction, response, usage):
+        """İsteğin token kullanımını kaydeder; API kullanım bilgisi vermediyse yerel tokenizer ile sayılır."""
+        if response and response.startswith("[V19]"):
+            return
+        if provider == "gemini":
+            model = self.gemini().model_name # Yedek modele geçildiyse yanıtı veren model
+        if usage is not None:
+            self.usage.record(provider, model, usage.prompt_tokens, usage.completion_tokens)
+        else:
+            prompt_tokens = count_tokens(prompt, model) + count_tokens(system_instruction, model)
+            self.usage.record(provider, model, prompt_tokens, count_tokens(response, model), estimated=True)
+
+    def _request(self, provider, prompt, system_instruction, model, on_chunk):
+        """
+        Sağlayıcıya önbelleksiz istek gönderir.
+
+        Returns:
+            tuple: (yanıt metni, OpenAI kullanım bilgisi veya None)
+        """
+        if provider == "gemini":
+            text = self.gemini().generate_content(prompt, system_instruction=system_instruction, on_chunk=on_chunk)
+            return text, None
+
+        messages = []
+        if system_instruction:
+            messages.append({"role": "system", "content": system_instruction})
+        messages.append({"role": "user", "content": prompt})
+        response = self.openai().chat.completions.create(
+            model=model,
+            messages=messages,
+            stream=on_chunk is not None,
+            # Akışta kullanım bilgisi son parçada gelir
+            **({"stream_options": {"include_usage": True}} if on_chunk is not None else {})
+        )
+        if on_chunk is None:
+            return response.choices[0].message.content, response.usage
+
+        parts = []
+        usage = None
+        try:
+            for chunk in response:
+                if getattr(chunk, "usage", None):
+                    usage = chunk.usage
+                if not chunk.choices:
+                    continue
+                text = chunk.choices[0].delta.content
+                if text:
+                    parts.append(text)
+                    on_chunk(text)
+        finally:
+            # İptal edilen akışın bağlantısı havuza hemen geri verilir
+            response.close()
+        return "".join(parts), usage
+
+    def fan_out(self, prompt, system_instruction=None, providers=("gemini", "openai"), mode=FANOUT_FIRST,
+                models=None, on_chunk=None, use_cache=True):
+        """
+        Aynı istemi birden fazla sağlayıcıya eşzamanlı gönderir.
+
+        Args:
+            providers (tuple): Yarışacak sağlayıcılar.
+            mode (str): FANOUT_FIRST (ilk başarılı yanıt kazanır, diğerleri bir sonraki parçada iptal edilir)
+                veya FANOUT_MERGE (tüm yanıtlar beklenir).
+            models (dict): Sağlayıcıya özel model adları.
+            on_chunk (callable): on_chunk(sağlayıcı, metin) akış geri çağrısı.
+
+        Returns:
+            FANOUT_FIRST: (sağlayıcı, yanıt). FANOUT_MERGE: {sağlayıcı: yanıt veya None}.
+
+        Raises:
+            RuntimeError: Hiçbir sağlayıcı başarılı yanıt vermediyse.
+        """
+        models = models or {}
+        cancel = threading.Event()
+        done = threading.Condition()
+        results = {}
+        errors = {}
+        winner = [] # İlk başarılı sağlayıcı (zaman sırasına göre)
+
+        def run(provider):
+            if cancel.is_set():
+                # Kazanan belli olduktan sonra sıradan çıkan dal istek göndermez
+                with done:
+                    results[provider] = None
+                    done.notify_all()
+                return
+
+            def chunk(text):
+                if cancel.is_set():
+                    raise GenerationCancelled(provider)
+                if on_chunk:
+                    on_chunk(provider, text)
+            try:
+                text = self.chat(provider, prompt, system_instruction=system_instruction, model=models.get(provider),
+                                 on_chunk=chunk, use_cache=use_cache)
+                if not text or text.startswith("[V19]"):
+                    raise RuntimeError(text or "Boş yanıt")
+                result = text
+            except GenerationCancelled:
+                result = None
+            except Exception as e:
+                errors[provider] = e
+                print(f"[Fan-out] {provider} başarısız: {e}")
+                result = None
+            with done:
+                results[provider] = result
+                if result and not winner:
+                    winner.append(provider)
+                done.notify_all()
+
+        for provider in providers:
+            # Dallar AIRuntime havuzunda sınırlı sayıda çalışır ve çağıran işin iptal belirtecini taşır
+            spawn(run, provider)
+
+        with done:
+            if mode == FANOUT_FIRST:
+                done.wait_for(lambda: winner or len(results) == len(providers))
+                cancel.set()
+                if not winner:
+                    raise RuntimeError(f"Tüm sağlayıcılar başarısız oldu: {errors}")
+                print(f"[Fan-out] İlk yanıt: {winner[0]}")
+                return winner[0], results[winner[0]]
+
+            done.wait_for(lambda: len(results) == len(providers))
+            if not any(results.values()):
+                raise RuntimeError(f"Tüm sağlayıcılar başarısız oldu: {errors}")
+            return dict(results)
+
+    def speech_to_file(self, text, voice, path, model="tts-1"):
+        """OpenAI TTS ile metni seslendirir ve path'e yazar."""
+        response = self.openai().audio.speech.create(model=model, voice=voice, input=text)
+        response.stream_to_file(path)
+        return path
+
+    def generate_image(self, prompt, size="1792x1024", quality="standard", model="dall-e-3"):
+        """DALL-E ile görsel üretir ve görselin baytlarını döner."""
+        response = self.openai().images.generate(model=model, prompt=prompt, size=size, quality=quality, n=1)
+        download = self.http.get(response.data[0].url, timeout=60)
+        download.raise_for_status()
+        return download.content
+
+    def close(self):
+        """Açık bağlantıları kapatır (uygulama kapanırken)."""
+        with self._lock:
+            self._close_openai()
+        self.http.close()
+
+_provider = None
+_provider_lock = threading.Lock()
+
+def get_provider(config_manager=None):
+    """
+    Uygulama genelinde tek LLMProvider örneğini döner.
+    İlk çağrıda verilen ConfigManager kullanılır (arayüz ile aynı ayar nesnesini paylaşmak için).
+    """
+    global _provider
+    with _provider_lock:
+        if _provider is None:
+            _provider = LLMProvider(config_manager)
+        return _provider
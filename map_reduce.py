@@ -0,0 +1,132 @@
+"""
+map_reduce.py - Uzun Transkriptler İçin Hiyerarşik (Map-Reduce) Analiz
+İki saatlik bir dersin tüm transkripti tek bir isteme sığmaz ve çok pahalıdır.
+Bu modül transkripti satır sınırlarından bölümlere ayırır, her bölümü sınırlı
+sayıda paralel istekle (AIRuntime alt işleri) özetler (map) ve zaman damgalı bölüm özetlerini son
+analiz istemine girdi olarak verir (reduce). Bölüm özetleri önbelleklenir;
+oturuma yeni ses eklendiğinde yalnızca değişen son bölüm ve yeni bölümler
+özetlenir.
+"""
+
+import hashlib
+import threading
+
+from ai_runtime import spawn
+
+CHUNK_SUMMARY_SYSTEM = "Sen uzun ders ve toplantı kayıtlarını bölüm bölüm özetleyen titiz bir asistansın. Yalnızca metinde geçen bilgileri kullan."
+
+CHUNK_SUMMARY_PROMPT = """
+GÖREV: Aşağıdaki transkript bölümünü ({index}. bölüm) daha sonra tüm kaydın analizinde kullanılmak üzere özetle.
+
+[KURALLAR]:
+1. Ana konuları, önemli kavramları, argümanları, kararları ve aksiyon maddelerini madde madde yaz.
+2. Her maddenin başına ilgili segmentin zaman damgasını KÖŞELİ PARANTEZ içinde yaz (Örn: [12:45:00]).
+3. Bölümün genel duygu tonunu tek cümleyle belirt.
+4. Bölümün duygu akışını temsil eden 3-6 kısa alıntı seç ve her birinin duygusunu (pos/neg/neu) yaz. Format: "ALINTI: [zaman] metin => pos"
+5. En fazla 250 kelime kullan, yorum ekleme.
+
+[TRANSKRİPT BÖLÜMÜ]:
+{chunk}
+"""
+
+def split_into_chunks(text, max_chars=12000):
+    """
+    Metni satır sınırlarından en fazla max_chars uzunluğunda bölümlere ayırır.
+    Bölümleme baştan ve açgözlü yapılır: metnin sonuna ekleme yapıldığında önceki
+    bölümler aynı kalır (yalnızca son bölüm büyür veya yeni bölüm açılır).
+    """
+    chunks = []
+    current = []
+    size = 0
+    for line in text.splitlines():
+        # Tek başına sınırı aşan satır kendi içinde bölünür
+        while len(line) > max_chars:
+            if current:
+                chunks.append("\n".join(current))
+                current, size = [], 0
+            chunks.append(line[:max_chars])
+            line = line[max_chars:]
+        if size + len(line) + 1 > max_chars and current:
+            chunks.append("\n".join(current))
+            current, size = [], 0
+        current.append(line)
+        size += len(line) + 1
+    if current and any(l.strip() for l in current):
+        chunks.append("\n".join(current))
+    return chunks
+
+class TranscriptMapReduce:
+    """
+    Uzun transkriptleri bölüm özetlerine indirgeyen map aşaması.
+    Özetler (sağlayıcı, bölüm metni) özetine göre bellekte tutulur; aynı istemler
+    ayrıca LLMProvider'ın disk önbelleğinden de karşılanır.
+    """
+    def __init__(self, llm, chunk_chars=12000, threshold_chars=24000):
+        """
+        Args:
+            llm: LLMProvider örneği.
+            chunk_chars (int): Bir bölümün en fazla karakter sayısı.
+            threshold_chars (int): Bu uzunluğun altındaki metinler doğrudan analiz edilir.
+        """
+        self.llm = llm
+        self.chunk_chars = chunk_chars
+        self.threshold_chars = threshold_chars
+        self._summaries = {}
+        self._lock = threading.Lock()
+
+    def needs_map_reduce(self, text):
+        """Metin tek istemde analiz edilemeyecek kadar uzunsa True döner."""
+        return len(text) > self.threshold_chars
+
+    @staticmethod
+    def _key(provider, chunk):
+        return provider, hashlib.sha256(chunk.encode("utf-8")).hexdigest()
+
+    def _summarize(self, provider, chunk, index):
+        key = self._key(provider, chunk)
+        with self._lock:
+            if key in self._summaries:
+                return self._summaries[key]
+        # Toplam bölüm sayısı isteme yazılmaz: yeni bölüm eklenince eski bölümlerin istemi (ve disk önbelleği) değişmesin
+        prompt = CHUNK_SUMMARY_PROMPT.format(index=index, chunk=chunk)
+        summary = self.llm.chat(provider, prompt, system_instruction=CHUNK_SUMMARY_SYSTEM)
+        if not summary or summary.startswith("[V19]"):
+            raise RuntimeError(f"Bölüm {index} özetlenemedi: {summary}")
+        with self._lock:
+            self._summaries[key] = summary
+        return summary
+
+    def summarize(self, text, provider, progress=None):
+        """
+        Metni bölümlere ayırır ve bölümleri paralel olarak özetler.
+
+        Args:
+            text (str): Zaman damgalı transkript.
+            provider (str): Özet için kullanılacak sağlayıcı ("gemini" veya "openai").
+            progress (callable): progress(tamamlanan, toplam) geri çağrısı.
+
+        Returns:
+            str: Bölüm başlıklarıyla birleştirilmiş özetler.
+        """
+        chunks = split_into_chunks(text, self.chunk_chars)
+        total = len(chunks)
+        with self._lock:
+            cached = sum(1 for c in chunks if self._key(provider, c) in self._summaries)
+        print(f"[*] Map-reduce: {total} bölüm ({cached} tanesi önbellekte), sağlayıcı: {provider}")
+
+        completed = [0]
+        progress_lock = threading.Lock()
+
+        def work(index):
+            summary = self._summarize(provider, chunks[index], index + 1)
+            with progress_lock:
+                completed[0] += 1
+                if progress:
+                    progress(completed[0], total)
+            return summary
+
+        # Bölümler AIRuntime'ın dal semaforuyla sınırlı paralellikte çalışır ve işin iptal belirtecini taşır
+        futures = [spawn(work, i) for i in range(total)]
+        summaries = [future.result() for future in futures]
+
+        return "\n\n".join(f"[BÖLÜM {i + 1}/{total} ÖZETİ]\n{s}" for i, s in enumerate(summaries))
@@ -0,0 +1,124 @@
+"""
+model_health.py - LLM Modelleri İçin Sağlık Kaydı ve Devre Kesici
+Bir model (örn. gemini-2.5-flash) hata verdiğinde her istekte yedek zincirin
+baştan denenmesi, her başarısız deneme için tam bir ağ zaman aşımı demektir.
+Bu modül süreç genelinde model başına ardışık hata sayısını tutar, hata veren
+modeli üstel artan bir süre (backoff) boyunca devre dışı bırakır ve en son
+başarılı modeli hatırlar; sonraki istekler bilinen sağlam modelden başlar.
+"""
+
+import threading
+import time
+
+class _ModelState:
+    def __init__(self):
+        self.failures = 0 # Ardışık hata sayısı
+        self.open_until = 0.0 # Bu zamana kadar devre açık (model atlanır)
+        self.last_error = ""
+
+class ModelHealthRegistry:
+    """
+    Model başına devre kesici.
+    Devre açıkken model atlanır; süre dolunca bir deneme yapılır (yarı açık),
+    başarılı olursa sayaç sıfırlanır, başarısız olursa bekleme süresi ikiye katlanır.
+    """
+    def __init__(self, base_backoff=15.0, max_backoff=600.0):
+        """
+        Args:
+            base_backoff (float): İlk hatadan sonraki bekleme süresi (saniye).
+            max_backoff (float): En uzun bekleme süresi; model bulunamadı (404) gibi kalıcı hatalarda doğrudan kullanılır.
+        """
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.last_good = None
+        self._states = {}
+        self._lock = threading.Lock()
+
+    def _state(self, model_name):
+        if model_name not in self._states:
+            self._states[model_name] = _ModelState()
+        return self._states[model_name]
+
+    @staticmethod
+    def _is_permanent(error):
+        """Tekrar denemenin anlamsız olduğu hatalar (model yok, desteklenmiyor)."""
+        text = str(error).lower()
+        return "404" in text or "not found" in text or "not supported" in text
+
+    def record_success(self, model_name):
+        """Başarılı yanıtı kaydeder; model son sağlam model olarak hatırlanır."""
+        with self._lock:
+            state = self._state(model_name)
+            state.failures = 0
+            state.open_until = 0.0
+            self.last_good = model_name
+
+    def record_failure(self, model_name, error):
+        """
+        Hatayı kaydeder ve devreyi açar.
+
+        Returns:
+            float: Modelin atlanacağı süre (saniye).
+        """
+        with self._lock:
+            state = self._state(model_name)
+            state.failures += 1
+            state.last_error = str(error)
+            if self._is_permanent(error):
+                backoff = self.max_backoff
+            else:
+                backoff = min(self.max_backoff, self.base_backoff * 2 ** (state.failures - 1))
+            state.open_until = time.time() + backoff
+            if self.last_good == model_name:
+                self.last_good = None
+            return backoff
+
+    def is_available(self, model_name):
+        """Devre kapalıysa (veya bekleme süresi dolduysa) True döner."""
+        with self._lock:
+            return time.time() >= self._state(model_name).open_until
+
+    def order(self, candidates):
+        """
+        Aday modelleri deneme sırasına koyar: önce son sağlam model, sonra devresi kapalı
+        olanlar (verilen sırayla). Tüm devreler açıksa en erken açılacak model denenir.
+        """
+        with self._lock:
+            now = time.time()
+            available = [m for m in candidates if now >= self._state(m).open_until]
+            if self.last_good in available:
+                available.remove(self.last_good)
+                available.insert(0, self.last_good)
+            if available:
+                return available
+            return [min(candidates, key=lambda m: self._state(m).open_until)]
+
+    def reset(self):
+        """Tüm kayıtları siler (örn. API anahtarı değiştiğinde eski hatalar geçersizdir)."""
+        with self._lock:
+            self._states.clear()
+            self.last_good = None
+
+    def status(self):
+        """Model başına durum özetini döner (hata ayıklama ve arayüz için)."""
+        with self._lock:
+            now = time.time()
+            return {
+                name: {
+                    "failures": state.failures,
+                    "cooldown": max(0.0, state.open_until - now),
+                    "last_error": state.last_error,
+                }
+                for name, state in self._states.items()
+            }
+
+_registry = None
+_registry_lock = threading.Lock()
+
+def get_health_registry():
+    """Süreç genelinde tek ModelHealthRegistry örneğini döner."""
+    global _registry
+    with _registry_lock:
+        if _registry is None:
+            _registry = ModelHealthRegistry()
+        return _registry
@@ -0,0 +1,286 @@
+"""
+multi_channel_recorder.py - Çoklu Mikrofon / Çok Kanallı Kayıt Modülü
+Panel ve toplantı kayıtları için birden fazla mikrofonu veya tek bir ses kartının
+kanallarını aynı anda dinler. Her kanal kendi VAD ve segmentleyicisine sahiptir;
+çıkan segmentler ortak bir model havuzunda eşzamanlı olarak metne dönüştürülür ve
+konuşmacı etiketli tek bir transkriptte birleştirilir.
+"""
+
+import queue
+import threading
+import time
+
+import numpy as np
+import sounddevice as sd
+
+from audio_utils import StreamingResampler, get_device_samplerate, WHISPER_SAMPLERATE
+from device_registry import get_registry
+from language_detector import SessionLanguageDetector
+from decoding_profiles import get_decoding_options
+from transcript_filter import HallucinationFilter
+from rolling_prompt import RollingPrompt
+from cpu_resources import get_cpu_manager
+
+def parse_channel_spec(spec):
+    """
+    Kullanıcının girdiği kanal tanımını (cihaz, kanal) çiftlerine çevirir.
+
+    Örnekler:
+        "1,3"      -> [(1, 0), (3, 0)]       (iki ayrı mikrofon)
+        "2:0,2:1"  -> [(2, 0), (2, 1)]       (aynı ses kartının iki kanalı)
+
+    Returns:
+        list: (cihaz_indeksi, kanal_indeksi) listesi.
+    """
+    sources = []
+    for part in spec.replace(" ", "").split(","):
+        if not part:
+            continue
+        if ":" in part:
+            dev, ch = part.split(":", 1)
+            sources.append((int(dev), int(ch)))
+        else:
+            sources.append((int(part), 0))
+    return sources
+
+class ChannelSegmenter:
+    """
+    Tek bir kanalın sesini enerji tabanlı VAD ile konuşma segmentlerine ayırır.
+    Konuşma başladığında biriktirmeye başlar, yeterli sessizlik veya maksimum
+    süreye ulaşıldığında segmenti dışarı verir.
+    """
+    def __init__(self, threshold=0.015, frame_duration=0.03, min_silence=0.8, max_segment=15.0, min_speech=0.4):
+        self.threshold = threshold
+        self.frame_len = int(WHISPER_SAMPLERATE * frame_duration)
+        self.min_silence_frames = int(min_silence / frame_duration)
+        self.max_samples = int(WHISPER_SAMPLERATE * max_segment)
+        self.min_samples = int(WHISPER_SAMPLERATE * min_speech)
+        self.pending = np.zeros(0, dtype=np.float32) # Tam çerçeveye tamamlanmayı bekleyen örnekler
+        self.active = [] # Devam eden konuşma segmentinin çerçeveleri
+        self.active_start = 0 # Segment başlangıcı (örnek cinsinden)
+        self.silent_frames = 0
+        self.position = 0 # Kanalda işlenen toplam örnek
+
+    def feed(self, samples):
+        """
+        16 kHz mono örnekleri işler.
+
+        Returns:
+            list: Tamamlanan segmentler [(başlangıç_saniye, np.ndarray), ...]
+        """
+        data = np.concatenate([self.pending, samples.astype(np.float32)])
+        n_frames = len(data) // self.frame_len
+        self.pending = data[n_frames * self.frame_len:]
+        if n_frames == 0:
+            return []
+
+        frames = data[:n_frames * self.frame_len].reshape(n_frames, self.frame_len)
+        # Çerçeve bazlı RMS tek seferde (vektörize) hesaplanır
+        voiced = np.sqrt(np.mean(frames ** 2, axis=1)) >= self.threshold
+
+        done = []
+        for frame, is_voiced in zip(frames, voiced):
+            if self.active:
+                self.active.append(frame)
+                self.silent_frames = 0 if is_voiced else self.silent_frames + 1
+                length = len(self.active) * self.frame_len
+                if self.silent_frames >= self.min_silence_frames or length >= self.max_samples:
+                    seg = self._close()
+                    if seg is not None:
+                        done.append(seg)
+            elif is_voiced:
+                self.active = [frame]
+                self.active_start = self.position
+                self.silent_frames = 0
+            self.position += self.frame_len
+        return done
+
+    def flush(self):
+        """Kayıt bittiğinde yarım kalan segmenti döner."""
+        seg = self._close() if self.active else None
+        return [seg] if seg is not None else []
+
+    def _close(self):
+        audio = np.concatenate(self.active)
+        # Sondaki sessiz çerçeveleri kırp
+        if self.silent_frames:
+            audio = audio[:len(audio) - self.silent_frames * self.frame_len]
+        start = self.active_start / WHISPER_SAMPLERATE
+        self.active = []
+        self.silent_frames = 0
+        if len(audio) < self.min_samples:
+            return None
+        return start, audio
+
+class MultiChannelRecorder:
+    """
+    Birden fazla kaynağı aynı anda kaydeden ve her birini ayrı konuşmacı olarak
+    etiketleyen kayıt yöneticisi. Tüm kanallar tek bir ModelPool'u paylaşır,
+    böylece her mikrofon için ayrı model yüklemeye gerek kalmaz.
+    """
+    def __init__(self, sources, model_pool, language=None, task="transcribe", on_text=None,
+                 silence_threshold=0.015, labels=None, decoding_profile="live", output_filter=None,
+                 rolling_prompt=None):
+        """
+        Args:
+            sources (list): parse_channel_spec çıktısı, (cihaz, kanal) listesi.
+            model_pool (ModelPool): Paylaşılan Whisper model havuzu.
+            language (str): Whisper dil kodu veya None (otomatik).
+            task (str): "transcribe" veya "translate".
+            on_text (callable): on_text(konuşmacı, zaman_damgası, metin) geri çağrısı.
+            silence_threshold (float): Kanal VAD eşiği (RMS).
+            labels (list): Kanal başına konuşmacı isimleri (opsiyonel).
+            decoding_profile (str): Çözümleme profili (bkz. decoding_profiles.py).
+            output_filter (HallucinationFilter): Çözümleme sonrası segment filtresi.
+            rolling_prompt (RollingPrompt): Sözlüğü kanallara kopyalanan şablon istem; her kanal kendi
+                metin geçmişini tutar (bir konuşmacının cümlesi diğerinin bağlamına girmez).
+        """
+        self.sources = sources
+        self.pool = model_pool
+        self.language = language
+        self.task = task
+        self.decoding_options = get_decoding_options(decoding_profile, model_pool.device)
+        self.output_filter = output_filter or HallucinationFilter()
+        template = rolling_prompt or RollingPrompt()
+        self.rolling_prompts = [template.fork() for _ in sources]
+        self.on_text = on_text
+        self.labels = labels or [f"Konuşmacı {i + 1}" for i in range(len(sources))]
+        self.segmenters = [ChannelSegmenter(threshold=silence_threshold) for _ in sources]
+        # Otomatik dilde her konuşmacının dili bir kez belirlenip kilitlenir
+        self.language_detectors = [SessionLanguageDetector() for _ in sources]
+
+        # Kaynakları cihaza göre grupla: her cihaz için tek stream açılır
+        self.devices = {}
+        for slot, (dev, ch) in enumerate(sources):
+            self.devices.setdefault(dev, []).append((slot, ch))
+
+        self.input_queue = queue.Queue()
+        self.segment_queue = queue.Queue()
+        self.transcript = [] # Birleşik transkript: {"start", "speaker", "text"}
+        self.transcript_lock = threading.Lock()
+        self.is_recording = False
+        self.streams = []
+        self.threads = []
+        self.session_start = None
+        self._device_acquired = False
+
+    def start(self):
+        """Tüm stream'leri ve işçi thread'lerini başlatır."""
+        self.is_recording = True
+        self.session_start = time.time()
+        self.resamplers = {}
+        # Cihaz kaydı akışlar oluşturulmadan önce meşgul işaretlenir (PortAudio yeniden başlatılmasın)
+        get_registry().acquire()
+        self._device_acquired = True
+        try:
+            for dev, slots in self.devices.items():
+                rate = get_device_samplerate(dev)
+                n_channels = max(ch for _, ch in slots) + 1
+                self.resamplers[dev] = StreamingResampler(rate, WHISPER_SAMPLERATE)
+                stream = sd.InputStream(samplerate=rate, channels=n_channels, device=dev,
+                                        callback=self._make_callback(dev))
+                self.streams.append(stream)
+                stream.start()
+        except Exception:
+            # Açılabilen akışlar kapatılır, cihaz kaydı serbest bırakılır
+            self.is_recording = False
+            self._close_streams()
+            raise
+
+        self.threads = [threading.Thread(target=self._demux_loop, daemon=True)]
+        # Havuzdaki model sayısı kadar transkripsiyon işçisi
+        for index in range(self.pool.size):
+            self.threads.append(threading.Thread(target=self._transcribe_loop, args=(index,), daemon=True))
+        for t in self.threads:
+            t.start()
+
+    def stop(self):
+        """Stream'leri kapatır, kalan segmentleri işleyip işçileri durdurur."""
+        self.is_recording = False
+        self._close_streams()
+        if not self.threads:
+            return
+        self.threads[0].join(timeout=2.0)
+        for slot, seg in enumerate(self.segmenters):
+            for start, audio in seg.flush():
+                self.segment_queue.put((slot, start, audio))
+        # Her işçiye bir durdurma işareti gönder (kuyruktaki işler önce biter)
+        for _ in range(self.pool.size):
+            self.segment_queue.put(None)
+
+    def _close_streams(self):
+        """Açık stream'leri kapatır ve cihaz kaydını (bir kez) serbest bırakır."""
+        for stream in self.streams:
+            try:
+                stream.stop()
+                stream.close()
+            except Exception as e:
+                print(f"Stream kapatma hatası: {e}")
+        self.streams = []
+        if self._device_acquired:
+            self._device_acquired = False
+            get_registry().release()
+
+    def get_merged_transcript(self):
+        """Tüm konuşmacıların segmentlerini zamana göre sıralı döner."""
+        with self.transcript_lock:
+            return sorted(self.transcript, key=lambda e: e["start"])
+
+    def _make_callback(self, dev):
+        def callback(indata, frames, time_info, status):
+            if status:
+                print(f"Ses hatası (cihaz {dev}): {status}")
+            self.input_queue.put((dev, indata.copy()))
+        return callback
+
+    def _demux_loop(self):
+        """Cihaz bloklarını kanallara ayırır, 16 kHz'e çevirir ve segmentleyicilere dağıtır."""
+        while self.is_recording or not self.input_queue.empty():
+            try:
+                dev, block = self.input_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            # Cihazın tüm kanalları tek seferde dönüştürülür: (frames, channels)
+            block = self.resamplers[dev].process(block)
+            if len(block) == 0:
+                continue
+            for slot, ch in self.devices[dev]:
+                for start, audio in self.segmenters[slot].feed(block[:, ch]):
+                    self.segment_queue.put((slot, start, audio))
+
+    def _transcribe_loop(self, index=0):
+        """Segmentleri havuzdaki modelle metne dönüştürür."""
+        # Eşzamanlı işçiler çekirdekleri paylaşır (aşırı abonelik olmasın)
+        get_cpu_manager().configure_worker(index, self.pool.size)
+        while True:
+            item = self.segment_queue.get()
+            if item is None:
+                break
+            slot, start, audio = item
+            try:
+                detector = self.language_detectors[slot]
+                with self.pool.acquire() as model:
+                    language = self.language or detector.language_for(model, audio)
+                    res = model.transcribe(
+                        audio,
+                        language=language,
+                        task=self.task,
+                        initial_prompt=self.rolling_prompts[slot].build(),
+                        **self.decoding_options
+                    )
+                if self.language is None:
+                    detector.observe(res)
+                res = self.output_filter.filter(res)
+                self.rolling_prompts[slot].commit(res["text"])
+                text = res["text"].strip()
+                if not text:
+                    continue
+                speaker = self.labels[slot]
+                entry = {"start": start, "speaker": speaker, "text": text}
+                with self.transcript_lock:
+                    self.transcript.append(entry)
+                if self.on_text:
+                    stamp = time.strftime("%H:%M:%S", time.localtime(self.session_start + start))
+                    self.on_text(speaker, stamp, text)
+            except Exception as e:
+                print(f"Kanal transkripsiyon hatası ({self.labels[slot]}): {e}")
@@ -0,0 +1,226 @@
+"""
+notes_index.py - Yüklenen Ders Notları İçin Yerel Vektör İndeksi (RAG)
+Konu sohbeti ve quiz, yüklenen notların ilk 5000 karakterini her isteme
+ekliyordu: kitabın geri kalanı görünmüyor, kısa sorular bile 5000 karakterlik
+bağlam için ödeme yapıyordu. Bu modül notları paragraf sınırlarından örtüşen
+bölümlere ayırır, bölümleri CPU'da gömme (embedding) vektörlerine çevirir ve
+NumPy matrisi olarak diske kaydeder. Her soruda yalnızca en ilgili k bölüm
+isteme eklenir.
+
+Gömme modeli olarak sentence-transformers kuruluysa çok dilli MiniLM kullanılır;
+kurulu değilse kelime ve karakter 4-gram'larının özetlenmesine (hashing) dayalı,
+TF-IDF ağırlıklı hafif bir gömme yedeği devreye girer.
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+try:
+    from sentence_transformers import SentenceTransformer
+except ImportError:
+    SentenceTransformer = None
+
+DEFAULT_INDEX_DIR = os.path.join("cache", "notes_index")
+DEFAULT_MODEL = "paraphrase-multilingual-MiniLM-L12-v2"
+
+def split_notes(text, chunk_chars=900, overlap=150):
+    """
+    Notları paragraf ve cümle sınırlarından en fazla chunk_chars uzunluğunda bölümlere ayırır.
+    Ardışık bölümler overlap kadar örtüşür; sınırda kalan bir tanım iki bölümde de bulunur.
+    """
+    pieces = []
+    for paragraph in re.split(r"\n\s*\n", text):
+        paragraph = " ".join(paragraph.split())
+        if not paragraph:
+            continue
+        if len(paragraph) <= chunk_chars:
+            pieces.append(paragraph)
+            continue
+        # Uzun paragraflar cümlelere, cümleden uzun parçalar sabit uzunluğa bölünür
+        for sentence in re.split(r"(?<=[.!?])\s+", paragraph):
+            while len(sentence) > chunk_chars:
+                pieces.append(sentence[:chunk_chars])
+                sentence = sentence[chunk_chars:]
+            if sentence:
+                pieces.append(sentence)
+
+    chunks = []
+    current = ""
+    for piece in pieces:
+        if current and len(current) + len(piece) + 1 > chunk_chars:
+            chunks.append(current)
+            tail = current[-overlap:] if overlap else ""
+            # Örtüşme kelime ortasından başlamasın
+            current = tail[tail.find(" ") + 1:] if " " in tail else ""
+        current = f"{current} {piece}".strip()
+    if current:
+        chunks.append(current)
+    return chunks
+
+class HashingEmbedder:
+    """
+    Bağımlılıksız yedek gömme: kelimeler ve kelime içi karakter 4-gram'ları sabit boyutlu bir
+    vektöre özetlenir (Türkçe ekler nedeniyle "fonksiyonların" ile "fonksiyon" da eşleşir).
+    Özet fonksiyonu (crc32) süreçten bağımsızdır, böylece diske kaydedilen indeksler yeniden kullanılabilir.
+    """
+    sparse = True # İndeks, bölümlerden IDF ağırlıklarını hesaplar
+
+    def __init__(self, dim=4096):
+        self.dim = dim
+        self.name = f"hashing-{dim}"
+
+    def _features(self, text):
+        for word in re.findall(r"\w+", text.casefold()):
+            yield word
+            padded = f"<{word}>"
+            for i in range(len(padded) - 3):
+                yield padded[i:i + 4]
+
+    def encode(self, texts):
+        """Metinleri log ölçekli terim sıklığı vektörlerine çevirir (normalize edilmemiş)."""
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature in self._features(text):
+                vectors[row, zlib.crc32(feature.encode("utf-8")) % self.dim] += 1.0
+        return np.log1p(vectors)
+
+class SentenceEmbedder:
+    """sentence-transformers modeli ile CPU üzerinde yoğun (dense) gömme."""
+    sparse = False
+
+    def __init__(self, model_name=DEFAULT_MODEL):
+        self.name = model_name
+        self.model = SentenceTransformer(model_name, device="cpu")
+        self._lock = threading.Lock() # Model aynı anda tek thread'den kullanılır
+
+    def encode(self, texts):
+        with self._lock:
+            return np.asarray(self.model.encode(list(texts), batch_size=32, convert_to_numpy=True), dtype=np.float32)
+
+_embedders = {}
+_embedder_lock = threading.Lock()
+
+def get_embedder(model_name=DEFAULT_MODEL):
+    """
+    Süreç genelinde paylaşılan gömme modelini döner (model yalnızca bir kez yüklenir).
+    sentence-transformers kurulu değilse veya model yüklenemezse HashingEmbedder döner.
+    """
+    with _embedder_lock:
+        if model_name not in _embedders:
+            embedder = None
+            if SentenceTransformer is not None and model_name != "hashing":
+                try:
+                    embedder = SentenceEmbedder(model_name)
+                except Exception as e:
+                    print(f"Gömme modeli yüklenemedi ({model_name}), hafif yedek kullanılacak: {e}")
+            _embedders[model_name] = embedder or HashingEmbedder()
+        return _embedders[model_name]
+
+def _normalize(vectors):
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+class NotesIndex:
+    """
+    Bir not dosyasının bölümlerini ve normalize edilmiş gömme vektörlerini tutar.
+    Benzerlik, birim vektörlerin iç çarpımıdır (kosinüs benzerliği).
+    """
+    def __init__(self, embedder, chunks, vectors, weights=None, source=""):
+        self.embedder = embedder
+        self.chunks = chunks
+        self.vectors = vectors
+        self.weights = weights # Yalnızca hashing gömmesinde: IDF ağırlıkları
+        self.source = source
+
+    @classmethod
+    def build(cls, text, embedder, source="", index_dir=DEFAULT_INDEX_DIR, chunk_chars=900, overlap=150):
+        """
+        Notları bölümlere ayırıp indeksler. Aynı içerik ve model için diskte indeks varsa onu yükler.
+
+        Args:
+            text (str): Notların tam metni.
+            embedder: get_embedder() ile alınan gömme modeli.
+            source (str): Dosya adı (bilgi amaçlı).
+            index_dir (str): İndekslerin saklandığı klasör.
+
+        Returns:
+            NotesIndex: Kullanıma hazır indeks.
+        """
+        key = hashlib.sha256(f"{embedder.name}|{chunk_chars}|{overlap}|{text}".encode("utf-8")).hexdigest()
+        path = os.path.join(index_dir, f"{key}.npz")
+        index = cls.load(path, embedder)
+        if index is not None:
+            print(f"[*] Not indeksi diskten yüklendi: {len(index.chunks)} bölüm")
+            return index
+
+        chunks = split_notes(text, chunk_chars, overlap)
+        if not chunks:
+            return cls(embedder, [], np.zeros((0, 1), dtype=np.float32), source=source)
+        vectors = embedder.encode(chunks)
+        weights = None
+        if embedder.sparse:
+            # Her bölümde geçen ortak terimler (bağlaçlar, ekler) düşük ağırlık alır
+            doc_freq = np.count_nonzero(vectors, axis=0)
+            weights = np.log((1 + len(chunks)) / (1 + doc_freq)).astype(np.float32) + 1.0
+            vectors = vectors * weights
+        index = cls(embedder, chunks, _normalize(vectors).astype(np.float32), weights, source)
+        index.save(path)
+        print(f"[*] Not indeksi oluşturuldu: {len(chunks)} bölüm, model: {embedder.name}")
+        return index
+
+    def save(self, path):
+        try:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            meta = json.dumps({"embedder": self.embedder.name, "source": self.source}, ensure_ascii=False)
+            tmp_path = path + ".tmp.npz"
+            np.savez(tmp_path, vectors=self.vectors, chunks=np.array(self.chunks),
+                     weights=self.weights if self.weights is not None else np.zeros(0, dtype=np.float32),
+                     meta=np.array(meta))
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Not indeksi kaydedilemedi: {e}")
+
+    @classmethod
+    def load(cls, path, embedder):
+        """Diskteki indeksi yükler; dosya yoksa veya başka bir modelle oluşturulduysa None döner."""
+        try:
+            with np.load(path, allow_pickle=False) as data:
+                meta = json.loads(str(data["meta"]))
+                if meta.get("embedder") != embedder.name:
+                    return None
+                weights = data["weights"] if data["weights"].size else None
+                return cls(embedder, [str(c) for c in data["chunks"]], data["vectors"], weights, meta.get("source", ""))
+        except (OSError, KeyError, ValueError):
+            return None
+
+    def search(self, query, k=4):
+        """
+        Sorguya en benzer k bölümü döner.
+
+        Returns:
+            list: (benzerlik, bölüm numarası, bölüm metni) üçlüleri, en benzerden başlayarak.
+        """
+        if not self.chunks or not query.strip():
+            return []
+        q = self.embedder.encode([query])
+        if self.weights is not None:
+            q = q * self.weights
+        scores = self.vectors @ _normalize(q)[0]
+        k = min(k, len(self.chunks))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(float(scores[i]), int(i), self.chunks[i]) for i in top]
+
+    def spread(self, k=6):
+        """Notların tamamını temsil eden, eşit aralıklı k bölüm döner (örn. genel bir quiz için)."""
+        if len(self.chunks) <= k:
+            return list(self.chunks)
+        positions = np.linspace(0, len(self.chunks) - 1, k).round().astype(int)
+        return [self.chunks[i] for i in positions]
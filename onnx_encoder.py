@@ -0,0 +1,145 @@
+"""
+onnx_encoder.py - Whisper Encoder'ı için ONNX Runtime Hızlandırması (CPU)
+CPU'da model.transcribe() süresinin büyük kısmını encoder harcar. Bu modül
+yüklenmiş Whisper encoder'ını bir kez ONNX'e aktarır, model boyutu başına
+önbellekler ve ONNX Runtime grafik optimizasyonlarıyla çalıştırır.
+Encoder, aynı arayüze sahip bir modülle değiştirildiği için Whisper'ın Python
+çözümleme mantığı (transcribe, decode, detect_language) aynen çalışır.
+
+Kullanım (eşitlik kontrolü):
+    python onnx_encoder.py --model base
+"""
+
+import argparse
+import os
+
+import numpy as np
+import torch
+from torch import nn
+
+from cpu_resources import get_cpu_manager
+
+try:
+    import onnxruntime as ort
+except ImportError:
+    ort = None
+
+ONNX_CACHE_DIR = os.path.join("models", "onnx")
+
+def is_available():
+    """ONNX Runtime kurulu mu?"""
+    return ort is not None
+
+def encoder_path(model_type, cache_dir=ONNX_CACHE_DIR):
+    """Model boyutuna göre önbellekteki ONNX dosyasının yolunu döner."""
+    return os.path.join(cache_dir, f"whisper_{model_type}_encoder.onnx")
+
+def export_encoder(model, path):
+    """
+    Whisper encoder'ını ONNX formatına aktarır (yalnızca dosya yoksa çağrılmalı).
+
+    Args:
+        model: CPU üzerinde, float32 Whisper modeli.
+        path (str): Hedef .onnx dosyası.
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    mel = torch.zeros((1, model.dims.n_mels, model.dims.n_audio_ctx * 2), dtype=torch.float32)
+    tmp_path = path + ".tmp"
+    with torch.no_grad():
+        torch.onnx.export(
+            model.encoder, (mel,), tmp_path,
+            input_names=["mel"], output_names=["audio_features"],
+            dynamic_axes={"mel": {0: "batch"}, "audio_features": {0: "batch"}},
+            opset_version=17,
+        )
+    # Yarım kalan dışa aktarım önbelleğe geçerli dosya gibi girmesin
+    os.replace(tmp_path, path)
+
+class OnnxEncoder(nn.Module):
+    """
+    model.encoder yerine geçen, ONNX Runtime ile çalışan encoder.
+    nn.Module olduğu için forward hook'ları (örn. iptal kontrol noktaları) çalışmaya devam eder.
+    """
+    def __init__(self, path, threads=None):
+        super().__init__()
+        options = ort.SessionOptions()
+        optimized_path = path.replace(".onnx", ".opt.onnx")
+        if os.path.exists(optimized_path):
+            # Optimize edilmiş grafik önbellekte: optimizasyon tekrarlanmaz
+            path = optimized_path
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_DISABLE_ALL
+        else:
+            options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+            options.optimized_model_filepath = optimized_path
+        if threads:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(path, options, providers=["CPUExecutionProvider"])
+
+    def forward(self, mel):
+        features = self.session.run(None, {"mel": mel.detach().cpu().float().numpy()})[0]
+        return torch.from_numpy(features)
+
+def enable_onnx_encoder(model, model_type, cache_dir=ONNX_CACHE_DIR):
+    """
+    Modelin encoder'ını ONNX Runtime sürümüyle değiştirir; gerekirse önce dışa aktarır.
+    ONNX Runtime yoksa veya model GPU'daysa model değiştirilmeden döner.
+
+    Returns:
+        bool: ONNX encoder etkinleştirildiyse True.
+    """
+    if not is_available():
+        print("ONNX Runtime kurulu değil, PyTorch encoder kullanılıyor.")
+        return False
+    if next(model.parameters()).device.type != "cpu":
+        return False
+    try:
+        path = encoder_path(model_type, cache_dir)
+        if not os.path.exists(path):
+            print(f"[*] Whisper encoder'ı ONNX'e aktarılıyor ({model_type}), bu işlem bir kez yapılır...")
+            export_encoder(model, path)
+        threads = get_cpu_manager().intra_op_threads(1)
+        model.encoder = OnnxEncoder(path, threads=threads)
+        print(f"[*] ONNX Runtime encoder etkin: {path}")
+        return True
+    except Exception as e:
+        print(f"ONNX encoder etkinleştirilemedi, PyTorch encoder kullanılıyor: {e}")
+        return False
+
+def check_parity(torch_encoder, onnx_encoder, n_mels, n_frames, trials=2, seed=0):
+    """
+    PyTorch ve ONNX encoder çıktılarını rastgele girişlerde karşılaştırır.
+
+    Returns:
+        float: Gözlenen en büyük mutlak fark.
+    """
+    generator = torch.Generator().manual_seed(seed)
+    max_diff = 0.0
+    with torch.no_grad():
+        for _ in range(trials):
+            mel = torch.randn((1, n_mels, n_frames), generator=generator)
+            expected = torch_encoder(mel).numpy()
+            actual = onnx_encoder(mel).numpy()
+            max_diff = max(max_diff, float(np.abs(expected - actual).max()))
+    return max_diff
+
+def main():
+    import whisper
+
+    parser = argparse.ArgumentParser(description="Whisper encoder'ını ONNX'e aktarır ve PyTorch ile eşitliğini kontrol eder.")
+    parser.add_argument("--model", default="base", help="Whisper model boyutu")
+    parser.add_argument("--tolerance", type=float, default=1e-3, help="İzin verilen en büyük mutlak fark")
+    args = parser.parse_args()
+
+    if not is_available():
+        raise SystemExit("ONNX Runtime kurulu değil: pip install onnxruntime")
+
+    model = whisper.load_model(args.model, device="cpu")
+    torch_encoder = model.encoder
+    if not enable_onnx_encoder(model, args.model):
+        raise SystemExit("ONNX encoder oluşturulamadı.")
+    diff = check_parity(torch_encoder, model.encoder, model.dims.n_mels, model.dims.n_audio_ctx * 2)
+    print(f"En büyük mutlak fark: {diff:.2e} (tolerans {args.tolerance:.0e})")
+    raise SystemExit(0 if diff <= args.tolerance else 1)
+
+if __name__ == "__main__":
+    main()
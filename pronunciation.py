@@ -0,0 +1,122 @@
+"""
+pronunciation.py - Telaffuz Değerlendirme Modülü
+Hedef cümle ile Whisper'ın kelime düzeyindeki çıktısını (zaman damgası ve
+olasılık) kelime dizisi üzerinde düzenleme mesafesiyle hizalar. Böylece
+atlanan, yanlış söylenen, fazladan eklenen ve belirsiz (yutulmuş) kelimeler
+ayrı ayrı raporlanabilir.
+"""
+
+import string
+from difflib import SequenceMatcher
+
+# Noktalama temizliği için (Whisper tırnak/kesme işaretlerini de üretebilir)
+_PUNCT_TABLE = str.maketrans("", "", string.punctuation + "“”‘’«»…¿¡")
+
+def normalize_word(word):
+    """Kelimeyi karşılaştırma için küçük harfe çevirir ve noktalamayı atar."""
+    return word.translate(_PUNCT_TABLE).strip().lower()
+
+def split_words(text):
+    """Metni normalize edilmiş kelimelere böler."""
+    return [w for w in (normalize_word(t) for t in text.split()) if w]
+
+def align_words(target, spoken):
+    """
+    İki kelime dizisini Levenshtein (düzenleme mesafesi) ile hizalar.
+
+    Yer değiştirme maliyeti kelimelerin harf benzerliğine göre azalır; böylece
+    "want" -> "wants" gibi yakın telaffuzlar, atlama + ekleme yerine tercih edilir.
+
+    Args:
+        target (list): Hedef kelimeler.
+        spoken (list): Söylenen kelimeler.
+
+    Returns:
+        list: (işlem, hedef_indeks, söylenen_indeks) demetleri.
+              İşlem: "match", "sub" (yanlış), "del" (atlanan), "ins" (fazladan).
+    """
+    def sub_cost(a, b):
+        if a == b:
+            return 0.0
+        return 1.0 - 0.5 * SequenceMatcher(None, a, b).ratio()
+
+    n, m = len(target), len(spoken)
+    dp = [[0.0] * (m + 1) for _ in range(n + 1)]
+    for i in range(n + 1):
+        dp[i][0] = float(i)
+    for j in range(m + 1):
+        dp[0][j] = float(j)
+    for i in range(1, n + 1):
+        for j in range(1, m + 1):
+            dp[i][j] = min(dp[i - 1][j - 1] + sub_cost(target[i - 1], spoken[j - 1]),
+                           dp[i - 1][j] + 1, dp[i][j - 1] + 1)
+
+    ops = []
+    i, j = n, m
+    while i > 0 or j > 0:
+        if i > 0 and j > 0 and abs(dp[i][j] - (dp[i - 1][j - 1] + sub_cost(target[i - 1], spoken[j - 1]))) < 1e-9:
+            ops.append(("match" if target[i - 1] == spoken[j - 1] else "sub", i - 1, j - 1))
+            i, j = i - 1, j - 1
+        elif i > 0 and abs(dp[i][j] - (dp[i - 1][j] + 1)) < 1e-9:
+            ops.append(("del", i - 1, None))
+            i -= 1
+        else:
+            ops.append(("ins", None, j - 1))
+            j -= 1
+    ops.reverse()
+    return ops
+
+class PronunciationScorer:
+    """
+    Whisper kelime çıktısını hedef cümleyle karşılaştırıp skor ve detaylı rapor üretir.
+    """
+    def __init__(self, slur_threshold=0.5, insertion_penalty=0.5):
+        """
+        Args:
+            slur_threshold (float): Bu olasılığın altında tanınan kelimeler "belirsiz" sayılır.
+            insertion_penalty (float): Fazladan söylenen her kelimenin puan kesintisi.
+        """
+        self.slur_threshold = slur_threshold
+        self.insertion_penalty = insertion_penalty
+
+    def score(self, target_text, words):
+        """
+        Args:
+            target_text (str): Kullanıcının okuması istenen cümle.
+            words (list): Whisper kelimeleri [{"word", "start", "end", "probability"}, ...].
+
+        Returns:
+            dict: score (0-100), missed, wrong, extra, slurred listeleri.
+        """
+        target = split_words(target_text)
+        spoken = []
+        for w in words:
+            norm = normalize_word(w.get("word", ""))
+            if norm:
+                spoken.append({**w, "norm": norm})
+
+        result = {"score": 0, "missed": [], "wrong": [], "extra": [], "slurred": []}
+        if not target:
+            return result
+
+        credit = 0.0
+        for op, ti, si in align_words(target, [w["norm"] for w in spoken]):
+            if op == "match":
+                w = spoken[si]
+                prob = w.get("probability", 1.0)
+                if prob < self.slur_threshold:
+                    # Doğru kelime ama model emin değil: yarım puan
+                    credit += 0.5
+                    result["slurred"].append({"word": target[ti], "start": w.get("start", 0.0), "probability": prob})
+                else:
+                    credit += 1.0
+            elif op == "sub":
+                result["wrong"].append({"expected": target[ti], "heard": spoken[si]["norm"], "start": spoken[si].get("start", 0.0)})
+            elif op == "del":
+                result["missed"].append(target[ti])
+            else:
+                result["extra"].append(spoken[si]["norm"])
+
+        credit -= self.insertion_penalty * len(result["extra"])
+        result["score"] = int(max(0.0, credit) / len(target) * 100)
+        return result
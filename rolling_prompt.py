@@ -0,0 +1,131 @@
+"""
+rolling_prompt.py - Canlı Transkripsiyon İçin Kayan Bağlam İstemi
+Canlı akışta her blok bağımsız çözüldüğü için isimler ve teknik terimler birkaç
+saniyede bir farklı yazılabilir. Bu modül son onaylanan metinden ve kullanıcının
+verdiği sözlükten (aktif konu, yüklenen notlardaki terimler) token sınırlı bir
+initial_prompt üretir; böylece her çözümlemenin maliyeti sabit kalır.
+"""
+
+import re
+import threading
+from collections import Counter, deque
+
+from whisper.tokenizer import get_tokenizer
+
+def extract_terms(text, limit=30):
+    """
+    Notlardan özel isim ve teknik terim adaylarını çıkarır.
+    Büyük harfle başlayan (cümle başı hariç), rakam veya iç büyük harf içeren
+    kelimeler sıklığa göre sıralanır.
+
+    Args:
+        text (str): Kaynak metin.
+        limit (int): Döndürülecek en fazla terim sayısı.
+
+    Returns:
+        list: Terim listesi.
+    """
+    counts = Counter()
+    for sentence in re.split(r"[.!?\n]+", text):
+        words = re.findall(r"[\w][\w\-+#.]*[\w+#]|\w", sentence)
+        for i, word in enumerate(words):
+            if len(word) < 3:
+                continue
+            capitalized = word[0].isupper() and i > 0
+            technical = any(c.isdigit() for c in word) or any(c.isupper() for c in word[1:])
+            if capitalized or technical:
+                counts[word] += 1
+    return [w for w, _ in counts.most_common(limit)]
+
+class RollingPrompt:
+    """
+    Son transkript metni ve sözlükten token bütçesiyle sınırlı bir bağlam istemi oluşturur.
+    """
+    def __init__(self, max_tokens=120, vocabulary_tokens=40, history_size=20):
+        """
+        Args:
+            max_tokens (int): İstemin toplam token sınırı (Whisper en fazla 223 token kullanır).
+            vocabulary_tokens (int): Bu bütçenin sözlüğe ayrılan kısmı.
+            history_size (int): Tutulacak son onaylı segment sayısı.
+        """
+        self.max_tokens = max_tokens
+        self.vocabulary_tokens = vocabulary_tokens
+        self.tokenizer = get_tokenizer(multilingual=True)
+        self.history = deque(maxlen=history_size)
+        self.vocabulary_prompt = ""
+        self._lock = threading.Lock()
+
+    def _count(self, text):
+        return len(self.tokenizer.encode(text))
+
+    def set_vocabulary(self, terms):
+        """
+        Sözlük terimlerini ayarlar; bütçeye sığmayan terimler atlanır.
+
+        Args:
+            terms (list): Konu adı, notlardan çıkarılan terimler vb.
+        """
+        prompt = ""
+        seen = set()
+        for term in terms:
+            term = term.strip()
+            if not term or term.lower() in seen:
+                continue
+            candidate = f"{prompt}, {term}" if prompt else term
+            if self._count(candidate) > self.vocabulary_tokens:
+                break
+            prompt = candidate
+            seen.add(term.lower())
+        with self._lock:
+            self.vocabulary_prompt = f"{prompt}." if prompt else ""
+
+    def commit(self, text):
+        """Onaylanan (filtreden geçmiş) transkript metnini geçmişe ekler."""
+        text = " ".join(text.split())
+        if text:
+            with self._lock:
+                self.history.append(text)
+
+    def fork(self):
+        """Aynı ayarlar ve sözlükle, boş geçmişli yeni bir istem döner (yeni kayıt veya panel kanalı için)."""
+        prompt = RollingPrompt.__new__(RollingPrompt)
+        prompt.max_tokens = self.max_tokens
+        prompt.vocabulary_tokens = self.vocabulary_tokens
+        prompt.tokenizer = self.tokenizer
+        prompt.history = deque(maxlen=self.history.maxlen)
+        with self._lock:
+            prompt.vocabulary_prompt = self.vocabulary_prompt
+        prompt._lock = threading.Lock()
+        return prompt
+
+    def reset(self):
+        """Yeni oturumda metin geçmişini temizler (sözlük korunur)."""
+        with self._lock:
+            self.history.clear()
+
+    def build(self):
+        """
+        initial_prompt metnini oluşturur: önce sözlük, ardından bütçeye sığan en son metin.
+
+        Returns:
+            str | None: İstem metni veya bağlam yoksa None.
+        """
+        with self._lock:
+            vocabulary = self.vocabulary_prompt
+            history = list(self.history)
+
+        budget = self.max_tokens - (self._count(vocabulary) if vocabulary else 0)
+        words = " ".join(history).split()
+        # Baştan kelime atarak en son metni bütçeye sığdır (kelime ortasından kesmez)
+        tail = []
+        used = 0
+        for word in reversed(words):
+            cost = self._count(" " + word)
+            if used + cost > budget:
+                break
+            tail.append(word)
+            used += cost
+        recent = " ".join(reversed(tail))
+
+        prompt = " ".join(p for p in (vocabulary, recent) if p)
+        return prompt or None
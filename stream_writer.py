@@ -0,0 +1,144 @@
+"""
+stream_writer.py - LLM Yanıtlarını Metin Kutularına Akışla Yazma
+Arka plan thread'inden gelen metin parçalarını (token akışı) biriktirir ve
+Tk ana döngüsünde belirli aralıklarla toplu olarak metin kutusuna ekler.
+Böylece kullanıcı tüm yanıtın bitmesini beklemeden ilk kelimeleri görür,
+arayüz ise her token için ayrı bir güncelleme yapmaz.
+"""
+
+import itertools
+import threading
+
+_ids = itertools.count()
+
+class TextStreamWriter:
+    """
+    Bir veya birden fazla metin kutusuna akış halinde yazan yardımcı.
+    write() herhangi bir thread'den çağrılabilir; arayüz güncellemeleri ana döngüde yapılır
+    (ui verilirse AIRuntime.ui kuyruğu üzerinden, yoksa widget.after() ile).
+    Akış bölgesi Tk işaretleri (mark) ile izlenir ve bir satır sonuyla kapatılır; bu sırada kutunun
+    sonuna yazılan başka metinler (örn. aynı anda akan ikinci bir yanıt) bölgeye karışmaz.
+    """
+    def __init__(self, widgets, header="", clear=False, interval_ms=60, hide_after=None, ui=None):
+        """
+        Args:
+            widgets: Hedef metin kutusu veya kutu listesi.
+            header (str): Akıştan önce yazılacak başlık.
+            clear (bool): Akış başlamadan kutunun içeriğini temizle.
+            interval_ms (int): Toplu güncelleme aralığı.
+            hide_after (str): Bu işaretten sonraki metin gösterilmez (örn. "[[DATA_START]]").
+            ui (callable): ui(fn, *args) ile fn'i Tk ana thread'inde çalıştıran köprü (örn. AIRuntime.ui).
+                Verilirse arka plan thread'leri Tk'ye hiç doğrudan dokunmaz.
+        """
+        self.widgets = list(widgets) if isinstance(widgets, (list, tuple)) else [widgets]
+        self.ui = ui
+        self.interval_ms = interval_ms
+        self.hide_after = hide_after
+        self._lock = threading.Lock()
+        self._raw = "" # Gelen tüm metin
+        self._shown = 0 # Kutulara yazılmış karakter sayısı
+        self._scheduled = False
+        self._finished = False
+        uid = next(_ids)
+        self._head_mark = f"stream_head_{uid}"
+        self._body_mark = f"stream_body_{uid}"
+        self._end_mark = f"stream_end_{uid}"
+        self._schedule(0, self._begin, header, clear)
+
+    def _schedule(self, delay_ms, fn, *args):
+        """fn(*args)'ı Tk ana döngüsünde delay_ms sonra çalıştırır."""
+        if self.ui is not None:
+            # after() çağrısının kendisi de ana thread'de yapılır; toplu güncelleme aralığı korunur
+            self.ui(self.widgets[0].after, delay_ms, fn, *args)
+        else:
+            self.widgets[0].after(delay_ms, fn, *args)
+
+    def _begin(self, header, clear):
+        for widget in self.widgets:
+            if clear:
+                widget.delete("1.0", "end")
+            widget.mark_set(self._head_mark, "end-1c")
+            widget.mark_gravity(self._head_mark, "left")
+            # Sondaki satır sonu bölgeyi kapatır: sonradan "end"e eklenen metin bölgenin dışında kalır
+            widget.insert("end", header + "\n")
+            widget.mark_set(self._body_mark, "end-2c")
+            widget.mark_gravity(self._body_mark, "left")
+            widget.mark_set(self._end_mark, "end-2c")
+            widget.mark_gravity(self._end_mark, "right")
+            widget.see("end")
+
+    def write(self, chunk):
+        """Yeni bir metin parçası ekler (thread güvenli)."""
+        if not chunk:
+            return
+        with self._lock:
+            if self._finished:
+                return
+            self._raw += chunk
+            if self._scheduled:
+                return
+            self._scheduled = True
+        self._schedule(self.interval_ms, self._flush)
+
+    def _visible_text(self):
+        """Gösterilebilecek metni döner; gizleme işaretinin yarım gelmiş başı da bekletilir."""
+        text = self._raw
+        if not self.hide_after:
+            return text
+        index = text.find(self.hide_after)
+        if index != -1:
+            return text[:index]
+        for size in range(min(len(self.hide_after) - 1, len(text)), 0, -1):
+            if text.endswith(self.hide_after[:size]):
+                return text[:-size]
+        return text
+
+    def _flush(self):
+        with self._lock:
+            self._scheduled = False
+            if self._finished:
+                return
+            visible = self._visible_text()
+            new_text = visible[self._shown:]
+            self._shown = len(visible)
+        if not new_text:
+            return
+        for widget in self.widgets:
+            widget.insert(self._end_mark, new_text)
+            widget.see(self._end_mark)
+
+    def finish(self, final_text=None, footer="", see_start=False):
+        """
+        Akışı bitirir. final_text verilirse akış bölgesi bu metinle değiştirilir
+        (yedek modele geçiş veya temizlenmiş sonuç için); footer bölgenin sonuna eklenir.
+        """
+        with self._lock:
+            self._finished = True
+            if final_text is None:
+                final_text = self._visible_text()
+        self._schedule(0, self._finish, final_text, footer, see_start)
+
+    def _finish(self, final_text, footer, see_start):
+        for widget in self.widgets:
+            if widget.get(self._body_mark, self._end_mark) != final_text:
+                widget.delete(self._body_mark, self._end_mark)
+                widget.insert(self._end_mark, final_text)
+            widget.delete(self._end_mark, f"{self._end_mark}+1c") # Kapanış satır sonu
+            widget.insert(self._end_mark, footer)
+            widget.see(self._head_mark if see_start else self._end_mark)
+            self._unset_marks(widget)
+
+    def cancel(self):
+        """Akışı iptal eder ve başlıkla birlikte yazılan metni kaldırır (örn. hata durumunda)."""
+        with self._lock:
+            self._finished = True
+        self._schedule(0, self._cancel)
+
+    def _cancel(self):
+        for widget in self.widgets:
+            widget.delete(self._head_mark, f"{self._end_mark}+1c")
+            self._unset_marks(widget)
+
+    def _unset_marks(self, widget):
+        for mark in (self._head_mark, self._body_mark, self._end_mark):
+            widget.mark_unset(mark)
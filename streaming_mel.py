@@ -0,0 +1,215 @@
+"""
+streaming_mel.py - Artımlı Log-Mel Spektrogram Hattı
+Whisper her çağrıda 30 saniyelik pencerenin log-mel spektrogramını baştan
+hesaplar; 3 saniyelik bir canlı blokta işin büyük kısmı dolgu (padding) için
+harcanır. Bu modül mel karelerini ses geldikçe, yalnızca yeni kareler için
+NumPy ile vektörel STFT yaparak hesaplar; filtre bankası önbelleklenir,
+pencereler arası örtüşen kareler yeniden kullanılır ve pencere hazır karelerle
+doğrudan whisper.decode()'a verilir.
+"""
+
+import numpy as np
+import torch
+import whisper
+from whisper.audio import N_FFT, HOP_LENGTH, N_FRAMES, mel_filters
+
+# Tamamen sessiz (sıfır) bir karenin log10 değeri: whisper 1e-10 alt sınırı uygular
+SILENT_LOG_MEL = -10.0
+
+_filterbanks = {}
+
+def get_filterbank(n_mels):
+    """Whisper'ın mel filtre bankasını NumPy dizisi olarak önbellekten döner."""
+    if n_mels not in _filterbanks:
+        _filterbanks[n_mels] = mel_filters("cpu", n_mels).numpy().astype(np.float32)
+    return _filterbanks[n_mels]
+
+# torch.hann_window(N_FFT) ile aynı (periyodik) Hann penceresi
+HANN_WINDOW = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(N_FFT) / N_FFT)).astype(np.float32)
+
+class StreamingLogMel:
+    """
+    Ses akışından log-mel karelerini artımlı olarak üreten özellik çıkarıcı.
+    Kare t, akıştaki t * HOP_LENGTH örneğine ortalanır (whisper'daki center=True ile aynı);
+    akışın başı whisper gibi yansıtmalı (reflect) dolgu ile başlatılır.
+    """
+    def __init__(self, n_mels=80, max_frames=N_FRAMES * 2):
+        """
+        Args:
+            n_mels (int): Mel bant sayısı (model.dims.n_mels).
+            max_frames (int): Bellekte tutulacak en fazla hazır kare sayısı.
+        """
+        self.n_mels = n_mels
+        self.filters = get_filterbank(n_mels)
+        self.max_frames = max_frames
+        self.reset()
+
+    def reset(self):
+        """Akışı sıfırlar."""
+        self._pending = np.zeros(0, dtype=np.float32) # Henüz kareye dönüşmemiş örnekler
+        self._started = False
+        self._frames = np.zeros((self.n_mels, 0), dtype=np.float32) # log10 mel kareleri
+        self.first_frame = 0 # _frames[:, 0] karesinin akıştaki indeksi
+        self.total_samples = 0
+
+    @property
+    def ready_frames(self):
+        """Kesinleşmiş (tüm örnekleri gelmiş) kare sayısı."""
+        return self.first_frame + self._frames.shape[1]
+
+    def _log_mel(self, samples, count):
+        """samples dizisinden HOP_LENGTH adımlı count kare için log10 mel değerlerini hesaplar."""
+        frames = np.lib.stride_tricks.sliding_window_view(samples, N_FFT)[::HOP_LENGTH][:count]
+        spectrum = np.fft.rfft(frames * HANN_WINDOW, axis=-1)
+        power = (spectrum.real ** 2 + spectrum.imag ** 2).astype(np.float32)
+        mel = self.filters @ power.T
+        return np.log10(np.maximum(mel, 1e-10))
+
+    def feed(self, samples):
+        """
+        Yeni ses örneklerini ekler ve yalnızca tamamlanan yeni kareleri hesaplar.
+
+        Args:
+            samples (np.ndarray): 16 kHz mono float32 örnekler.
+
+        Returns:
+            int: Bu çağrıda eklenen kare sayısı.
+        """
+        samples = np.asarray(samples, dtype=np.float32).reshape(-1)
+        self.total_samples += len(samples)
+        self._pending = np.concatenate([self._pending, samples])
+        half = N_FFT // 2
+        if not self._started:
+            # İlk kare için whisper gibi yansıtmalı dolgu gerekir
+            if len(self._pending) <= half:
+                return 0
+            self._pending = np.concatenate([self._pending[1:half + 1][::-1], self._pending])
+            self._started = True
+
+        if len(self._pending) < N_FFT:
+            return 0
+        count = (len(self._pending) - N_FFT) // HOP_LENGTH + 1
+        new = self._log_mel(self._pending, count)
+        self._pending = self._pending[count * HOP_LENGTH:]
+        self._frames = np.concatenate([self._frames, new], axis=1)
+        if self._frames.shape[1] > self.max_frames:
+            self.trim(self.ready_frames - self.max_frames)
+        return count
+
+    def trim(self, before_frame):
+        """before_frame indeksinden önceki kareleri bellekten atar."""
+        drop = min(max(0, before_frame - self.first_frame), self._frames.shape[1])
+        self._frames = self._frames[:, drop:]
+        self.first_frame += drop
+
+    def _tail_frames(self, end_frame):
+        """
+        Henüz kesinleşmemiş kareleri, sesin sıfırla devam ettiğini varsayarak hesaplar
+        (whisper'ın bloğun sonuna eklediği sıfır dolgusunun aynısı).
+        """
+        if not self._started:
+            padded = np.concatenate([np.zeros(N_FFT // 2, dtype=np.float32), self._pending])
+        else:
+            padded = self._pending
+        count = end_frame - self.ready_frames
+        if count <= 0:
+            return np.zeros((self.n_mels, 0), dtype=np.float32)
+        needed = (count - 1) * HOP_LENGTH + N_FFT
+        padded = np.concatenate([padded, np.zeros(max(0, needed - len(padded)), dtype=np.float32)])
+        return self._log_mel(padded, count)
+
+    def window(self, start_frame, end_frame=None, n_frames=N_FRAMES):
+        """
+        [start_frame, end_frame) aralığındaki sesin whisper'a hazır, normalize edilmiş
+        log-mel penceresini döner. Hazır kareler yeniden kullanılır; yalnızca sondaki
+        birkaç kare hesaplanır, 30 saniyeye kadar olan dolgu sabit değerle doldurulur.
+
+        Args:
+            start_frame (int): Pencerenin akıştaki ilk karesi.
+            end_frame (int): Ses içeriğinin bittiği kare (None = şu ana kadarki tüm ses).
+            n_frames (int): Pencere uzunluğu (kare).
+
+        Returns:
+            np.ndarray: (n_mels, n_frames) float32 log-mel penceresi.
+        """
+        if end_frame is None:
+            end_frame = self.total_samples // HOP_LENGTH
+        end_frame = min(end_frame, start_frame + n_frames)
+        if start_frame < self.first_frame:
+            raise ValueError("İstenen kareler bellekten atılmış.")
+
+        ready = self._frames[:, start_frame - self.first_frame:end_frame - self.first_frame]
+        # Sesin son örneklerini içeren kareler (içerik sonrası ~2 kare dahil)
+        audio_end = (self.total_samples + N_FFT // 2 + HOP_LENGTH - 1) // HOP_LENGTH
+        tail_end = min(start_frame + n_frames, max(end_frame, audio_end))
+        if self.ready_frames > end_frame:
+            # Sonraki ses zaten gelmiş: pencereye bloğun dışındaki ses karıştırılmaz
+            tail = np.zeros((self.n_mels, 0), dtype=np.float32)
+        else:
+            tail = self._tail_frames(tail_end)
+            if self.ready_frames < start_frame:
+                tail = tail[:, start_frame - self.ready_frames:]
+        log_spec = np.concatenate([ready, tail], axis=1)[:, :n_frames]
+
+        if log_spec.shape[1] < n_frames:
+            fill = np.full((self.n_mels, n_frames - log_spec.shape[1]), SILENT_LOG_MEL, dtype=np.float32)
+            log_spec = np.concatenate([log_spec, fill], axis=1)
+
+        # whisper.log_mel_spectrogram ile aynı dinamik aralık sınırlama ve ölçekleme
+        log_spec = np.maximum(log_spec, log_spec.max() - 8.0)
+        return (log_spec + 4.0) / 4.0
+
+def decode_window(model, mel, decoding_options, language=None, task="transcribe", prompt=None,
+                  duration=None, no_speech_threshold=0.6):
+    """
+    Hazır bir log-mel penceresini whisper.decode() ile çözer; transcribe() ile aynı
+    sıcaklık yedekleme planını ve kalite eşiklerini uygular.
+
+    Args:
+        model: Whisper modeli.
+        mel (np.ndarray): (n_mels, N_FRAMES) log-mel penceresi.
+        decoding_options (dict): decoding_profiles.get_decoding_options() çıktısı.
+        language (str): Dil (None = algıla).
+        task (str): "transcribe" veya "translate".
+        prompt (str): Bağlam istemi.
+        duration (float): Penceredeki gerçek ses süresi (segment bitişi için).
+        no_speech_threshold (float): Sessizlik kararı eşiği.
+
+    Returns:
+        dict: transcribe() çıktısına benzer {"text", "segments", "language"} sözlüğü.
+    """
+    fp16 = decoding_options.get("fp16", False)
+    mel = torch.from_numpy(mel).to(model.device, dtype=torch.float16 if fp16 else torch.float32)
+    compression_threshold = decoding_options.get("compression_ratio_threshold")
+    logprob_threshold = decoding_options.get("logprob_threshold")
+
+    result = None
+    for temperature in decoding_options.get("temperature", (0.0,)):
+        kwargs = dict(language=language, task=task, temperature=temperature, fp16=fp16,
+                      prompt=prompt, without_timestamps=True)
+        if temperature > 0:
+            kwargs["best_of"] = decoding_options.get("best_of")
+        else:
+            kwargs["beam_size"] = decoding_options.get("beam_size")
+        result = whisper.decode(model, mel, whisper.DecodingOptions(**kwargs))
+
+        needs_fallback = (
+            (compression_threshold is not None and result.compression_ratio > compression_threshold)
+            or (logprob_threshold is not None and result.avg_logprob < logprob_threshold)
+        )
+        if result.no_speech_prob > no_speech_threshold and logprob_threshold is not None \
+                and result.avg_logprob < logprob_threshold:
+            needs_fallback = False # Sessiz pencere: yeniden denemeye gerek yok
+        if not needs_fallback:
+            break
+
+    segment = {
+        "start": 0.0,
+        "end": duration if duration is not None else N_FRAMES * HOP_LENGTH / whisper.audio.SAMPLE_RATE,
+        "text": result.text,
+        "no_speech_prob": result.no_speech_prob,
+        "avg_logprob": result.avg_logprob,
+        "compression_ratio": result.compression_ratio,
+        "temperature": result.temperature,
+    }
+    return {"text": result.text, "segments": [segment], "language": result.language}
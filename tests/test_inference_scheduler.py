@@ -0,0 +1,98 @@
+"""
+inference_scheduler.py testleri: pencere sınırında modelin daha yüksek öncelikli işlere bırakılması.
+Gerçek Whisper ağırlıkları yüklenmez; encoder'ı olan küçük bir sahte model kullanılır.
+"""
+
+import threading
+import time
+
+import pytest
+
+torch = pytest.importorskip("torch")
+pytest.importorskip("whisper")
+
+from inference_scheduler import INTERACTIVE, LIVE, InferenceScheduler, window_checkpoints
+
+class FakeModel:
+    """window_checkpoints'in hook kurduğu encoder'a sahip en küçük model."""
+    def __init__(self):
+        self.encoder = torch.nn.Identity()
+
+def make_scheduler():
+    scheduler = InferenceScheduler(model_type="tiny")
+    scheduler.model = FakeModel()
+    scheduler.loaded_model_type = "tiny"
+    return scheduler
+
+def file_job(events, started, resume, windows=5):
+    """Her pencerede encoder'ı çağıran uzun dosya işi; ilk pencereden sonra resume beklenir."""
+    def run(model, job):
+        with window_checkpoints(model, job, duration=windows * 30.0):
+            for i in range(windows):
+                model.encoder(torch.zeros(1))
+                events.append(f"file-{i}")
+                if i == 0:
+                    started.set()
+                    assert resume.wait(5)
+        return "file"
+    return run
+
+def test_live_job_overtakes_running_file_job():
+    scheduler = make_scheduler()
+    events = []
+    started, resume = threading.Event(), threading.Event()
+    try:
+        file = scheduler.submit(file_job(events, started, resume), INTERACTIVE, "dosya", model_type="tiny")
+        assert started.wait(5)
+        live = scheduler.submit(lambda model, job: events.append("live") or "live", LIVE, "canlı", model_type="tiny")
+        resume.set()
+
+        assert live.wait(5) and file.wait(5)
+        assert (live.status, live.result) == ("done", "live")
+        assert (file.status, file.result) == ("done", "file")
+        # Canlı iş, dosya işinin bir sonraki pencere sınırında araya girer
+        assert events.index("live") == events.index("file-0") + 1
+        assert events[-1] == "file-4"
+    finally:
+        scheduler.shutdown().join(5)
+
+def test_live_waiter_gets_model_at_window_boundary():
+    scheduler = make_scheduler()
+    events = []
+    started, resume = threading.Event(), threading.Event()
+    try:
+        file = scheduler.submit(file_job(events, started, resume), INTERACTIVE, "dosya", model_type="tiny")
+        assert started.wait(5)
+
+        def panel_channel():
+            with scheduler.acquire(LIVE, "tiny") as model:
+                model.encoder(torch.zeros(1))
+                events.append("panel")
+        channel = threading.Thread(target=panel_channel)
+        channel.start()
+        # Kanal bekleyenler arasına girdikten sonra dosya işi devam eder
+        while not scheduler._waiters:
+            time.sleep(0.01)
+        resume.set()
+
+        channel.join(5)
+        assert file.wait(5) and file.status == "done"
+        assert events.index("panel") < events.index("file-4")
+        assert events.count("panel") == 1
+    finally:
+        scheduler.shutdown().join(5)
+
+def test_lower_priority_job_does_not_preempt():
+    scheduler = make_scheduler()
+    events = []
+    started, resume = threading.Event(), threading.Event()
+    try:
+        file = scheduler.submit(file_job(events, started, resume), INTERACTIVE, "dosya", model_type="tiny")
+        assert started.wait(5)
+        batch = scheduler.submit(lambda model, job: events.append("batch"), INTERACTIVE + 1, "toplu", model_type="tiny")
+        resume.set()
+
+        assert file.wait(5) and batch.wait(5)
+        assert events[-1] == "batch"
+    finally:
+        scheduler.shutdown().join(5)
@@ -0,0 +1,33 @@
+"""
+onnx_encoder.py testleri: dışa aktarılan encoder'ın PyTorch encoder'ı ile eşitliği.
+Ağırlık indirmemek için "tiny" boyutlarında rastgele ağırlıklı bir Whisper modeli kullanılır.
+"""
+
+import pytest
+
+pytest.importorskip("onnxruntime")
+torch = pytest.importorskip("torch")
+whisper = pytest.importorskip("whisper")
+
+from whisper.model import ModelDimensions, Whisper
+
+from onnx_encoder import check_parity, enable_onnx_encoder, encoder_path
+
+# openai-whisper "tiny" modelinin boyutları
+TINY_DIMS = ModelDimensions(
+    n_mels=80, n_audio_ctx=1500, n_audio_state=384, n_audio_head=6, n_audio_layer=4,
+    n_vocab=51865, n_text_ctx=448, n_text_state=384, n_text_head=6, n_text_layer=4,
+)
+
+def test_exported_tiny_encoder_matches_pytorch(tmp_path):
+    torch.manual_seed(0)
+    model = Whisper(TINY_DIMS).eval()
+    torch_encoder = model.encoder
+
+    assert enable_onnx_encoder(model, "tiny", cache_dir=str(tmp_path))
+    assert (tmp_path / "whisper_tiny_encoder.onnx").exists()
+    assert encoder_path("tiny", str(tmp_path)).endswith("whisper_tiny_encoder.onnx")
+
+    diff = check_parity(torch_encoder, model.encoder, TINY_DIMS.n_mels, TINY_DIMS.n_audio_ctx * 2)
+    # onnx_encoder.main() ile aynı varsayılan tolerans
+    assert diff <= 1e-3
@@ -0,0 +1,28 @@
+"""transcript_filter.py testleri: dile göre normalizasyon ve engel listesi."""
+
+from transcript_filter import HallucinationFilter, normalize_text
+
+def segment(text, **kwargs):
+    return dict({"text": text, "no_speech_prob": 0.0, "avg_logprob": -0.2, "compression_ratio": 1.2}, **kwargs)
+
+def test_turkish_casefolding_only_for_turkish():
+    assert normalize_text("IŞIK İzmir", "tr") == "ışık izmir"
+    assert normalize_text("IT IS FINE", "en") == "it is fine"
+    assert normalize_text("IT IS FINE") == "it is fine"
+
+def test_english_blocklist_entry_matches_english_segment():
+    transcript_filter = HallucinationFilter(blocklist=["Like and subscribe"])
+    result = {"language": "en", "text": "", "segments": [segment(" LIKE AND SUBSCRIBE!"), segment(" Today we cover limits.")]}
+
+    filtered = transcript_filter.filter(result)
+
+    assert [s["text"] for s in filtered["segments"]] == [" Today we cover limits."]
+    assert transcript_filter.check_segment(segment("THANK YOU FOR WATCHING"), language="en")
+
+def test_turkish_blocklist_entry_matches_turkish_segment():
+    transcript_filter = HallucinationFilter()
+    result = {"language": "tr", "text": "", "segments": [segment(" İZLEDİĞİNİZ İÇİN TEŞEKKÜRLER."), segment(" Bugün limit konusunu işleyeceğiz.")]}
+
+    filtered = transcript_filter.filter(result)
+
+    assert filtered["text"] == " Bugün limit konusunu işleyeceğiz."
@@ -0,0 +1,219 @@
+"""
+token_budget.py - İstemler İçin Token Bütçesi ve Kullanım/Maliyet Takibi
+Arayüzdeki istemler metin birleştirme ve gelişigüzel kırpmalarla (örn. ilk 4000
+karakter, son 5 mesaj) oluşturuluyordu; uzun bir transkript veya not isteği
+modelin bağlam sınırını aşabiliyor, kısa bir soru ise gereksiz yere büyük
+bağlam taşıyabiliyordu. Bu modül istem parçalarını (sistem talimatı, doküman
+bağlamı, sohbet geçmişi, kullanıcı mesajı) öncelikleriyle birlikte toplar ve
+model başına bütçeye sığana kadar en düşük öncelikli parçadan başlayarak
+kırpar. Ayrıca her isteğin token kullanımını ve tahmini maliyetini kaydeder.
+"""
+
+import threading
+
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+# Modellerin bağlam penceresi (token)
+MODEL_CONTEXT = {
+    "gpt-4o": 128000,
+    "gpt-4o-mini": 128000,
+    "gemini-2.5-flash": 1048576,
+    "gemini-2.0-flash-exp": 1048576,
+    "gemini-1.5-flash-latest": 1048576,
+    "gemini-1.5-pro-latest": 2097152,
+    "gemini-flash-latest": 1048576,
+}
+DEFAULT_CONTEXT = 32000
+
+# 1M token başına fiyat (USD): (giriş, çıkış)
+MODEL_PRICES = {
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gemini-2.5-flash": (0.30, 2.50),
+    "gemini-2.0-flash-exp": (0.10, 0.40),
+    "gemini-1.5-flash-latest": (0.075, 0.30),
+    "gemini-1.5-pro-latest": (1.25, 5.00),
+    "gemini-flash-latest": (0.30, 2.50),
+}
+
+REQUIRED = 100 # Bu öncelikteki parçalar kırpılmaz
+
+# Tokenizer yokken kullanılan oran: Türkçe gibi eklemeli dillerde bir token ortalama ~3 karakter
+CHARS_PER_TOKEN = 3
+
+_encodings = {}
+_encoding_lock = threading.Lock()
+
+def _encoding(model):
+    """Modelin tiktoken kodlayıcısını döner (tiktoken yoksa None). Gemini için o200k yaklaşık değer verir."""
+    if tiktoken is None:
+        return None
+    with _encoding_lock:
+        if model not in _encodings:
+            try:
+                _encodings[model] = tiktoken.encoding_for_model(model)
+            except KeyError:
+                _encodings[model] = tiktoken.get_encoding("o200k_base")
+        return _encodings[model]
+
+def count_tokens(text, model=None):
+    """Metnin token sayısını döner (tiktoken kurulu değilse karakter sayısından tahmin edilir)."""
+    if not text:
+        return 0
+    encoding = _encoding(model or "gpt-4o")
+    if encoding is not None:
+        return len(encoding.encode(text, disallowed_special=()))
+    return len(text) // CHARS_PER_TOKEN + 1
+
+def truncate_tokens(text, max_tokens, model=None, keep="start"):
+    """
+    Metni en fazla max_tokens token olacak şekilde kırpar.
+
+    Args:
+        keep (str): "start" metnin başını, "end" sonunu korur.
+    """
+    if max_tokens <= 0:
+        return ""
+    if count_tokens(text, model) <= max_tokens:
+        return text
+    marker = " [...] "
+    budget = max(0, max_tokens - count_tokens(marker, model))
+    encoding = _encoding(model or "gpt-4o")
+    if encoding is not None:
+        tokens = encoding.encode(text, disallowed_special=())
+        kept = encoding.decode(tokens[:budget] if keep == "start" else tokens[len(tokens) - budget:])
+    else:
+        chars = budget * CHARS_PER_TOKEN
+        kept = text[:chars] if keep == "start" else text[len(text) - chars:]
+    return kept + marker if keep == "start" else marker + kept
+
+def cost_of(model, prompt_tokens, completion_tokens):
+    """İsteğin tahmini maliyeti (USD); fiyatı bilinmeyen modeller için 0."""
+    price_in, price_out = MODEL_PRICES.get(model, (0.0, 0.0))
+    return (prompt_tokens * price_in + completion_tokens * price_out) / 1_000_000
+
+class _Part:
+    def __init__(self, name, text, priority, min_tokens, keep, items, tokens):
+        self.name = name
+        self.text = text
+        self.priority = priority
+        self.min_tokens = min_tokens # Metinlerde en az token, listelerde en az öğe sayısı
+        self.keep = keep
+        self.items = items # Geçmiş gibi listeler için (en eski öğe önce atılır)
+        self.tokens = tokens
+
+class PromptBudget:
+    """
+    İstem parçalarını model başına token bütçesine sığdırır.
+    Bütçe aşılırsa en düşük öncelikli parçadan başlanarak kırpılır: liste parçalarında
+    en eski öğeler atılır, metin parçaları keep yönünde kısaltılır. REQUIRED parçalar kırpılmaz.
+    """
+    def __init__(self, model, max_tokens=None, reserve_output=2048):
+        """
+        Args:
+            model (str): İsteğin gönderileceği model (bağlam penceresi ve tokenizer için).
+            max_tokens (int): Giriş için istenen en fazla token (None = yalnızca model sınırı).
+            reserve_output (int): Yanıt için ayrılan token.
+        """
+        self.model = model
+        context_limit = MODEL_CONTEXT.get(model, DEFAULT_CONTEXT) - reserve_output
+        self.limit = min(max_tokens, context_limit) if max_tokens else context_limit
+        self._parts = []
+        self.trimmed = [] # Kırpılan parçaların adları
+
+    def add(self, name, text, priority=0, min_tokens=0, keep="start"):
+        """Metin parçası ekler."""
+        text = text or ""
+        self._parts.append(_Part(name, text, priority, min_tokens, keep, None, count_tokens(text, self.model)))
+
+    def add_items(self, name, items, priority=0, min_items=0):
+        """Öğelerden oluşan parça ekler (örn. sohbet geçmişi); öğeler sırayla birleştirilir."""
+        items = [(item, count_tokens(item, self.model)) for item in items]
+        part = _Part(name, "", priority, min_items, None, items, sum(t for _, t in items))
+        self._parts.append(part)
+
+    def fit(self):
+        """
+        Parçaları bütçeye sığdırır.
+
+        Returns:
+            dict: Parça adı -> (gerekirse kırpılmış) metin.
+        """
+        overflow = sum(p.tokens for p in self._parts) - self.limit
+        # Düşük öncelik önce; eşit öncelikte sonradan eklenen parça önce kırpılır
+        order = sorted((p for p in self._parts if p.priority < REQUIRED),
+                       key=lambda p: (p.priority, -self._parts.index(p)))
+        for part in order:
+            if overflow <= 0:
+                break
+            before = part.tokens
+            if part.items is not None:
+                while overflow > 0 and len(part.items) > part.min_tokens:
+                    _, tokens = part.items.pop(0)
+                    part.tokens -= tokens
+                    overflow -= tokens
+            else:
+                allowed = max(part.min_tokens, part.tokens - overflow)
+                part.text = truncate_tokens(part.text, allowed, self.model, part.keep)
+                part.tokens = count_tokens(part.text, self.model)
+                overflow -= before - part.tokens
+            if part.tokens < before:
+                self.trimmed.append(part.name)
+
+        if self.trimmed:
+            print(f"[Token] {self.model} bütçesi ({self.limit}) için kırpılan parçalar: {', '.join(self.trimmed)}")
+        if overflow > 0:
+            print(f"[Token] Uyarı: zorunlu parçalar bütçeyi {overflow} token aşıyor ({self.model})")
+        return {p.name: "".join(i for i, _ in p.items) if p.items is not None else p.text for p in self._parts}
+
+    @property
+    def total_tokens(self):
+        return sum(p.tokens for p in self._parts)
+
+class UsageTracker:
+    """Süreç genelinde istek başına token kullanımını ve tahmini maliyeti toplar."""
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.cost = 0.0
+        self.by_model = {}
+
+    def record(self, provider, model, prompt_tokens, completion_tokens, estimated=False, cached=False):
+        """
+        Bir isteğin kullanımını kaydeder ve özetini yazdırır.
+
+        Args:
+            estimated (bool): Sayılar API yerine yerel tokenizer/tahminle hesaplandıysa True.
+            cached (bool): Yanıt önbellekten geldiyse True (maliyet 0).
+
+        Returns:
+            float: İsteğin tahmini maliyeti (USD).
+        """
+        cost = 0.0 if cached else cost_of(model, prompt_tokens, completion_tokens)
+        with self._lock:
+            self.calls += 1
+            if not cached:
+                self.prompt_tokens += prompt_tokens
+                self.completion_tokens += completion_tokens
+                self.cost += cost
+                stats = self.by_model.setdefault(model, {"calls": 0, "prompt": 0, "completion": 0, "cost": 0.0})
+                stats["calls"] += 1
+                stats["prompt"] += prompt_tokens
+                stats["completion"] += completion_tokens
+                stats["cost"] += cost
+            total = self.cost
+        source = "önbellek" if cached else ("tahmini" if estimated else "API")
+        print(f"[Token] {provider}/{model}: {prompt_tokens} giriş + {completion_tokens} çıkış ({source}), "
+              f"${cost:.4f} | oturum toplamı: ${total:.4f}")
+        return cost
+
+    def summary(self):
+        """Toplam kullanımın kısa metin özetini döner."""
+        with self._lock:
+            return (f"{self.calls} istek, {self.prompt_tokens} giriş + {self.completion_tokens} çıkış token, "
+                    f"tahmini ${self.cost:.4f}")
@@ -6,85 +6,173 @@ ses dosyalarını yüksek doğrulukla metne dönüştürür.
 
 import whisper
 import numpy as np
-import os
 import queue
 import threading
-import tempfile
-import scipy.io.wavfile as wav
-import torch
+from contextlib import contextmanager
+
+from language_detector import SessionLanguageDetector
+from decoding_profiles import get_decoding_options
+from transcript_filter import HallucinationFilter
+from rolling_prompt import RollingPrompt
+from cpu_resources import get_cpu_manager
+from streaming_mel import StreamingLogMel, decode_window
+from whisper.audio import HOP_LENGTH, SAMPLE_RATE
+from onnx_encoder import enable_onnx_encoder
+
+class ModelPool:
+    """
+    Yüklenmiş Whisper modellerini birden fazla ses kaynağı arasında paylaştıran havuz.
+    Whisper'ın decoder'ı KV-cache hook'ları kurduğu için aynı model nesnesi iki thread'de
+    aynı anda çalıştırılamaz; havuz her işe tek bir kopyayı ödünç verir.
+    """
+    def __init__(self, model_type="medium", device="cpu", size=1, models=None):
+        """
+        Args:
+            model_type (str): Whisper model boyutu.
+            device (str): "cpu" veya "cuda".
+            size (int): Havuzdaki model kopyası sayısı (eşzamanlı transkripsiyon sayısı).
+            models (list): Önceden yüklenmiş modeller (verilirse yeniden yüklenmez).
+        """
+        self.model_type = model_type
+        self.device = device
+        self._models = queue.Queue()
+        models = list(models or [])
+        while len(models) < size:
+            models.append(whisper.load_model(model_type, device=device))
+        for m in models:
+            self._models.put(m)
+        self.size = len(models)
+
+    @contextmanager
+    def acquire(self):
+        """Havuzdan bir model ödünç alır, iş bitince geri bırakır."""
+        model = self._models.get()
+        try:
+            yield model
+        finally:
+            self._models.put(model)
 
 class Transcriber:
     """
     Ses dosyalarını arka planda metne dönüştüren işleyici sınıf.
     """
-    def __init__(self, device="cpu", model_type="medium"):
+    def __init__(self, device="cpu", model_type="medium", use_onnx=False):
         """
         Args:
             device (str): "cpu" veya "cuda" (GPU kullanımı için).
             model_type (str): Kullanılacak Whisper model boyutu (tiny, base, small, medium, large).
+            use_onnx (bool): CPU'da encoder'ı ONNX Runtime ile çalıştır (kuruluysa).
         """
         self.device = device
         # Modeli hafızaya yükle (Bu işlem model boyutuna göre zaman alabilir)
         self.model = whisper.load_model(model_type, device=self.device)
+        if use_onnx and device == "cpu":
+            enable_onnx_encoder(self.model, model_type)
         self.queue = queue.Queue()
         self.is_running = False
         self.audio_buffer = []
         self.current_lang = "turkish"
         self.task = "transcribe" # "transcribe" (metne dök) veya "translate" (İngilizceye çevir)
+        # "auto" modunda dil oturum başında bir kez belirlenir
+        self.language_detector = SessionLanguageDetector()
+        # Canlı akışta gecikme öncelikli: greedy çözümleme, yedekleme yok
+        self.decoding_profile = "live"
+        # Sessiz bloklardaki kalıp cümleleri ve tekrarları eleyen filtre
+        self.output_filter = HallucinationFilter()
+        # Son metin + sözlükten oluşan token sınırlı bağlam (isim/terim tutarlılığı için)
+        self.rolling_prompt = RollingPrompt()
+        # Mel kareleri ses geldikçe hesaplanır; blok başına 30 sn'lik STFT yapılmaz
+        self.features = StreamingLogMel(self.model.dims.n_mels)
+        self.block_start_frame = 0
 
     def add_audio_chunk(self, chunk):
-        """Ham ses paketlerini buffer'a ekler."""
-        self.audio_buffer.extend(chunk.flatten())
+        """Ham ses paketlerini buffer'a ekler ve yeni mel karelerini hesaplar."""
+        samples = chunk.flatten().astype(np.float32)
+        self.audio_buffer.extend(samples)
+        self.features.feed(samples)
         # Buffer yeterli büyüklüğe (yaklaşık 3 saniye) ulaştığında kuyruğa al
         if len(self.audio_buffer) >= 48000:
-            self._save_and_queue()
+            self._queue_block()
 
-    def _save_and_queue(self):
-        """Buffer'daki sesi geçici bir WAV dosyasına kaydeder ve işleme kuyruğuna ekler."""
-        data = np.array(self.audio_buffer)
-        # Float veriyi 16-bit PCM formatına dönüştür
-        scaled = (data * 32767).astype(np.int16)
-        tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-        wav.write(tmp.name, 16000, scaled)
-        self.queue.put(tmp.name)
+    def _queue_block(self):
+        """Buffer'daki sesi ve hazır mel penceresini işleme kuyruğuna ekler."""
+        audio = np.array(self.audio_buffer, dtype=np.float32)
+        end_frame = self.features.total_samples // HOP_LENGTH
+        mel = self.features.window(self.block_start_frame, end_frame)
+        self.features.trim(end_frame)
+        self.block_start_frame = end_frame
+        self.queue.put((audio, mel))
         self.audio_buffer = []
 
-    def start(self, language="turkish", task="transcribe", callback=None):
+    def start(self, language="turkish", task="transcribe", callback=None, decoding_profile=None):
         """Transkripsiyon işçisini (worker) başlatır."""
         self.is_running = True
+        if decoding_profile:
+            self.decoding_profile = decoding_profile
         self.current_lang = language
         self.task = task
         self.on_text = callback
+        self.language_detector.reset()
+        self.rolling_prompt.reset()
+        self.features.reset()
+        self.block_start_frame = 0
+        self.audio_buffer = []
         # Arka planda çalışacak thread'i başlat
-        threading.Thread(target=self._worker, daemon=True).start()
+        self.worker_thread = threading.Thread(target=self._worker, daemon=True)
+        self.worker_thread.start()
 
-    def stop(self):
-        """İşleyiciyi durdurur."""
+    def stop(self, timeout=5.0):
+        """
+        İşleyiciyi durdurur. Çalışan blok bitene kadar (en fazla timeout saniye) beklenir,
+        işlenmemiş bloklar atılır.
+        """
         self.is_running = False
+        worker = getattr(self, "worker_thread", None)
+        if worker and worker is not threading.current_thread():
+            worker.join(timeout)
+        self._discard_pending()
+
+    def _discard_pending(self):
+        """Kuyrukta kalan işlenmemiş blokları atar."""
+        while True:
+            try:
+                self.queue.get_nowait()
+            except queue.Empty:
+                break
 
     def _worker(self):
         """Kuyruktaki ses dosyalarını sırayla işleyen döngü."""
+        get_cpu_manager().configure_worker(0, 1)
         while self.is_running:
             try:
-                # Kuyruktan dosya yolunu al (1 saniye bekle)
-                fname = self.queue.get(timeout=1)
-                lang_param = None if self.current_lang == "auto" else self.current_lang
+                # Kuyruktan ses bloğunu ve mel penceresini al (1 saniye bekle)
+                audio, mel = self.queue.get(timeout=1)
+            except queue.Empty:
+                continue
+            try:
+                if self.current_lang == "auto":
+                    # Kilitli oturum dili varsa blok başına dil algılama yapılmaz
+                    lang_param = self.language_detector.language_for(self.model, audio)
+                else:
+                    lang_param = self.current_lang
                 
-                # Whisper modelini kullanarak sesi metne dönüştür
-                res = self.model.transcribe(
-                    fname, 
-                    language=lang_param, 
+                # Hazır mel penceresini doğrudan çöz (transcribe() mel'i baştan hesaplardı)
+                res = decode_window(
+                    self.model,
+                    mel,
+                    get_decoding_options(self.decoding_profile, self.device),
+                    language=lang_param,
                     task=self.task,
-                    # GPU varsa FP16 (hızlı mod) kullan
-                    fp16=True if self.device == "cuda" else False 
+                    prompt=self.rolling_prompt.build(),
+                    duration=len(audio) / SAMPLE_RATE
                 )
+                if self.current_lang == "auto":
+                    self.language_detector.observe(res)
+                res = self.output_filter.filter(res)
+                self.rolling_prompt.commit(res["text"])
                 
                 # Eğer metin boş değilse callback fonksiyonunu çağır (UI'ya yazı gönderir)
                 if res["text"].strip(): 
                     self.on_text(res["text"])
-                
-                # İşlem bitince geçici dosyayı sil
-                os.remove(fname)
-            except Exception:
-                # Kuyruk boşsa veya hata oluşursa döngüye devam et
-                continue
+            except Exception as e:
+                print(f"Transkripsiyon hatası: {e}")
@@ -0,0 +1,144 @@
+"""
+transcript_filter.py - Halüsinasyon ve Tekrar Filtresi
+Whisper sessiz veya gürültülü bloklarda eğitim verisinden kalma kalıp cümleler
+("Altyazı M.K.", "İzlediğiniz için teşekkürler" vb.) veya kendini tekrar eden
+ifadeler üretebilir. Bu modül çözümleme sonrası segmentleri güven değerleri,
+sıkıştırma oranı, n-gram tekrarı ve engel listesine göre eler.
+"""
+
+import re
+from collections import Counter
+
+# Whisper'ın sessizlikte en sık ürettiği kalıp cümleler (küçük harf, noktalamasız)
+DEFAULT_BLOCKLIST = [
+    "altyazı mk",
+    "altyazı m k",
+    "izlediğiniz için teşekkürler",
+    "izlediğiniz için teşekkür ederim",
+    "abone olmayı unutmayın",
+    "bir sonraki videoda görüşmek üzere",
+    "thanks for watching",
+    "thank you for watching",
+    "please subscribe",
+    "subtitles by the amaraorg community",
+    "untertitel der amaraorg community",
+    "sous-titrage société radio-canada",
+]
+
+def normalize_text(text, language=None):
+    """
+    Karşılaştırma için metni küçük harfe çevirir ve noktalamayı kaldırır.
+    Türkçe büyük/küçük harf kuralları (I -> ı, İ -> i) yalnızca dil "tr" iken uygulanır;
+    diğer dillerde str.casefold() kullanılır (İngilizce "I" -> "i").
+    """
+    if language == "tr":
+        text = text.replace("İ", "i").replace("I", "ı").lower()
+    else:
+        text = text.casefold()
+    text = re.sub(r"[^\w\s-]", "", text)
+    return " ".join(text.split())
+
+class HallucinationFilter:
+    """
+    Whisper çıktısındaki halüsinasyon ve tekrar segmentlerini eleyen filtre.
+    """
+    def __init__(self, no_speech_threshold=0.6, logprob_threshold=-1.0, min_logprob=-1.5,
+                 compression_ratio_threshold=2.4, ngram_size=3, max_ngram_repeats=3, blocklist=None):
+        """
+        Args:
+            no_speech_threshold (float): Bu olasılığın üstünde (ve düşük güvenle) segment sessizlik sayılır.
+            logprob_threshold (float): no_speech kontrolünde kullanılan ortalama log-olasılık sınırı.
+            min_logprob (float): Bunun altındaki segmentler her durumda atılır.
+            compression_ratio_threshold (float): gzip sıkıştırma oranı bunu aşarsa metin tekrar doludur.
+            ngram_size (int): Tekrar kontrolünde kullanılan kelime grubu uzunluğu.
+            max_ngram_repeats (int): Aynı n-gram'ın bir segmentte izin verilen en fazla tekrarı.
+            blocklist (list): Varsayılan listeye eklenecek kalıp cümleler.
+        """
+        self.no_speech_threshold = no_speech_threshold
+        self.logprob_threshold = logprob_threshold
+        self.min_logprob = min_logprob
+        self.compression_ratio_threshold = compression_ratio_threshold
+        self.ngram_size = ngram_size
+        self.max_ngram_repeats = max_ngram_repeats
+        self.phrases = DEFAULT_BLOCKLIST + list(blocklist or [])
+        self._blocklists = {} # Dil -> o dilin kurallarıyla normalize edilmiş engel listesi
+
+    def blocklist_for(self, language=None):
+        """Engel listesini verilen dilin büyük/küçük harf kurallarıyla normalize edilmiş olarak döner."""
+        if language not in self._blocklists:
+            phrases = [normalize_text(p, language) for p in self.phrases]
+            self._blocklists[language] = [p for p in phrases if p]
+        return self._blocklists[language]
+
+    def check_segment(self, segment, previous_text=None, language=None):
+        """
+        Tek bir segmenti kontrol eder.
+
+        Args:
+            segment (dict): Whisper segmenti (text, no_speech_prob, avg_logprob, compression_ratio).
+            previous_text (str): Bir önceki kabul edilen segmentin normalize metni.
+            language (str): Segmentin (veya oturumun) dili; metin bu dilin kurallarıyla normalize edilir.
+
+        Returns:
+            str | None: Atılma nedeni veya segment geçerliyse None.
+        """
+        language = segment.get("language", language)
+        text = normalize_text(segment.get("text", ""), language)
+        if not text:
+            return "boş metin"
+
+        no_speech = segment.get("no_speech_prob", 0.0)
+        avg_logprob = segment.get("avg_logprob", 0.0)
+        if no_speech > self.no_speech_threshold and avg_logprob < self.logprob_threshold:
+            return f"sessizlik (no_speech={no_speech:.2f}, logprob={avg_logprob:.2f})"
+        if avg_logprob < self.min_logprob:
+            return f"düşük güven (logprob={avg_logprob:.2f})"
+        if segment.get("compression_ratio", 0.0) > self.compression_ratio_threshold:
+            return f"yüksek sıkıştırma oranı ({segment['compression_ratio']:.2f})"
+
+        for phrase in self.blocklist_for(language):
+            # Kalıp cümle segmentin tamamını veya neredeyse tamamını oluşturuyorsa
+            if phrase in text and len(text) < 2 * len(phrase):
+                return f"engel listesi ('{phrase}')"
+
+        repeats = self._max_ngram_repeats(text.split())
+        if repeats > self.max_ngram_repeats:
+            return f"n-gram tekrarı ({repeats} kez)"
+        if previous_text and text == previous_text and len(text.split()) > 2:
+            return "önceki segmentin tekrarı"
+        return None
+
+    def _max_ngram_repeats(self, words):
+        n = self.ngram_size if len(words) >= self.ngram_size * 2 else 1
+        if len(words) < n * 2:
+            return 0
+        counts = Counter(tuple(words[i:i + n]) for i in range(len(words) - n + 1))
+        return max(counts.values())
+
+    def filter(self, result):
+        """
+        model.transcribe() sonucunu filtreler; atılan segmentleri nedeniyle loglar.
+
+        Args:
+            result (dict): Whisper transkripsiyon sonucu.
+
+        Returns:
+            dict: Aynı yapıda, yalnızca geçerli segmentleri ve bunlardan oluşan metni içeren sonuç.
+        """
+        kept = []
+        previous = None
+        language = result.get("language")
+        for seg in result.get("segments", []):
+            reason = self.check_segment(seg, previous, language)
+            if reason:
+                print(f"[Filtre] Segment atıldı ({reason}): {seg.get('text', '').strip()!r}")
+                continue
+            kept.append(seg)
+            previous = normalize_text(seg["text"], seg.get("language", language))
+        filtered = dict(result)
+        filtered["segments"] = kept
+        filtered["text"] = "".join(seg["text"] for seg in kept)
+        if "translation" in result:
+            # Çift çıktı modunda çeviri de yalnızca kalan segmentlerden oluşur
+            filtered["translation"] = " ".join(seg.get("translation", "") for seg in kept)
+        return filtered